@@ -4,14 +4,28 @@ Flask API for serving nutrition predictions based on trained ML model
 Uses user health data to predict personalized calorie targets and macronutrient distribution
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 import os
+import threading
+import time
 from dotenv import load_dotenv
 import joblib
 import numpy as np
 import pandas as pd
 from datetime import datetime
+from calorie_features import build_feature_frame
+from synthetic_users import GOAL_CALORIE_ADJUSTMENTS
+from weight_forecast import simulate_weight_trajectories, MAX_FORECAST_WEEKS
+from meal_catalog import catalog_from_system
+from meal_planner import plan_day, plan_week, plan_error, optimal_serving_multipliers, PLAN_SLOTS, NUTRIENT_WEIGHTS, SERVING_BOUNDS
+from meal_ranking import mmr_rerank, filtered_similar, MMR_POOL_FACTOR, MMR_CANDIDATES
+from meal_search import MealTextIndex
+from meal_ingredients import IngredientIndex
+from meal_query import NutrientRangeIndex, parse_constraints, QUERY_COLUMNS, COLUMN_ALIASES
+from meal_pareto import pareto_front, parse_objectives
+from food_nutrition import FoodNutritionTable, NUTRITION_COLUMNS
+from meal_shards import ShardedMealCatalog
 
 # Load environment variables
 load_dotenv()
@@ -29,6 +43,8 @@ CORS(app, origins=cors_origins, supports_credentials=True)
 PORT = int(os.getenv('PORT', 5001))
 MODEL_PATH = os.getenv('MODEL_PATH', 'models/nutrition_model.pkl')
 SCALER_PATH = os.getenv('SCALER_PATH', 'models/scaler.pkl')
+# Seconds between checks for a newly published meal catalog version
+RECOMMENDATION_RELOAD_INTERVAL = float(os.getenv('RECOMMENDATION_RELOAD_INTERVAL', 5))
 
 # ======================
 # Load ML Models (if exist)
@@ -36,22 +52,148 @@ SCALER_PATH = os.getenv('SCALER_PATH', 'models/scaler.pkl')
 try:
     model = joblib.load(MODEL_PATH)
     scaler = joblib.load(SCALER_PATH)
+    MODEL_MTIME = os.path.getmtime(MODEL_PATH)
     MODEL_LOADED = True
     print("✅ Nutrition ML Model loaded successfully")
 except:
     MODEL_LOADED = False
+    MODEL_MTIME = None
     print("⚠️  Nutrition ML Model not found. Using fallback calculation.")
 
 # Load Meal Recommendation System
+class MealServices:
+    """
+    One loaded catalog version: the recommendation system and every index built on it
+
+    Published as a unit with a single assignment to meal_services and never
+    modified afterwards, so a request that took a bundle resolves all its meal
+    indices against the same catalog even while a reload publishes the next
+    one. `users` counts the requests holding the bundle (guarded by
+    meal_services_lock); retired bundles stop their shard workers at zero.
+    """
+
+    def __init__(self, system):
+        self.system = system
+        self.catalog = catalog_from_system(system)
+        self.text_index = MealTextIndex.from_system(system)
+        self.ingredients = IngredientIndex.from_system(system)
+        self.nutrients = NutrientRangeIndex(self.catalog)
+        # Shards are built last: in sharded mode they take over the feature rows and postings
+        self.shards = ShardedMealCatalog(system, self.catalog, self.text_index, release_local=True)
+        self.users = 0
+
+
+def acquire_meal_services():
+    """The current meal services bundle, counted as in use until release_meal_services(); None if not loaded"""
+    with meal_services_lock:
+        services = meal_services
+        if services is not None:
+            services.users += 1
+    return services
+
+
+def release_meal_services(services):
+    if services is not None:
+        with meal_services_lock:
+            services.users -= 1
+
+
+def refresh_recommendation_system():
+    """
+    Reload the recommendation system if a new catalog version was published
+    (e.g. by catalog_updates.py); returns the bundle it replaced, or None
+    """
+    global meal_services, RECOMMENDATION_MTIME
+    mtime = os.path.getmtime(RECOMMENDATION_PATH)
+    if mtime == RECOMMENDATION_MTIME:
+        return None
+    services = MealServices(joblib.load(RECOMMENDATION_PATH))
+    with meal_services_lock:
+        old_services, meal_services = meal_services, services
+    RECOMMENDATION_MTIME = mtime
+    print(f"🔄 Meal Recommendation System reloaded (catalog version {services.system.get('catalog_version', 0)}, "
+          f"{len(services.catalog)} meals)")
+    return old_services
+
+
+def close_idle_services(retired):
+    """Stop the shard workers of retired bundles no request holds any more; returns the rest"""
+    with meal_services_lock:
+        idle = [services for services in retired if services.users == 0]
+    for services in idle:
+        services.shards.close()
+    return [services for services in retired if services not in idle]
+
+
+def supervise_recommendation_system():
+    """
+    Background thread that picks up new catalog versions every RECOMMENDATION_RELOAD_INTERVAL
+
+    Loading the pickle and starting shard workers happen here, never in a
+    request thread. A replaced bundle's shards are stopped once the last
+    request using it has finished.
+    """
+    retired = []
+    while True:
+        time.sleep(RECOMMENDATION_RELOAD_INTERVAL)
+        try:
+            old_services = refresh_recommendation_system()
+            if old_services is not None:
+                retired.append(old_services)
+        except Exception as e:
+            print(f"Recommendation system reload error: {e}")
+        retired = close_idle_services(retired)
+
+
+RECOMMENDATION_PATH = 'models/meal_recommendation_system.pkl'
+meal_services_lock = threading.Lock()
+meal_services = None
+RECOMMENDATION_MTIME = None
+RECOMMENDATION_LOADED = False
+
+# Shard workers start from a forkserver that imports this module as
+# __mp_main__ (see meal_shards.py); only the service process loads the
+# recommendation system and starts workers
+if __name__ != '__mp_main__':
+    try:
+        RECOMMENDATION_MTIME = os.path.getmtime(RECOMMENDATION_PATH)
+        meal_services = MealServices(joblib.load(RECOMMENDATION_PATH))
+        RECOMMENDATION_LOADED = True
+        n_shards = meal_services.shards.n_shards
+        print(f"✅ Meal Recommendation System loaded ({len(meal_services.catalog)} meals, "
+              f"{n_shards} shard{'s' if n_shards > 1 else ''})")
+    except Exception as e:
+        RECOMMENDATION_MTIME = None
+        print(f"⚠️  Meal Recommendation System not found. Run train_meal_recommendation.py")
+
+# Load Food Nutrition Table
 try:
-    RECOMMENDATION_PATH = 'models/meal_recommendation_system.pkl'
-    recommendation_system = joblib.load(RECOMMENDATION_PATH)
-    RECOMMENDATION_LOADED = True
-    print(f"✅ Meal Recommendation System loaded ({len(recommendation_system['meals_df'])} meals)")
+    NUTRITION_TABLE_PATH = os.getenv('NUTRITION_TABLE_PATH', '../datasets/nutrition.csv')
+    food_table = FoodNutritionTable.from_csv(NUTRITION_TABLE_PATH)
+    print(f"✅ Food nutrition table loaded ({len(food_table)} foods)")
 except Exception as e:
-    RECOMMENDATION_LOADED = False
-    recommendation_system = None
-    print(f"⚠️  Meal Recommendation System not found. Run train_meal_recommendation.py")
+    food_table = None
+    print(f"⚠️  Food nutrition table not found at {NUTRITION_TABLE_PATH}")
+
+def refresh_model():
+    """
+    Reload the nutrition model if a new version was published to MODEL_PATH
+    (e.g. by online_calorie_model.py); costs one stat() per call otherwise
+    """
+    global model, MODEL_MTIME
+    if not MODEL_LOADED:
+        return
+    try:
+        mtime = os.path.getmtime(MODEL_PATH)
+        if mtime != MODEL_MTIME:
+            model = joblib.load(MODEL_PATH)
+            MODEL_MTIME = mtime
+            print(f"🔄 Nutrition ML Model reloaded (version {getattr(model, 'version', 'base')})")
+    except Exception as e:
+        print(f"Model reload error: {e}")
+
+if RECOMMENDATION_LOADED:
+    threading.Thread(target=supervise_recommendation_system, name='recommendation-reload', daemon=True).start()
 
 # ======================
 # Activity Level Multipliers
@@ -67,14 +209,23 @@ ACTIVITY_MULTIPLIERS = {
 # ======================
 # Fitness Goal Adjustments (calories)
 # ======================
-GOAL_ADJUSTMENTS = {
-    'lose_weight': -500,     # Calorie deficit for weight loss
-    'maintain_weight': 0,    # Maintenance calories
-    'gain_weight': 500,      # Calorie surplus for weight gain
-    'build_muscle': 300,     # Moderate surplus for muscle building
-    'improve_health': 0      # Maintenance with focus on nutrition quality
+# Shared with model training and online updates (synthetic_users.py)
+GOAL_ADJUSTMENTS = GOAL_CALORIE_ADJUSTMENTS
+
+# ======================
+# Macronutrient Ratios by Goal
+# ======================
+MACRO_RATIOS = {
+    'lose_weight': {'protein': 0.35, 'carbs': 0.35, 'fats': 0.30},
+    'maintain_weight': {'protein': 0.30, 'carbs': 0.40, 'fats': 0.30},
+    'gain_weight': {'protein': 0.25, 'carbs': 0.45, 'fats': 0.30},
+    'build_muscle': {'protein': 0.35, 'carbs': 0.40, 'fats': 0.25},
+    'improve_health': {'protein': 0.30, 'carbs': 0.40, 'fats': 0.30}
 }
 
+MAX_SWEEP_SCENARIOS = 5000  # Largest grid /predict/sweep evaluates in one call
+MAX_LOOKUP_ITEMS = 1000     # Largest food log /nutrition/lookup resolves in one call
+
 # ======================
 # Helper Functions
 # ======================
@@ -139,16 +290,7 @@ def calculate_macronutrients(daily_calories, fitness_goal):
     - Fats: 9 calories per gram
     """
     
-    # Define macro ratios for different goals
-    macro_ratios = {
-        'lose_weight': {'protein': 0.35, 'carbs': 0.35, 'fats': 0.30},
-        'maintain_weight': {'protein': 0.30, 'carbs': 0.40, 'fats': 0.30},
-        'gain_weight': {'protein': 0.25, 'carbs': 0.45, 'fats': 0.30},
-        'build_muscle': {'protein': 0.35, 'carbs': 0.40, 'fats': 0.25},
-        'improve_health': {'protein': 0.30, 'carbs': 0.40, 'fats': 0.30}
-    }
-    
-    ratios = macro_ratios.get(fitness_goal, macro_ratios['maintain_weight'])
+    ratios = MACRO_RATIOS.get(fitness_goal, MACRO_RATIOS['maintain_weight'])
     
     # Calculate grams for each macronutrient
     protein_grams = round((daily_calories * ratios['protein']) / 4)  # 4 cal/g
@@ -199,56 +341,24 @@ def generate_recommendations(bmi, fitness_goal, age):
 def preprocess_features(data):
     """
     Preprocess input features for ML model prediction
-    Converts categorical variables to numerical and applies scaling
+    Converts categorical variables to numerical and builds the engineered
+    features in the same column order the model was trained with
     """
-    # Create feature array
-    features = []
-    
-    # Encode gender (male=1, female=0, other=0.5)
-    gender_encoded = 1 if data['gender'] == 'male' else (0 if data['gender'] == 'female' else 0.5)
-    
-    # Encode activity level (0-4 scale)
-    activity_encoding = {
-        'sedentary': 0,
-        'light': 1,
-        'moderate': 2,
-        'active': 3,
-        'very_active': 4
-    }
-    activity_encoded = activity_encoding.get(data['activity_level'], 2)
-    
-    # Encode fitness goal (0-4 scale)
-    goal_encoding = {
-        'lose_weight': 0,
-        'maintain_weight': 1,
-        'gain_weight': 2,
-        'build_muscle': 3,
-        'improve_health': 1
-    }
-    goal_encoded = goal_encoding.get(data['fitness_goal'], 1)
-    
-    # Calculate additional features
-    bmi = calculate_bmi(data['weight'], data['height'])
-    bmr = calculate_bmr(data['age'], data['gender'], data['weight'], data['height'])
-    
-    # Feature array: [age, gender, height, weight, bmi, bmr, activity, goal]
-    features = [
-        data['age'],
-        gender_encoded,
-        data['height'],
-        data['weight'],
-        bmi,
-        bmr,
-        activity_encoded,
-        goal_encoded
-    ]
-    
-    return np.array(features).reshape(1, -1)
+    return build_feature_frame([data])
 
 # ======================
 # API Routes
 # ======================
 
+@app.before_request
+def hold_meal_services():
+    """Take the current catalog version once per request, so a reload never mixes two"""
+    g.meal_services = acquire_meal_services()
+
+@app.teardown_request
+def drop_meal_services(exception=None):
+    release_meal_services(g.pop('meal_services', None))
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """
@@ -258,6 +368,7 @@ def health_check():
         'success': True,
         'message': 'NutriGuide ML Service is running',
         'model_loaded': MODEL_LOADED,
+        'model_version': getattr(model, 'version', 0) if MODEL_LOADED else None,
         'timestamp': datetime.now().isoformat()
     })
 
@@ -310,6 +421,7 @@ def predict():
         
         # If ML model is loaded, use it for refined predictions
         if MODEL_LOADED:
+            refresh_model()
             try:
                 features = preprocess_features(data)
                 # Scale features if scaler is available
@@ -388,6 +500,388 @@ def batch_predict():
             'message': f'Batch prediction error: {str(e)}'
         }), 500
 
+# ======================
+# What-if Sweep
+# ======================
+
+def parse_sweep_weights(spec):
+    """Weights to sweep: a list of values or {"min": 60, "max": 90, "step": 5}"""
+    if isinstance(spec, dict):
+        start, stop, step = float(spec['min']), float(spec['max']), float(spec.get('step', 1))
+        if not np.isfinite([start, stop, step]).all() or step <= 0:
+            raise ValueError('weights.min, max and step must be finite and step positive')
+        if stop < start:
+            raise ValueError('weights.max must not be below weights.min')
+        # Size the range before materializing it so huge ranges are rejected cheaply
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        if count > MAX_SWEEP_SCENARIOS:
+            raise ValueError(f'range has {count} weights (max {MAX_SWEEP_SCENARIOS})')
+        values = np.linspace(start, start + (count - 1) * step, count)
+    else:
+        values = np.asarray(spec, dtype=float)
+        if values.size > MAX_SWEEP_SCENARIOS:
+            raise ValueError(f'list has {values.size} weights (max {MAX_SWEEP_SCENARIOS})')
+    if values.size == 0 or (values <= 0).any():
+        raise ValueError('weights must be a non-empty list of positive values')
+    return np.round(values, 2)
+
+
+def predict_daily_calories_batch(profiles):
+    """
+    Daily calorie targets for many profiles with one feature and model pass
+    
+    Mirrors /predict: the formula target, replaced by the ML prediction
+    wherever the model is loaded and its prediction is within 1200-5000.
+    Returns (daily_calories array, method).
+    """
+    age = profiles['age'].to_numpy(dtype=float)
+    height = profiles['height'].to_numpy(dtype=float)
+    weight = profiles['weight'].to_numpy(dtype=float)
+    is_male = (profiles['gender'] == 'male').to_numpy()
+    multiplier = profiles['activity_level'].map(ACTIVITY_MULTIPLIERS).fillna(1.55).to_numpy(dtype=float)
+    adjustment = profiles['fitness_goal'].map(GOAL_ADJUSTMENTS).fillna(0).to_numpy(dtype=float)
+    
+    bmr = np.round(10 * weight + 6.25 * height - 5 * age + np.where(is_male, 5, -161), 2)
+    tdee = np.round(bmr * multiplier, 2)
+    daily_calories = np.round(tdee + adjustment)
+    
+    if not MODEL_LOADED:
+        return daily_calories, 'calculation'
+    
+    refresh_model()
+    try:
+        features = build_feature_frame(profiles)
+        if scaler:
+            features = scaler.transform(features)
+        predictions = model.predict(features)
+        plausible = (predictions >= 1200) & (predictions <= 5000)
+        daily_calories = np.where(plausible, np.round(predictions), daily_calories)
+    except Exception as ml_error:
+        print(f"ML sweep prediction error: {ml_error}")
+    
+    return daily_calories, 'ml_model'
+
+
+@app.route('/predict/sweep', methods=['POST'])
+def predict_sweep():
+    """
+    Evaluate a grid of what-if scenarios for one profile in a single pass
+    POST body: {
+        "age": 25, "gender": "male", "height": 175, "weight": 80,
+        "activity_levels": ["sedentary", "moderate", ...],   (default: all)
+        "fitness_goals": ["lose_weight", ...],                (default: all)
+        "weights": [70, 75, 80] or {"min": 70, "max": 90, "step": 5}   (optional)
+    }
+    Grid values are nested in "dimensions" order, e.g.
+    daily_calories[activity_index][goal_index] (weight first when swept).
+    """
+    try:
+        data = request.get_json()
+        
+        for field in ['age', 'gender', 'height']:
+            if field not in data:
+                return jsonify({
+                    'success': False,
+                    'message': f'Missing required field: {field}'
+                }), 400
+        
+        activity_levels = data.get('activity_levels') or list(ACTIVITY_MULTIPLIERS)
+        fitness_goals = data.get('fitness_goals') or list(GOAL_ADJUSTMENTS)
+        unknown = [a for a in activity_levels if a not in ACTIVITY_MULTIPLIERS] + \
+                  [g for g in fitness_goals if g not in GOAL_ADJUSTMENTS]
+        if unknown:
+            return jsonify({
+                'success': False,
+                'message': f'Unknown activity level or goal: {", ".join(map(str, unknown))}'
+            }), 400
+        
+        try:
+            if 'weights' in data:
+                weights = parse_sweep_weights(data['weights'])
+            elif 'weight' in data:
+                weights = np.array([float(data['weight'])])
+            else:
+                raise ValueError('Provide "weight" or "weights"')
+        except (ValueError, TypeError, KeyError) as e:
+            return jsonify({
+                'success': False,
+                'message': f'Invalid weights: {str(e)}'
+            }), 400
+        
+        shape = (len(weights), len(activity_levels), len(fitness_goals))
+        n_scenarios = int(np.prod(shape))
+        if n_scenarios > MAX_SWEEP_SCENARIOS:
+            return jsonify({
+                'success': False,
+                'message': f'Sweep has {n_scenarios} scenarios (max {MAX_SWEEP_SCENARIOS})'
+            }), 400
+        
+        # Scenario matrix in C order: weight, then activity, then goal
+        weight_idx, activity_idx, goal_idx = np.indices(shape).reshape(3, -1)
+        scenarios = pd.DataFrame({
+            'age': float(data['age']),
+            'gender': data['gender'],
+            'height': float(data['height']),
+            'weight': weights[weight_idx],
+            'activity_level': np.asarray(activity_levels, dtype=object)[activity_idx],
+            'fitness_goal': np.asarray(fitness_goals, dtype=object)[goal_idx]
+        })
+        
+        daily_calories, method = predict_daily_calories_batch(scenarios)
+        
+        # Macros per scenario from the goal's ratio row
+        ratios = np.array([[MACRO_RATIOS.get(goal, MACRO_RATIOS['maintain_weight'])[macro]
+                            for macro in ('protein', 'carbs', 'fats')] for goal in fitness_goals])
+        grams = daily_calories[:, None] * ratios[goal_idx] / np.array([4, 4, 9])
+        grams = np.round(grams).astype(int)
+        
+        swept_weights = 'weights' in data
+        grid_shape = shape if swept_weights else shape[1:]
+        dimensions = (['weight'] if swept_weights else []) + ['activity_level', 'fitness_goal']
+        
+        response = {
+            'success': True,
+            'dimensions': dimensions,
+            'activity_levels': activity_levels,
+            'fitness_goals': fitness_goals,
+            'grid': {
+                'daily_calories': daily_calories.astype(int).reshape(grid_shape).tolist(),
+                'protein': grams[:, 0].reshape(grid_shape).tolist(),
+                'carbs': grams[:, 1].reshape(grid_shape).tolist(),
+                'fats': grams[:, 2].reshape(grid_shape).tolist()
+            },
+            'count': n_scenarios,
+            'method': method
+        }
+        if swept_weights:
+            response['weights'] = weights.tolist()
+        
+        return jsonify(response)
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Sweep error: {str(e)}'
+        }), 500
+
+# ======================
+# Forecast Endpoints
+# ======================
+
+FORECAST_FIELDS = ['age', 'gender', 'height', 'weight', 'activity_level', 'fitness_goal']
+
+def run_forecast(users, weeks, include_trajectory=True):
+    """
+    Project weight for many users in one vectorized simulation
+    
+    Daily intake is the user's "daily_calories" if given, otherwise the
+    formula target from /predict (TDEE at the starting weight plus the goal
+    adjustment), held constant while BMR is recomputed as weight changes.
+    """
+    users_df = pd.DataFrame(users)
+    missing = [field for field in FORECAST_FIELDS if field not in users_df.columns or users_df[field].isna().any()]
+    if missing:
+        raise ValueError(f'Missing required field(s): {", ".join(missing)}')
+    
+    age = users_df['age'].to_numpy(dtype=float)
+    height = users_df['height'].to_numpy(dtype=float)
+    weight = users_df['weight'].to_numpy(dtype=float)
+    is_male = (users_df['gender'] == 'male').to_numpy()
+    multiplier = users_df['activity_level'].map(ACTIVITY_MULTIPLIERS).fillna(1.55).to_numpy(dtype=float)
+    adjustment = users_df['fitness_goal'].map(GOAL_ADJUSTMENTS).fillna(0).to_numpy(dtype=float)
+    
+    bmr = 10 * weight + 6.25 * height - 5 * age + np.where(is_male, 5, -161)
+    intake = np.round(bmr * multiplier + adjustment)
+    if 'daily_calories' in users_df.columns:
+        intake = users_df['daily_calories'].fillna(pd.Series(intake, index=users_df.index)).to_numpy(dtype=float)
+    
+    recorded, final_weight, record_days = simulate_weight_trajectories(
+        age, is_male, height, weight, multiplier, intake, days=weeks * 7, record_every=7
+    )
+    
+    results = []
+    for i in range(len(users_df)):
+        result = {
+            'daily_calories': float(intake[i]),
+            'start_weight': float(weight[i]),
+            'projected_weight': round(float(final_weight[i]), 2),
+            'change_kg': round(float(final_weight[i] - weight[i]), 2)
+        }
+        if include_trajectory:
+            result['trajectory'] = [
+                {'week': day // 7, 'weight': round(float(w), 2)}
+                for day, w in zip(record_days, recorded[i])
+            ]
+        results.append(result)
+    
+    return results
+
+
+def parse_forecast_weeks(data):
+    weeks = int(data.get('weeks', 12))
+    if not 1 <= weeks <= MAX_FORECAST_WEEKS:
+        raise ValueError(f'weeks must be between 1 and {MAX_FORECAST_WEEKS}')
+    return weeks
+
+
+@app.route('/forecast', methods=['POST'])
+def forecast():
+    """
+    Project a user's weight over the next N weeks
+    POST body: {
+        "age": 25, "gender": "male", "height": 175, "weight": 80,
+        "activity_level": "moderate", "fitness_goal": "lose_weight",
+        "weeks": 12,
+        "daily_calories": 2100   (optional, defaults to the /predict formula target)
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        try:
+            weeks = parse_forecast_weeks(data)
+            result = run_forecast([data], weeks)[0]
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'weeks': weeks,
+            **result
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Forecast error: {str(e)}'
+        }), 500
+
+
+@app.route('/forecast/batch', methods=['POST'])
+def forecast_batch():
+    """
+    Project weight for many users in one vectorized simulation
+    POST body: { "users": [{...}, {...}], "weeks": 12, "include_trajectory": false }
+    """
+    try:
+        data = request.get_json()
+        users = data.get('users', [])
+        
+        if not users:
+            return jsonify({
+                'success': False,
+                'message': 'No users provided'
+            }), 400
+        
+        try:
+            weeks = parse_forecast_weeks(data)
+            results = run_forecast(users, weeks, include_trajectory=data.get('include_trajectory', False))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'weeks': weeks,
+            'results': results,
+            'count': len(results)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Batch forecast error: {str(e)}'
+        }), 500
+
+# ======================
+# Food Nutrition Endpoints
+# ======================
+
+def validate_lookup_item(item):
+    """Error message for a malformed /nutrition/lookup item, or None if it is valid"""
+    if not isinstance(item, dict) or 'label' not in item or 'grams' not in item:
+        return 'each item needs a label and grams'
+    if not isinstance(item['label'], str) or not item['label'].strip():
+        return 'label must be a non-empty string'
+    if isinstance(item['grams'], bool):
+        return 'grams must be a number'
+    try:
+        grams = float(item['grams'])
+    except (TypeError, ValueError):
+        return 'grams must be a number'
+    if not np.isfinite(grams) or grams <= 0:
+        return 'grams must be a positive number'
+    return None
+
+
+@app.route('/nutrition/lookup', methods=['POST'])
+def nutrition_lookup():
+    """
+    Nutrition of a food log from the reference food table
+    POST body: {
+        "items": [
+            {"label": "apple_pie", "grams": 120},
+            {"label": "caesar_salad", "grams": 250}
+        ]
+    }
+    """
+    try:
+        if food_table is None:
+            return jsonify({
+                'success': False,
+                'message': 'Food nutrition table not available'
+            }), 503
+        
+        data = request.get_json(silent=True) or {}
+        items = data.get('items') or []
+        
+        if not isinstance(items, list) or not items or len(items) > MAX_LOOKUP_ITEMS:
+            return jsonify({
+                'success': False,
+                'message': f'items must be a list of 1 to {MAX_LOOKUP_ITEMS} entries'
+            }), 400
+        
+        labels, grams = [], []
+        for index, item in enumerate(items):
+            error = validate_lookup_item(item)
+            if error:
+                return jsonify({
+                    'success': False,
+                    'message': f'items[{index}]: {error}',
+                    'index': index
+                }), 400
+            labels.append(item['label'])
+            grams.append(float(item['grams']))
+        
+        values, found = food_table.lookup(labels, grams)
+        totals = values[found].sum(axis=0)
+        
+        return jsonify({
+            'success': True,
+            'items': [
+                {
+                    'label': label,
+                    'grams': amount,
+                    'found': bool(is_found),
+                    'nutrition': {column: round(float(value), 1) for column, value in zip(NUTRITION_COLUMNS, row)} if is_found else None
+                }
+                for label, amount, row, is_found in zip(labels, grams, values, found)
+            ],
+            'totals': {column: round(float(value), 1) for column, value in zip(NUTRITION_COLUMNS, totals)},
+            'unknown_labels': sorted({label for label, is_found in zip(labels, found) if not is_found})
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Nutrition lookup error: {str(e)}'
+        }), 500
+
 # ======================
 # Meal Recommendation Endpoints
 # ======================
@@ -396,10 +890,18 @@ def batch_predict():
 def recommend_similar_meals():
     """
     Get similar meal recommendations based on a meal name
-    POST body: { "meal_name": "Grilled Chicken", "top_n": 5 }
+    POST body: {
+        "meal_name": "Grilled Chicken",
+        "top_n": 5,
+        "diversity": 0.3,                       (optional 0-1, re-rank to avoid near-duplicate dishes)
+        "allergies": ["nuts"],                  (optional filters, applied inside the search)
+        "dietary_preferences": ["vegetarian"],
+        "categories": ["lunch", "dinner"]
+    }
     """
     try:
-        if not RECOMMENDATION_LOADED:
+        services = g.meal_services
+        if services is None:
             return jsonify({
                 'success': False,
                 'message': 'Recommendation system not available'
@@ -408,6 +910,7 @@ def recommend_similar_meals():
         data = request.get_json()
         meal_name = data.get('meal_name')
         top_n = data.get('top_n', 5)
+        diversity = float(data.get('diversity', 0))
         
         if not meal_name:
             return jsonify({
@@ -415,30 +918,40 @@ def recommend_similar_meals():
                 'message': 'meal_name is required'
             }), 400
         
-        # Load meal index
-        import json
-        with open('models/meal_index.json', 'r') as f:
-            meal_index = json.load(f)
+        # Resolve the name: exact key, then normalized match, then trigram fuzzy match
+        if meal_name in services.catalog.name_index:
+            meal_idx, match, confidence = services.catalog.name_index[meal_name], 'exact', 1.0
+        else:
+            meal_idx, match, confidence = services.catalog.name_lookup.lookup(meal_name)
         
-        if meal_name not in meal_index:
+        if meal_idx is None:
             return jsonify({
                 'success': False,
-                'message': f'Meal "{meal_name}" not found in database'
+                'message': f'Meal "{meal_name}" not found in database',
+                'confidence': confidence
             }), 404
         
-        meal_idx = meal_index[meal_name]
-        similarity_matrix = recommendation_system['similarity_matrix']
-        similarities = similarity_matrix[meal_idx]
+        # Allergy, diet and category filters
+        filters = {key: data[key] for key in ('allergies', 'dietary_preferences', 'categories') if data.get(key)}
         
         # Get top N similar meals (excluding itself)
-        similar_indices = similarities.argsort()[::-1][1:top_n+1]
+        if diversity > 0:
+            # MMR only weighs the most similar candidates, so gather just those from the shards
+            pool = min(MMR_CANDIDATES, MMR_POOL_FACTOR * max(top_n, 1))
+            candidates, relevance = services.shards.similar_scan(meal_idx, pool, filters)
+            similar_indices = mmr_rerank(services.shards, candidates, relevance, top_n, diversity)
+            search = 'full_scan'
+        else:
+            similar_indices, _, search = filtered_similar(services.catalog, meal_idx, top_n, filters,
+                                                          scan=services.shards.similar_scan)
+        similarities = services.shards.similarity(meal_idx, similar_indices)
         
         recommendations = []
-        for idx in similar_indices:
-            meal = recommendation_system['meals_df'][idx]
+        for idx, similarity in zip(similar_indices, similarities):
+            meal = services.system['meals_df'][idx]
             recommendations.append({
                 'name': meal['name'],
-                'similarity_score': float(similarities[idx]),
+                'similarity_score': float(similarity),
                 'calories': meal['calories'],
                 'protein': meal['protein'],
                 'carbohydrates': meal['carbohydrates'],
@@ -452,6 +965,11 @@ def recommend_similar_meals():
         return jsonify({
             'success': True,
             'query_meal': meal_name,
+            'resolved_name': services.catalog.names[meal_idx],
+            'match': match,
+            'confidence': confidence,
+            'filters': filters,
+            'search': search,
             'recommendations': recommendations
         })
         
@@ -462,6 +980,65 @@ def recommend_similar_meals():
         }), 500
 
 
+@app.route('/recommend/similar/batch', methods=['POST'])
+def recommend_similar_meals_batch():
+    """
+    Get similar meals for many query meals with one matrix operation
+    POST body: {
+        "meals": ["Grilled Chicken", 42, ...],   (names or catalog ids)
+        "top_n": 5,
+        "exclude": ["Caesar Salad", 7]             (optional, e.g. meals already seen)
+    }
+    """
+    try:
+        services = g.meal_services
+        if services is None:
+            return jsonify({
+                'success': False,
+                'message': 'Recommendation system not available'
+            }), 503
+        
+        data = request.get_json()
+        meal_refs = data.get('meals', [])
+        top_n = int(data.get('top_n', 5))
+        
+        if not meal_refs:
+            return jsonify({
+                'success': False,
+                'message': 'meals is required'
+            }), 400
+        
+        query_idx, not_found = services.catalog.resolve(meal_refs)
+        excluded_idx, _ = services.catalog.resolve(data.get('exclude', []))
+        
+        results = []
+        if query_idx:
+            # Never return a query meal for itself, nor any excluded meal
+            neighbors = services.shards.similar(query_idx, top_n, excluded_idx)
+            
+            for meal_idx, (top_idx, top_scores) in zip(query_idx, neighbors):
+                results.append({
+                    'query_meal': services.catalog.names[meal_idx],
+                    'recommendations': [
+                        dict(services.catalog.meal_summary(idx), similarity_score=float(score))
+                        for idx, score in zip(top_idx, top_scores)
+                    ]
+                })
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'not_found': not_found,
+            'count': len(results)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Batch recommendation error: {str(e)}'
+        }), 500
+
+
 @app.route('/recommend/personalized', methods=['POST'])
 def recommend_personalized_meals():
     """
@@ -474,11 +1051,14 @@ def recommend_personalized_meals():
         "dietary_preferences": ["vegetarian"],
         "allergies": ["nuts"],
         "meal_type": "lunch",
-        "top_n": 10
+        "top_n": 10,
+        "scale_portions": true,  (optional, suggest a portion multiplier per meal)
+        "diversity": 0.3         (optional 0-1, re-rank to avoid near-duplicate dishes)
     }
     """
     try:
-        if not RECOMMENDATION_LOADED:
+        services = g.meal_services
+        if services is None:
             return jsonify({
                 'success': False,
                 'message': 'Recommendation system not available'
@@ -494,88 +1074,48 @@ def recommend_personalized_meals():
         meal_type = data.get('meal_type', None)
         top_n = data.get('top_n', 10)
         
-        meals_df = pd.DataFrame(recommendation_system['meals_df'])
+        scale_portions = data.get('scale_portions', True)
+        diversity = float(data.get('diversity', 0))
         
-        # Filter by meal type
-        if meal_type:
-            meals_df = meals_df[meals_df['category'] == meal_type]
+        # Calculate macro targets for this meal (30% of daily)
+        targets = (daily_calories, target_protein, target_carbs, target_fats)
+        meal_targets = np.array(targets, dtype=float) * 0.3
         
-        # Calculate calorie target for this meal (30% of daily)
-        meal_calorie_target = daily_calories * 0.3
+        # Score every meal on its best-fitting portion, keep the top of the requested meal type
+        pool = min(MMR_CANDIDATES, MMR_POOL_FACTOR * max(top_n, 1)) if diversity > 0 else top_n
+        candidate_idx, candidate_scores = services.shards.personalized(
+            targets, dietary_preferences, allergies, meal_type, pool, SERVING_BOUNDS if scale_portions else None
+        )
+        if diversity > 0:
+            top_idx = mmr_rerank(services.shards, candidate_idx, candidate_scores, top_n, diversity)
+        else:
+            top_idx = candidate_idx
+        score = dict(zip(candidate_idx.tolist(), candidate_scores.tolist()))
         
-        # Score each meal based on multiple factors
-        scores = []
-        for idx, meal in meals_df.iterrows():
-            score = 100  # Start with perfect score
-            
-            # 1. Calorie match (40% weight) - prefer within ±200 calories
-            calorie_diff = abs(meal['calories'] - meal_calorie_target)
-            calorie_score = max(0, 100 - (calorie_diff / 10))
-            score -= (100 - calorie_score) * 0.4
-            
-            # 2. Macro match (30% weight)
-            protein_ratio_target = (target_protein * 4) / daily_calories
-            carb_ratio_target = (target_carbs * 4) / daily_calories
-            fat_ratio_target = (target_fats * 9) / daily_calories
-            
-            meal_calories = meal['calories'] if meal['calories'] > 0 else 1
-            protein_ratio = (meal['protein'] * 4) / meal_calories
-            carb_ratio = (meal['carbohydrates'] * 4) / meal_calories
-            fat_ratio = (meal['fats'] * 9) / meal_calories
-            
-            macro_diff = (
-                abs(protein_ratio - protein_ratio_target) +
-                abs(carb_ratio - carb_ratio_target) +
-                abs(fat_ratio - fat_ratio_target)
-            ) / 3
-            macro_score = max(0, 100 - (macro_diff * 200))
-            score -= (100 - macro_score) * 0.3
-            
-            # 3. Dietary preferences (20% weight)
-            dietary_match = 0
-            if not dietary_preferences or 'none' in dietary_preferences:
-                dietary_match = 100
-            else:
-                meal_tags = set(meal['dietaryTags'])
-                pref_tags = set(dietary_preferences)
-                if meal_tags & pref_tags:
-                    dietary_match = 100
-                else:
-                    dietary_match = 50  # Partial match
-            score -= (100 - dietary_match) * 0.2
-            
-            # 4. Allergen check (10% weight) - critical factor
-            allergen_safe = True
-            if allergies:
-                meal_allergens = set(meal['allergens'])
-                user_allergens = set(allergies)
-                if meal_allergens & user_allergens:
-                    allergen_safe = False
-                    score = 0  # Immediate disqualification
-            
-            scores.append(score)
-        
-        meals_df['recommendation_score'] = scores
-        
-        # Sort by score and get top N
-        top_meals = meals_df.nlargest(top_n, 'recommendation_score')
+        # Portion multipliers of the selected meals (closed form)
+        if scale_portions:
+            multipliers = optimal_serving_multipliers(services.catalog.macros[top_idx], meal_targets, SERVING_BOUNDS)
+        else:
+            multipliers = np.ones(len(top_idx))
+        fit_error = plan_error(services.catalog.macros[top_idx] * multipliers[:, None], meal_targets)
         
         recommendations = []
-        for _, meal in top_meals.iterrows():
-            recommendations.append({
-                'name': meal['name'],
-                'score': float(meal['recommendation_score']),
-                'calories': meal['calories'],
-                'protein': meal['protein'],
-                'carbohydrates': meal['carbohydrates'],
-                'fats': meal['fats'],
-                'fiber': meal['fiber'],
-                'category': meal['category'],
-                'cuisine': meal['cuisine'],
-                'dietary_tags': meal['dietaryTags'],
-                'allergens': meal['allergens'],
-                'cook_time': meal['cookTime']
+        for idx, multiplier, error in zip(top_idx, multipliers, fit_error):
+            meal = services.catalog.meal_summary(idx)
+            multiplier = float(multiplier)
+            meal.update({
+                'score': float(score[int(idx)]),
+                'serving_multiplier': round(multiplier, 2),
+                'scaled_nutrition': {
+                    'calories': round(meal['calories'] * multiplier, 1),
+                    'protein': round(meal['protein'] * multiplier, 1),
+                    'carbohydrates': round(meal['carbohydrates'] * multiplier, 1),
+                    'fats': round(meal['fats'] * multiplier, 1),
+                    'fiber': round((meal['fiber'] or 0) * multiplier, 1)
+                },
+                'fit_error': round(float(error), 4)
             })
+            recommendations.append(meal)
         
         return jsonify({
             'success': True,
@@ -598,11 +1138,315 @@ def recommend_personalized_meals():
         }), 500
 
 
+@app.route('/recommend/pareto', methods=['POST'])
+def recommend_pareto_meals():
+    """
+    Pareto-optimal meals over user-chosen objectives
+    POST body: {
+        "objectives": ["protein_per_calorie", "fiber", {"name": "cook_time", "goal": "min"}],
+        "allergies": ["nuts"],                  (optional filters, as in /search)
+        "dietary_preferences": ["vegetarian"],
+        "meal_type": "dinner",
+        "where": {"calories": {"max": 700}},    (optional ranges, as in /query/nutrients)
+        "limit": 50
+    }
+    """
+    try:
+        services = g.meal_services
+        if services is None:
+            return jsonify({
+                'success': False,
+                'message': 'Recommendation system not available'
+            }), 503
+        
+        data = request.get_json()
+        limit = int(data.get('limit', 50))
+        
+        try:
+            objectives = parse_objectives(data.get('objectives'))
+            constraints = parse_constraints(data.get('where'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        if limit < 1:
+            return jsonify({
+                'success': False,
+                'message': 'limit must be at least 1'
+            }), 400
+        
+        filters = {key: data[key] for key in ('allergies', 'dietary_preferences') if data.get(key)}
+        if data.get('meal_type'):
+            filters['categories'] = [data['meal_type']]
+        
+        start = datetime.now()
+        if constraints:
+            candidates, _, _ = services.nutrients.query(constraints, filters, limit=len(services.catalog))
+        elif filters:
+            candidates = np.flatnonzero(services.catalog.allowed_mask(**filters))
+        else:
+            candidates = np.arange(len(services.catalog))
+        
+        meal_indices, values = pareto_front(services.catalog, objectives, candidates)
+        # Best first on the first objective
+        first = values[:, 0] if objectives[0][1] == 'min' else -values[:, 0]
+        order = np.argsort(first, kind='stable')[:limit]
+        
+        return jsonify({
+            'success': True,
+            'objectives': [{'name': name, 'goal': goal} for name, goal in objectives],
+            'filters': filters,
+            'candidates': int(len(candidates)),
+            'skyline_size': int(len(meal_indices)),
+            'results': [
+                dict(services.catalog.meal_summary(meal_indices[i]),
+                     objectives={name: round(float(values[i, k]), 2) for k, (name, _) in enumerate(objectives)})
+                for i in order
+            ],
+            'computation_ms': round((datetime.now() - start).total_seconds() * 1000, 2)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Pareto recommendation error: {str(e)}'
+        }), 500
+
+
+@app.route('/search', methods=['POST'])
+def search_meals():
+    """
+    Free-text meal search over the TF-IDF index
+    POST body: {
+        "query": "spicy chicken pasta",
+        "top_n": 10,
+        "allergies": ["nuts"],                  (optional filters, as in /recommend/personalized)
+        "dietary_preferences": ["vegetarian"],
+        "meal_type": "dinner"
+    }
+    """
+    try:
+        services = g.meal_services
+        if services is None:
+            return jsonify({
+                'success': False,
+                'message': 'Recommendation system not available'
+            }), 503
+        
+        data = request.get_json()
+        query = (data.get('query') or '').strip()
+        top_n = int(data.get('top_n', 10))
+        
+        if not query:
+            return jsonify({
+                'success': False,
+                'message': 'query is required'
+            }), 400
+        
+        filters = {key: data[key] for key in ('allergies', 'dietary_preferences') if data.get(key)}
+        if data.get('meal_type'):
+            filters['categories'] = [data['meal_type']]
+        
+        start = datetime.now()
+        meal_indices, scores = services.shards.search(query, top_n, filters)
+        
+        return jsonify({
+            'success': True,
+            'query': query,
+            'matched_terms': services.text_index.query_terms(query),
+            'filters': filters,
+            'results': [
+                dict(services.catalog.meal_summary(idx), score=round(float(score), 4))
+                for idx, score in zip(meal_indices, scores)
+            ],
+            'computation_ms': round((datetime.now() - start).total_seconds() * 1000, 2)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Search error: {str(e)}'
+        }), 500
+
+
+@app.route('/search/ingredients', methods=['POST'])
+def search_by_ingredients():
+    """
+    Meals that can be cooked with the ingredients a user has
+    POST body: {
+        "ingredients": ["chicken", "rice", "onion", "garlic"],
+        "max_missing": 2,                       (meal ingredients the user may lack)
+        "top_n": 10,
+        "ignore_staples": true,                 (assume salt, pepper and water are at hand)
+        "allergies": ["nuts"],                  (optional filters, as in /search)
+        "dietary_preferences": ["vegetarian"],
+        "meal_type": "dinner"
+    }
+    """
+    try:
+        services = g.meal_services
+        if services is None:
+            return jsonify({
+                'success': False,
+                'message': 'Recommendation system not available'
+            }), 503
+        
+        if services.ingredients is None:
+            return jsonify({
+                'success': False,
+                'message': 'Ingredient data not available. Re-run train_meal_recommendation.py'
+            }), 503
+        
+        data = request.get_json()
+        have = [str(name).strip() for name in data.get('ingredients') or [] if str(name).strip()]
+        max_missing = int(data.get('max_missing', 2))
+        top_n = int(data.get('top_n', 10))
+        
+        if not have:
+            return jsonify({
+                'success': False,
+                'message': 'ingredients must be a non-empty list'
+            }), 400
+        
+        if max_missing < 0:
+            return jsonify({
+                'success': False,
+                'message': 'max_missing must be zero or more'
+            }), 400
+        
+        filters = {key: data[key] for key in ('allergies', 'dietary_preferences') if data.get(key)}
+        if data.get('meal_type'):
+            filters['categories'] = [data['meal_type']]
+        
+        start = datetime.now()
+        allowed = services.catalog.allowed_mask(**filters) if filters else None
+        meal_indices, matched, missing, resolved = services.ingredients.search(
+            have, max_missing, data.get('ignore_staples', True), allowed
+        )
+        
+        available = {name for names in resolved.values() for name in names}
+        if data.get('ignore_staples', True):
+            available |= {services.ingredients.vocabulary[i] for i in services.ingredients.staple_ids()}
+        
+        results = []
+        for idx, n_matched, n_missing in zip(meal_indices[:top_n], matched, missing):
+            meal_ingredients = services.ingredients.meal_ingredient_names(idx)
+            results.append(dict(
+                services.catalog.meal_summary(idx),
+                coverage=round(float(n_matched) / max(len(meal_ingredients), 1), 3),
+                matched_count=int(n_matched),
+                missing_count=int(n_missing),
+                missing_ingredients=[name for name in meal_ingredients if name not in available]
+            ))
+        
+        return jsonify({
+            'success': True,
+            'resolved_ingredients': resolved,
+            'unknown_ingredients': [name for name, matches in resolved.items() if not matches],
+            'filters': filters,
+            'total_matches': int(len(meal_indices)),
+            'results': results,
+            'computation_ms': round((datetime.now() - start).total_seconds() * 1000, 2)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Ingredient search error: {str(e)}'
+        }), 500
+
+
+@app.route('/query/nutrients', methods=['POST'])
+def query_nutrients():
+    """
+    Meals within nutrient and cook-time ranges
+    POST body: {
+        "where": {
+            "protein": {"min": 30},
+            "calories": {"min": 400, "max": 600},
+            "fats": {"max": 20},
+            "cook_time": {"max": 30}
+        },
+        "dietary_preferences": ["vegetarian"], (optional filters, as in /search)
+        "allergies": ["nuts"],
+        "meal_type": "dinner",
+        "order_by": "protein",                  (optional, any queryable column)
+        "order": "desc",
+        "limit": 20,
+        "offset": 0
+    }
+    """
+    try:
+        services = g.meal_services
+        if services is None:
+            return jsonify({
+                'success': False,
+                'message': 'Recommendation system not available'
+            }), 503
+        
+        data = request.get_json()
+        limit = int(data.get('limit', 20))
+        offset = int(data.get('offset', 0))
+        order_by = data.get('order_by')
+        order_by = COLUMN_ALIASES.get(order_by, order_by)
+        order = data.get('order', 'asc')
+        
+        try:
+            constraints = parse_constraints(data.get('where'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        if order_by is not None and order_by not in QUERY_COLUMNS:
+            return jsonify({
+                'success': False,
+                'message': f'order_by must be one of {sorted(QUERY_COLUMNS)}'
+            }), 400
+        
+        if order not in ('asc', 'desc') or limit < 1 or offset < 0:
+            return jsonify({
+                'success': False,
+                'message': 'order must be asc or desc, limit at least 1 and offset zero or more'
+            }), 400
+        
+        filters = {key: data[key] for key in ('allergies', 'dietary_preferences') if data.get(key)}
+        if data.get('meal_type'):
+            filters['categories'] = [data['meal_type']]
+        
+        start = datetime.now()
+        meal_indices, total, plan = services.nutrients.query(
+            constraints, filters, order_by, order == 'desc', limit, offset
+        )
+        
+        return jsonify({
+            'success': True,
+            'where': {column: {'min': low if np.isfinite(low) else None, 'max': high if np.isfinite(high) else None}
+                      for column, (low, high) in constraints.items()},
+            'filters': filters,
+            'total_matches': total,
+            'offset': offset,
+            'results': [services.catalog.meal_summary(idx) for idx in meal_indices],
+            'plan': plan,
+            'computation_ms': round((datetime.now() - start).total_seconds() * 1000, 2)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Nutrient query error: {str(e)}'
+        }), 500
+
+
 @app.route('/recommend/stats', methods=['GET'])
 def recommendation_stats():
     """Get statistics about the recommendation system"""
     try:
-        if not RECOMMENDATION_LOADED:
+        services = g.meal_services
+        if services is None:
             return jsonify({
                 'success': False,
                 'message': 'Recommendation system not available'
@@ -614,7 +1458,11 @@ def recommendation_stats():
         
         return jsonify({
             'success': True,
-            'stats': stats
+            'stats': stats,
+            'catalog_version': services.system.get('catalog_version', 0),
+            'current_meals': len(services.catalog),
+            'serving_mode': services.shards.mode,
+            'shard_sizes': services.shards.shard_sizes
         })
         
     except Exception as e:
@@ -623,6 +1471,188 @@ def recommendation_stats():
             'message': f'Stats error: {str(e)}'
         }), 500
 
+# ======================
+# Meal Planning Endpoints
+# ======================
+
+PLAN_NUTRIENTS = ['calories', 'protein', 'carbohydrates', 'fats']
+
+def resolve_plan_targets(data):
+    """
+    Daily (calories, protein, carbohydrates, fats) targets for a plan request
+    Macro targets default to the /predict split for the user's fitness goal
+    """
+    daily_calories = float(data['daily_calories'])
+    default_macros = calculate_macronutrients(daily_calories, data.get('fitness_goal', 'maintain_weight'))
+    return np.array([
+        daily_calories,
+        float(data.get('target_protein', default_macros['protein'])),
+        float(data.get('target_carbs', default_macros['carbs'])),
+        float(data.get('target_fats', default_macros['fats']))
+    ])
+
+
+def parse_nutrient_weights(data):
+    """
+    Optional per-nutrient plan weights, e.g. {"calories": 2, "protein": 1}
+    Missing nutrients keep the planner default; returns None when not given
+    """
+    spec = data.get('nutrient_weights')
+    if spec is None:
+        return None
+    if not isinstance(spec, dict) or set(spec) - set(PLAN_NUTRIENTS):
+        raise ValueError(f'nutrient_weights must be an object with keys from {", ".join(PLAN_NUTRIENTS)}')
+    weights = np.array([float(spec.get(name, default)) for name, default in zip(PLAN_NUTRIENTS, NUTRIENT_WEIGHTS)])
+    if not np.isfinite(weights).all() or (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError('nutrient_weights must be non-negative numbers with a positive sum')
+    return weights
+
+
+def format_plan(plan, catalog):
+    """Plan meals and totals in the shape returned by /plan endpoints"""
+    totals = {name: round(float(value), 1) for name, value in zip(PLAN_NUTRIENTS, plan['totals'])}
+    deviation = {
+        name: round(float((total - target) / target * 100), 1) if target else None
+        for name, total, target in zip(PLAN_NUTRIENTS, plan['totals'], plan['targets'])
+    }
+    return {
+        'meals': [dict(catalog.meal_summary(idx), slot=slot) for slot, idx in plan['meals'].items()],
+        'totals': totals,
+        'deviation_percent': deviation,
+        'skipped_slots': plan['skipped_slots']
+    }
+
+
+@app.route('/plan/day', methods=['POST'])
+def plan_daily_meals():
+    """
+    Build a one-day meal plan whose totals match calorie and macro targets
+    POST body: {
+        "daily_calories": 2000,
+        "target_protein": 150,          (optional, defaults from fitness_goal)
+        "target_carbs": 200,            (optional)
+        "target_fats": 67,              (optional)
+        "fitness_goal": "lose_weight",  (optional)
+        "dietary_preferences": ["vegetarian"],
+        "allergies": ["nuts"],
+        "slots": ["breakfast", "lunch", "dinner", "snack"],  (optional)
+        "nutrient_weights": {"calories": 1, "protein": 1, "carbohydrates": 1, "fats": 1}   (optional)
+    }
+    """
+    try:
+        services = g.meal_services
+        if services is None:
+            return jsonify({
+                'success': False,
+                'message': 'Recommendation system not available'
+            }), 503
+        
+        data = request.get_json()
+        if not data.get('daily_calories'):
+            return jsonify({
+                'success': False,
+                'message': 'daily_calories is required'
+            }), 400
+        
+        slots = data.get('slots') or list(PLAN_SLOTS)
+        unknown = [slot for slot in slots if slot not in PLAN_SLOTS]
+        if unknown:
+            return jsonify({
+                'success': False,
+                'message': f'Unknown slot(s): {", ".join(map(str, unknown))}'
+            }), 400
+        
+        try:
+            weights = parse_nutrient_weights(data)
+        except (ValueError, TypeError) as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        start = datetime.now()
+        targets = resolve_plan_targets(data)
+        dietary_preferences = data.get('dietary_preferences', [])
+        allowed = services.catalog.allowed_mask(data.get('allergies', []), dietary_preferences)
+        plan = plan_day(services.catalog, targets, allowed, slots,
+                        preference_matches=services.catalog.preference_matches(dietary_preferences), weights=weights)
+        
+        return jsonify({
+            'success': True,
+            'targets': {name: round(float(value), 1) for name, value in zip(PLAN_NUTRIENTS, targets)},
+            'plan': format_plan(plan, services.catalog),
+            'computation_ms': round((datetime.now() - start).total_seconds() * 1000, 2)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Meal plan error: {str(e)}'
+        }), 500
+
+@app.route('/plan/week', methods=['POST'])
+def plan_weekly_meals():
+    """
+    Build a multi-day meal plan that avoids repeating near-identical meals
+    POST body: same fields as /plan/day, plus "days": 7 (1-14)
+    """
+    try:
+        services = g.meal_services
+        if services is None:
+            return jsonify({
+                'success': False,
+                'message': 'Recommendation system not available'
+            }), 503
+        
+        data = request.get_json()
+        if not data.get('daily_calories'):
+            return jsonify({
+                'success': False,
+                'message': 'daily_calories is required'
+            }), 400
+        
+        days = int(data.get('days', 7))
+        slots = data.get('slots') or list(PLAN_SLOTS)
+        unknown = [slot for slot in slots if slot not in PLAN_SLOTS]
+        if not 1 <= days <= 14 or unknown:
+            return jsonify({
+                'success': False,
+                'message': 'days must be between 1 and 14 and slots must be known meal slots'
+            }), 400
+        
+        try:
+            weights = parse_nutrient_weights(data)
+        except (ValueError, TypeError) as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        start = datetime.now()
+        targets = resolve_plan_targets(data)
+        dietary_preferences = data.get('dietary_preferences', [])
+        allowed = services.catalog.allowed_mask(data.get('allergies', []), dietary_preferences)
+        plans = plan_week(services.catalog, targets, allowed, slots,
+                          preference_matches=services.catalog.preference_matches(dietary_preferences), days=days,
+                          weights=weights)
+        
+        planned_meals = [idx for plan in plans for idx in plan['meals'].values()]
+        
+        return jsonify({
+            'success': True,
+            'targets': {name: round(float(value), 1) for name, value in zip(PLAN_NUTRIENTS, targets)},
+            'days': [dict(format_plan(plan, services.catalog), day=day) for day, plan in enumerate(plans, 1)],
+            'unique_meals': len(set(planned_meals)),
+            'total_meals': len(planned_meals),
+            'computation_ms': round((datetime.now() - start).total_seconds() * 1000, 2)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Weekly meal plan error: {str(e)}'
+        }), 500
+
 # ======================
 # Error Handlers
 # ======================
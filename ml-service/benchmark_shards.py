@@ -0,0 +1,118 @@
+"""
+NutriGuide AI - Shard Benchmark
+Query latency of the sharded meal catalog versus shard count
+
+Grows the trained recommendation system to a synthetic catalog (copies of
+every meal with jittered nutrition and feature vectors), then times
+personalized, similar-meal and search queries for each shard count and
+checks that every sharded result matches the single-process result.
+
+Usage:
+    python benchmark_shards.py --meals 200000 --shards 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+from scipy import sparse
+
+from meal_catalog import catalog_from_system
+from meal_search import MealTextIndex
+from meal_shards import ShardedMealCatalog
+
+# ======================
+# Configuration
+# ======================
+SYSTEM_PATH = os.path.join('models', 'meal_recommendation_system.pkl')
+RESULTS_PATH = os.path.join('models', 'shard_benchmark.json')
+SERVING_BOUNDS = (0.5, 2.0)
+
+QUERIES = {
+    'personalized': lambda shards: shards.personalized((2000, 150, 200, 67), ['high_protein'], ['nuts'], None, 10,
+                                                       SERVING_BOUNDS),
+    'personalized_dinner': lambda shards: shards.personalized((2000, 150, 200, 67), None, None, 'dinner', 10,
+                                                              SERVING_BOUNDS),
+    'similar': lambda shards: shards.similar_scan(0, 10, {'allergies': ['dairy']}),
+    'similar_batch': lambda shards: shards.similar(list(range(32)), 10)[-1],
+    'search': lambda shards: shards.search('chicken salad', 10)
+}
+
+
+def synthetic_system(system, n_meals, seed=42):
+    """`system` grown to n_meals meals: copies with jittered nutrients and features"""
+    rng = np.random.default_rng(seed)
+    base = system['meals_df']
+    source = np.arange(n_meals) % len(base)
+
+    meals = []
+    for idx, src in enumerate(source):
+        meal = dict(base[src], name=f"{base[src]['name']} #{idx}")
+        for nutrient in ('calories', 'protein', 'carbohydrates', 'fats', 'fiber'):
+            meal[nutrient] = round((meal.get(nutrient) or 0) * rng.uniform(0.8, 1.2), 1)
+        meals.append(meal)
+
+    features = system['feature_matrix'][source]
+    features = features + rng.normal(0, 0.02, features.shape).astype(features.dtype)
+    features /= np.linalg.norm(features, axis=1, keepdims=True)
+
+    return dict(system, meals_df=meals, feature_matrix=features.astype(np.float32),
+                tfidf_matrix=sparse.csr_matrix(system['tfidf_matrix'])[source],
+                similarity_matrix=None, neighbor_indices=None, neighbor_scores=None)
+
+
+def time_query(query, shards, repeats):
+    """Median latency in ms and the last result"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = query(shards)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings)), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sharded meal queries')
+    parser.add_argument('--meals', type=int, default=200000, help='Synthetic catalog size')
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8], help='Shard counts to compare')
+    parser.add_argument('--repeats', type=int, default=20, help='Timed runs per query')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("NUTRIGUIDE AI - SHARDED CATALOG BENCHMARK")
+    print("=" * 60)
+
+    system = synthetic_system(joblib.load(SYSTEM_PATH), args.meals)
+    catalog = catalog_from_system(system)
+    text_index = MealTextIndex.from_system(system)
+    print(f"✓ Synthetic catalog: {len(catalog):,} meals, {os.cpu_count()} CPU cores")
+
+    results, reference = [], {}
+    for n_shards in args.shards:
+        start = time.perf_counter()
+        shards = ShardedMealCatalog(system, catalog, text_index, n_shards=n_shards)
+        row = {'shards': n_shards, 'startup_s': round(time.perf_counter() - start, 2)}
+        try:
+            for name, query in QUERIES.items():
+                latency, (indices, _) = time_query(query, shards, args.repeats)
+                reference.setdefault(name, indices)
+                row[name] = round(latency, 2)
+                if not np.array_equal(indices, reference[name]):
+                    print(f"⚠️  {name}: {n_shards} shards returned different meals than {args.shards[0]}")
+        finally:
+            shards.close()
+        results.append(row)
+        print(f"  {n_shards:>2} shards: " + ' | '.join(f"{name} {row[name]:.1f} ms" for name in QUERIES) +
+              f" (startup {row['startup_s']:.1f}s)")
+
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump({'meals': args.meals, 'cpu_count': os.cpu_count(), 'repeats': args.repeats,
+                   'results': results}, f, indent=2)
+    print(f"✓ Results saved to {RESULTS_PATH}")
+
+
+if __name__ == '__main__':
+    main()
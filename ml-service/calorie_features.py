@@ -0,0 +1,98 @@
+"""
+NutriGuide AI - Calorie Model Feature Builder
+Vectorized conversion of user profiles into the calorie model's feature matrix
+
+Encodings follow the training data in synthetic_users.py and the interaction
+features follow engineer_features() in train_model_with_real_data.py, so any
+number of profiles can be featurized in one pass for the trained model.
+"""
+
+import numpy as np
+import pandas as pd
+
+from synthetic_users import ACTIVITY_LEVELS, FITNESS_GOALS
+
+# ======================
+# Encodings
+# ======================
+
+# Gender: male=1, female=0, other=0.5 (BMR uses the female constant for non-male)
+GENDER_CODES = {'male': 1.0, 'female': 0.0, 'other': 0.5}
+
+ACTIVITY_CODES = {level: code for code, level in enumerate(ACTIVITY_LEVELS)}
+
+# API goals mapped onto the goals the model was trained with
+GOAL_CODES = {goal: code for code, goal in enumerate(FITNESS_GOALS)}
+GOAL_CODES.update({'improve_health': GOAL_CODES['maintain_weight']})
+
+BASE_COLUMNS = ['age', 'gender', 'height', 'weight', 'bmi', 'bmr', 'activity_level', 'fitness_goal']
+
+FEATURE_COLUMNS = BASE_COLUMNS + [
+    'bmi_age', 'weight_height_ratio', 'bmr_activity',
+    'age_squared', 'bmi_squared', 'activity_goal'
+]
+
+# ======================
+# Feature Construction
+# ======================
+
+def add_engineered_features(df):
+    """Add interaction features to a frame with the numeric BASE_COLUMNS"""
+    df['bmi_age'] = df['bmi'] * df['age']
+    df['weight_height_ratio'] = df['weight'] / df['height']
+    df['bmr_activity'] = df['bmr'] * df['activity_level']
+    df['age_squared'] = df['age'] ** 2
+    df['bmi_squared'] = df['bmi'] ** 2
+    df['activity_goal'] = df['activity_level'] * df['fitness_goal']
+    return df
+
+
+def encode_profiles(profiles):
+    """
+    Encode raw API profiles into the numeric BASE_COLUMNS
+
+    `profiles` is a DataFrame (or list of dicts) with age, gender, height,
+    weight, activity_level and fitness_goal as sent to /predict. Unknown
+    activity levels default to moderate and unknown goals to maintain_weight.
+    """
+    profiles = pd.DataFrame(profiles)
+
+    age = profiles['age'].to_numpy(dtype=float)
+    height = profiles['height'].to_numpy(dtype=float)
+    weight = profiles['weight'].to_numpy(dtype=float)
+    gender = profiles['gender'].map(GENDER_CODES).fillna(0.0).to_numpy(dtype=float)
+    activity = profiles['activity_level'].map(ACTIVITY_CODES).fillna(ACTIVITY_CODES['moderate']).to_numpy(dtype=float)
+    goal = profiles['fitness_goal'].map(GOAL_CODES).fillna(GOAL_CODES['maintain_weight']).to_numpy(dtype=float)
+
+    bmi = weight / (height / 100) ** 2
+    bmr = 10 * weight + 6.25 * height - 5 * age + np.where(gender == 1.0, 5, -161)
+
+    return pd.DataFrame({
+        'age': age,
+        'gender': gender,
+        'height': height,
+        'weight': weight,
+        'bmi': bmi,
+        'bmr': bmr,
+        'activity_level': activity,
+        'fitness_goal': goal
+    })
+
+
+def build_feature_frame(profiles):
+    """Calorie-model features for many profiles, as a DataFrame in training column order"""
+    return add_engineered_features(encode_profiles(profiles))[FEATURE_COLUMNS]
+
+
+def build_feature_matrix(profiles, scaler=None):
+    """
+    Full calorie-model feature matrix for many profiles at once
+
+    Returns a float array with FEATURE_COLUMNS in training order, scaled with
+    `scaler` when one is given.
+    """
+    features = build_feature_frame(profiles)
+    if scaler is not None:
+        # The scaler may have been fit on a DataFrame; pass one to keep feature names consistent
+        return scaler.transform(features)
+    return features.to_numpy()
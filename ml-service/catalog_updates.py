@@ -0,0 +1,296 @@
+"""
+NutriGuide AI - Incremental Meal Catalog Updates
+Applies a meal delta log to the recommendation system without a full rebuild
+
+Admins add, edit and deactivate meals between full rebuilds. Those changes
+are exported as a JSONL delta log (our local stand-in for a Mongo change
+stream); each update reads only the lines added since the last run (a byte
+offset is stored in the manifest) and:
+
+- featurizes new or edited meals with the fitted vectorizer, binarizers,
+  scaler and embedding model from the pickle (nothing is refit)
+- drops deactivated and replaced meals and compacts every per-meal array
+- patches neighbour lists only where the change reaches them: rows that
+  listed a removed meal are recomputed, rows for which a new meal beats
+  their current K-th neighbour merge it in, new meals get fresh rows
+- publishes a versioned pickle, atomically swaps it in as the serving
+  system and rewrites meal_index.json; the Flask service's reload thread
+  picks it up within RECOMMENDATION_RELOAD_INTERVAL seconds
+
+A full retrain starts again from the seed file at catalog version 0; the
+next update notices the version mismatch and replays the whole log
+(upserts and deactivations are idempotent).
+
+Delta format (one JSON object per line):
+    {"op": "upsert", "meal": {...meal document as in meals_seed.json...}}
+    {"op": "deactivate", "name": "Meal Name"}
+An upsert replaces the meal with the same name, and an upserted document
+with "isActive": false deactivates it.
+
+Usage:
+    python catalog_updates.py data/meal_deltas.jsonl
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from file_utils import save_json_atomic, dump_joblib_atomic
+from meal_features import prepare_meals, featurize_meals, meal_records
+from meal_ranking import top_k_per_row
+
+# ======================
+# Configuration
+# ======================
+OUTPUT_DIR = 'models'
+SYSTEM_PATH = os.path.join(OUTPUT_DIR, 'meal_recommendation_system.pkl')
+INDEX_PATH = os.path.join(OUTPUT_DIR, 'meal_index.json')
+VERSIONS_DIR = os.path.join(OUTPUT_DIR, 'versions')
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, 'catalog_versions.json')
+
+KEEP_VERSIONS = 5              # Older versioned pickles are deleted
+REQUIRED_MEAL_FIELDS = ['name', 'category', 'nutrition']
+
+# ======================
+# Delta Log
+# ======================
+
+def read_deltas(feed_path, offset=0):
+    """
+    Changes in a JSONL delta log from a byte offset
+
+    Returns ({meal name: meal document, or None when deactivated}, end
+    offset); later lines win. Malformed lines are skipped and a partially
+    written last line is left for the next run.
+    """
+    changes = {}
+    with open(feed_path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            offset += len(line)
+            try:
+                delta = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            meal = delta.get('meal') or {}
+            if delta.get('op') == 'upsert' and all(meal.get(field) is not None for field in REQUIRED_MEAL_FIELDS):
+                changes[meal['name']] = meal if meal.get('isActive', True) else None
+            elif delta.get('op') == 'deactivate' and (delta.get('name') or meal.get('name')):
+                changes[delta.get('name') or meal['name']] = None
+    return changes, offset
+
+# ======================
+# Catalog Patching
+# ======================
+
+def remove_and_append(array, keep, new_rows):
+    """Rows of `array` where keep is True, followed by `new_rows`"""
+    if sparse.issparse(array):
+        return sparse.vstack([array[np.flatnonzero(keep)], new_rows]).tocsr()
+    return np.concatenate([array[keep], new_rows.astype(array.dtype)])
+
+
+def patch_neighbors(neighbor_indices, neighbor_scores, keep, features, n_new):
+    """
+    Neighbour lists after dropping rows (keep == False) and appending n_new meals
+
+    `features` are the unit-length feature rows of the updated catalog, with
+    the new meals last. Returns (indices, scores, number of rows recomputed,
+    number of rows that merged in a new meal).
+    """
+    n_meals, k = len(features), neighbor_indices.shape[1]
+    n_kept = n_meals - n_new
+
+    # Old meal index -> new index (-1 for removed meals)
+    remap = np.full(len(keep), -1, dtype=np.int64)
+    remap[keep] = np.arange(n_kept)
+    indices = remap[neighbor_indices[keep]]
+    scores = neighbor_scores[keep].astype(np.float32)
+
+    # Rows that lost a neighbour are recomputed; new meals get fresh rows
+    stale = np.flatnonzero((indices < 0).any(axis=1))
+    recompute = np.concatenate([stale, np.arange(n_kept, n_meals)])
+
+    merged = 0
+    if n_new and n_kept:
+        # Kept rows where a new meal beats the current K-th neighbour merge it in
+        new_scores = features[:n_kept] @ features[n_kept:].T
+        fresh = np.ones(n_kept, dtype=bool)
+        fresh[stale] = False
+        gains = np.flatnonzero(fresh & (new_scores.max(axis=1) > scores[:, -1]))
+        if len(gains):
+            candidates = np.hstack([indices[gains], np.broadcast_to(np.arange(n_kept, n_meals), (len(gains), n_new))])
+            candidate_scores = np.hstack([scores[gains], new_scores[gains]])
+            top, top_scores = top_k_per_row(candidate_scores, k)
+            indices[gains] = np.take_along_axis(candidates, top, axis=1)
+            scores[gains] = top_scores
+            merged = len(gains)
+
+    indices = np.vstack([indices, np.zeros((n_new, k), dtype=np.int64)])
+    scores = np.vstack([scores, np.zeros((n_new, k), dtype=np.float32)])
+    k_available = min(k, n_meals - 1)
+    for start in range(0, len(recompute), 1024):
+        rows = recompute[start:start + 1024]
+        similarities = features[rows] @ features.T
+        similarities[np.arange(len(rows)), rows] = -np.inf
+        top, top_scores = top_k_per_row(similarities, k_available)
+        indices[rows, :k_available] = top
+        scores[rows, :k_available] = top_scores
+
+    return indices.astype(np.int32), scores, len(recompute), merged
+
+
+def apply_changes(system, changes):
+    """
+    Apply {name: meal or None} changes to a loaded recommendation system in place
+
+    Returns the update summary.
+    """
+    if system.get('feature_matrix') is None:
+        raise ValueError('Incremental updates need dense serving features; '
+                         'retrain the recommendation system with train_meal_recommendation.py')
+
+    meals = system['meals_df']
+    positions = {meal['name']: idx for idx, meal in enumerate(meals)}
+    removed = [positions[name] for name in changes if name in positions]
+    upserts = [meal for meal in changes.values() if meal is not None]
+
+    keep = np.ones(len(meals), dtype=bool)
+    keep[removed] = False
+
+    if upserts:
+        new_df = prepare_meals(pd.DataFrame(upserts))
+        new_features, new_tfidf = featurize_meals(system, new_df)
+        new_records = meal_records(new_df)
+    else:
+        new_features = np.empty((0, system['feature_matrix'].shape[1]), dtype=np.float32)
+        new_tfidf = sparse.csr_matrix((0, system['tfidf_matrix'].shape[1]))
+        new_records = []
+
+    features = remove_and_append(system['feature_matrix'], keep, new_features)
+    system['neighbor_indices'], system['neighbor_scores'], recomputed, merged = patch_neighbors(
+        system['neighbor_indices'], system['neighbor_scores'], keep, features, len(new_records)
+    )
+    system['feature_matrix'] = features
+    system['tfidf_matrix'] = remove_and_append(system['tfidf_matrix'], keep, new_tfidf)
+    system['meals_df'] = [meal for meal, kept in zip(meals, keep) if kept] + new_records
+
+    # Similarities are served from feature_matrix; a dense pairwise matrix from
+    # an older pickle would cost O(n^2) per update to keep current, so drop it
+    system['similarity_matrix'] = None
+
+    return {
+        'meals_added': sum(1 for meal in upserts if meal['name'] not in positions),
+        'meals_updated': sum(1 for meal in upserts if meal['name'] in positions),
+        'meals_deactivated': sum(1 for name, meal in changes.items() if meal is None and name in positions),
+        'neighbor_rows_recomputed': recomputed,
+        'neighbor_rows_merged': merged,
+        'total_meals': len(system['meals_df'])
+    }
+
+# ======================
+# Versioning
+# ======================
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'current_version': 0, 'feed_offsets': {}, 'versions': []}
+
+
+def publish_system(system, manifest, update_info):
+    """Save a versioned pickle, atomically swap it in and rewrite meal_index.json"""
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    system['catalog_version'] = manifest['current_version'] + 1
+
+    version_path = os.path.join(VERSIONS_DIR, f"meal_recommendation_system_v{system['catalog_version']}.pkl")
+    joblib.dump(system, version_path)
+
+    dump_joblib_atomic(system, SYSTEM_PATH)
+    save_json_atomic(INDEX_PATH, {meal['name']: idx for idx, meal in enumerate(system['meals_df'])})
+
+    manifest['current_version'] = system['catalog_version']
+    manifest['versions'].append(dict(update_info, version=system['catalog_version'], path=version_path,
+                                     published_at=datetime.now().isoformat()))
+
+    # Prune old versioned pickles, keep their manifest entries
+    for entry in manifest['versions'][:-KEEP_VERSIONS]:
+        if entry.get('path') and os.path.exists(entry['path']):
+            os.remove(entry['path'])
+            entry['path'] = None
+
+    return version_path
+
+# ======================
+# Update
+# ======================
+
+def update_from_log(feed_path):
+    """
+    Apply all new deltas in the log and publish one new catalog version
+
+    Returns the update summary, or None when there was nothing new.
+    """
+    manifest = load_manifest()
+    feed_key = os.path.abspath(feed_path)
+    offset = manifest['feed_offsets'].get(feed_key, 0)
+
+    start = time.perf_counter()
+    system = joblib.load(SYSTEM_PATH)
+    if system.get('catalog_version', 0) != manifest['current_version']:
+        # The system was retrained from the seed file since the last update
+        print("⊙ Recommendation system was rebuilt, replaying the whole delta log")
+        offset = 0
+    if offset > os.path.getsize(feed_path):
+        # Log was truncated or rotated: start over
+        offset = 0
+
+    changes, end_offset = read_deltas(feed_path, offset)
+    manifest['feed_offsets'][feed_key] = end_offset
+    if not changes:
+        save_json_atomic(MANIFEST_PATH, manifest)
+        print("⊙ No new meal changes, catalog unchanged")
+        return None
+
+    update_info = apply_changes(system, changes)
+    update_info['apply_seconds'] = round(time.perf_counter() - start, 3)
+    version_path = publish_system(system, manifest, update_info)
+    save_json_atomic(MANIFEST_PATH, manifest)
+    update_info['publish_seconds'] = round(time.perf_counter() - start, 3)
+
+    print(f"✓ Published catalog v{system['catalog_version']}: {version_path}")
+    print(f"  Added: {update_info['meals_added']} | updated: {update_info['meals_updated']} | "
+          f"deactivated: {update_info['meals_deactivated']} | total meals: {update_info['total_meals']:,}")
+    print(f"  Neighbour rows recomputed: {update_info['neighbor_rows_recomputed']} | "
+          f"merged a new meal: {update_info['neighbor_rows_merged']}")
+    print(f"  Update time: {update_info['publish_seconds']:.2f}s")
+
+    return update_info
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply a meal delta log to the recommendation system')
+    parser.add_argument('feed', help='JSONL file of meal changes')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("NUTRIGUIDE AI - INCREMENTAL MEAL CATALOG UPDATE")
+    print("=" * 60)
+
+    update_from_log(args.feed)
+
+
+if __name__ == '__main__':
+    main()
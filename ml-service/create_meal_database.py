@@ -8,13 +8,25 @@ import numpy as np
 import json
 import ast
 import os
+import re
+import time
+import zlib
 from datetime import datetime
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
 
 # Configuration
 KAGGLE_DATA_PATH = '../datasets/archive/RAW_recipes.csv'
 OUTPUT_PATH = '../backend/seeds/meals_seed.json'
 MAX_MEALS = 500  # Limit for database seeding
 
+# Near-duplicate detection (MinHash + LSH)
+DEDUP_ENABLED = True
+DEDUP_THRESHOLD = 0.8        # Estimated Jaccard similarity to treat as duplicate
+MINHASH_PERMUTATIONS = 128   # Signature length
+MINHASH_CHUNK_SIZE = 5000    # Recipes hashed per vectorized block
+MINHASH_PRIME = (1 << 31) - 1
+
 print("=" * 60)
 print("NUTRIGUIDE AI - MEAL DATABASE CREATOR")
 print("=" * 60)
@@ -142,8 +154,184 @@ def parse_ingredients(ingredients_str):
         return []
 
 
+# ======================
+# Near-Duplicate Detection
+# ======================
+
+def build_recipe_shingles(names, ingredients):
+    """
+    Build hashed shingles for each recipe from its name and ingredients
+
+    Shingles are name word unigrams/bigrams plus whole ingredient names.
+    Returns a flat array of 32-bit shingle hashes and per-recipe offsets
+    (CSR layout) so MinHash can be computed without per-recipe loops.
+    """
+    hashes = []
+    offsets = [0]
+
+    for name, ingredients_str in zip(names, ingredients):
+        words = re.findall(r'[a-z0-9]+', str(name).lower())
+        shingles = {'n:' + w for w in words}
+        shingles.update('n:' + a + ' ' + b for a, b in zip(words, words[1:]))
+
+        try:
+            ingredient_list = ast.literal_eval(ingredients_str) if pd.notna(ingredients_str) else []
+        except:
+            ingredient_list = []
+        shingles.update('i:' + ' '.join(str(ing).lower().split()) for ing in ingredient_list)
+
+        # Every recipe needs at least one shingle; an id-unique one never matches others
+        if not shingles:
+            shingles = {f'empty:{len(offsets)}'}
+
+        hashes.extend(zlib.crc32(s.encode('utf-8')) for s in shingles)
+        offsets.append(len(hashes))
+
+    return np.array(hashes, dtype=np.uint64), np.array(offsets, dtype=np.int64)
+
+
+def compute_minhash_signatures(shingle_hashes, offsets, num_perm=MINHASH_PERMUTATIONS,
+                               chunk_size=MINHASH_CHUNK_SIZE, seed=42):
+    """
+    Compute MinHash signatures for all recipes
+
+    Uses universal hashing h(x) = (a*x + b) mod p with p = 2^31 - 1 and takes
+    the per-recipe minimum with np.minimum.reduceat, processing recipes in
+    chunks so memory stays bounded at chunk_size * shingles * num_perm.
+    """
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, MINHASH_PRIME, num_perm).astype(np.uint64)
+    b = rng.randint(0, MINHASH_PRIME, num_perm).astype(np.uint64)
+    prime = np.uint64(MINHASH_PRIME)
+
+    n_recipes = len(offsets) - 1
+    signatures = np.empty((n_recipes, num_perm), dtype=np.uint32)
+
+    for start in range(0, n_recipes, chunk_size):
+        end = min(start + chunk_size, n_recipes)
+        lo, hi = offsets[start], offsets[end]
+        block = shingle_hashes[lo:hi]
+
+        # (shingles, num_perm) permuted hash values
+        permuted = (block[:, None] * a[None, :] + b[None, :]) % prime
+        signatures[start:end] = np.minimum.reduceat(permuted, offsets[start:end] - lo, axis=0)
+
+    return signatures
+
+
+def choose_lsh_bands(num_perm, threshold):
+    """
+    Pick (bands, rows) with bands * rows == num_perm whose LSH threshold
+    (1/bands)^(1/rows) sits closest to, but not above, the target threshold
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        lsh_threshold = (1.0 / bands) ** (1.0 / rows)
+        if lsh_threshold > threshold:
+            continue
+        if best is None or lsh_threshold > best[2]:
+            best = (bands, rows, lsh_threshold)
+
+    return best[0], best[1]
+
+
+def find_near_duplicates(signatures, threshold=DEDUP_THRESHOLD):
+    """
+    Group recipes whose estimated Jaccard similarity exceeds the threshold
+
+    Each band of the signature is reduced to a 64-bit bucket key; recipes are
+    sorted by key and adjacent recipes in the same bucket become candidate
+    pairs. Candidates are verified against the full signature and merged with
+    connected components, so the whole pass is O(n log n) in the recipe count.
+
+    Returns (component labels, number of candidate pairs, number of verified pairs)
+    """
+    n_recipes, num_perm = signatures.shape
+    bands, rows = choose_lsh_bands(num_perm, threshold)
+
+    # Random odd multipliers turn each band slice into one wrapping uint64 key
+    rng = np.random.RandomState(7)
+    multipliers = (rng.randint(1, 1 << 62, rows, dtype=np.int64).astype(np.uint64) << np.uint64(1)) | np.uint64(1)
+    sig64 = signatures.astype(np.uint64)
+
+    left_parts, right_parts = [], []
+    for band in range(bands):
+        keys = sig64[:, band * rows:(band + 1) * rows] @ multipliers
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        same_bucket = sorted_keys[1:] == sorted_keys[:-1]
+        left_parts.append(order[:-1][same_bucket])
+        right_parts.append(order[1:][same_bucket])
+
+    left = np.concatenate(left_parts) if left_parts else np.empty(0, dtype=np.int64)
+    right = np.concatenate(right_parts) if right_parts else np.empty(0, dtype=np.int64)
+
+    # Deduplicate candidate pairs found by several bands
+    if len(left):
+        pair_keys = np.unique(np.minimum(left, right) * n_recipes + np.maximum(left, right))
+        left, right = pair_keys // n_recipes, pair_keys % n_recipes
+    n_candidates = len(left)
+
+    # Verify candidates against the full signature
+    estimated_jaccard = (signatures[left] == signatures[right]).mean(axis=1) if n_candidates else np.empty(0)
+    verified = estimated_jaccard >= threshold
+    left, right = left[verified], right[verified]
+
+    graph = coo_matrix(
+        (np.ones(len(left), dtype=np.int8), (left, right)),
+        shape=(n_recipes, n_recipes)
+    )
+    _, labels = connected_components(graph, directed=False)
+
+    return labels, n_candidates, int(verified.sum())
+
+
+def deduplicate_recipes(df, threshold=DEDUP_THRESHOLD, num_perm=MINHASH_PERMUTATIONS):
+    """
+    Collapse near-duplicate recipes, keeping the first recipe of each group
+
+    Returns the filtered DataFrame and a report with counts and phase timings
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    shingle_hashes, offsets = build_recipe_shingles(df['name'].values, df['ingredients'].values)
+    timings['shingling'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    signatures = compute_minhash_signatures(shingle_hashes, offsets, num_perm=num_perm)
+    timings['minhash'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    labels, n_candidates, n_verified = find_near_duplicates(signatures, threshold)
+    timings['lsh'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, keep_positions = np.unique(labels, return_index=True)
+    keep_mask = np.zeros(len(df), dtype=bool)
+    keep_mask[keep_positions] = True
+    deduplicated = df[keep_mask]
+    timings['collapse'] = time.perf_counter() - start
+
+    report = {
+        'input_recipes': len(df),
+        'output_recipes': len(deduplicated),
+        'duplicates_collapsed': len(df) - len(deduplicated),
+        'duplicate_groups': int((np.bincount(labels) > 1).sum()),
+        'candidate_pairs': n_candidates,
+        'verified_pairs': n_verified,
+        'threshold': threshold,
+        'timings_seconds': {phase: round(seconds, 3) for phase, seconds in timings.items()}
+    }
+
+    return deduplicated, report
+
+
 def main():
-    print("\n[1/4] Loading Kaggle recipes dataset...")
+    print("\n[1/5] Loading Kaggle recipes dataset...")
     
     # Load dataset
     try:
@@ -153,7 +341,7 @@ def main():
         print(f"✗ Error loading dataset: {e}")
         return
     
-    print("\n[2/4] Processing and filtering recipes...")
+    print("\n[2/5] Processing and filtering recipes...")
     
     # Parse nutrition
     df['nutrition_parsed'] = df['nutrition'].apply(parse_nutrition)
@@ -172,11 +360,25 @@ def main():
     # Parse tags
     df['tags_list'] = df['tags'].apply(lambda x: ast.literal_eval(x) if pd.notna(x) else [])
     
+    print("\n[3/5] Collapsing near-duplicate recipes (MinHash LSH)...")
+    
+    if DEDUP_ENABLED:
+        df, dedup_report = deduplicate_recipes(df)
+        print(f"✓ Collapsed {dedup_report['duplicates_collapsed']:,} near-duplicates "
+              f"in {dedup_report['duplicate_groups']:,} groups (Jaccard ≥ {DEDUP_THRESHOLD})")
+        print(f"  Candidate pairs: {dedup_report['candidate_pairs']:,} | "
+              f"Verified: {dedup_report['verified_pairs']:,}")
+        for phase, seconds in dedup_report['timings_seconds'].items():
+            print(f"    - {phase}: {seconds:.3f}s")
+        print(f"✓ {len(df):,} unique recipes remain")
+    else:
+        print("⊙ Near-duplicate detection disabled (DEDUP_ENABLED = False)")
+    
     # Select diverse meals
     # Prioritize: varied calories, varied categories, high ratings
     df = df.sample(min(MAX_MEALS * 2, len(df)), random_state=42)  # Oversample then filter
     
-    print("\n[3/4] Creating meal documents...")
+    print("\n[4/5] Creating meal documents...")
     
     meals = []
     
@@ -234,7 +436,7 @@ def main():
     for cuisine, count in cuisines.items():
         print(f"    - {cuisine}: {count}")
     
-    print("\n[4/4] Saving to JSON file...")
+    print("\n[5/5] Saving to JSON file...")
     
     # Create output directory
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
@@ -0,0 +1,28 @@
+"""
+NutriGuide AI - File Utilities
+Atomic writes for files the running service or other tools read concurrently
+
+Each writer saves to a temporary file next to the target and swaps it in
+with os.replace, so a reader sees either the old or the new file, never a
+partial one.
+"""
+
+import json
+import os
+
+import joblib
+
+
+def save_json_atomic(path, data):
+    """Write `data` as indented JSON to `path` atomically"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def dump_joblib_atomic(obj, path):
+    """joblib.dump `obj` to `path` atomically"""
+    tmp_path = path + '.tmp'
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
@@ -0,0 +1,84 @@
+"""
+NutriGuide AI - Food Nutrition Lookup
+Nutrition of logged foods from datasets/nutrition.csv
+
+The table lists each food label at a few reference weights (apple_pie at
+80, 100, 120, 150 and 200 g). Rows are sorted by (label, weight) once at load,
+with per-label offsets into the sorted arrays, so resolving a whole food log
+is one binary search over a composite (label, weight) key. Between two
+reference weights nutrients are interpolated linearly; outside the range they
+scale in proportion to the nearest reference weight.
+"""
+
+import numpy as np
+import pandas as pd
+
+# ======================
+# Configuration
+# ======================
+NUTRITION_COLUMNS = ['calories', 'protein', 'carbohydrates', 'fats', 'fiber', 'sugars', 'sodium']
+
+
+def normalize_food_label(label):
+    """'Apple Pie' -> 'apple_pie'"""
+    return '_'.join(str(label).strip().lower().replace('-', ' ').split())
+
+
+class FoodNutritionTable:
+    """Per-label sorted reference weights and nutrient rows"""
+
+    def __init__(self, table):
+        table = table.assign(label=table['label'].map(normalize_food_label))
+        table = table.sort_values(['label', 'weight'], kind='stable').reset_index(drop=True)
+
+        self.labels = list(dict.fromkeys(table['label']))
+        self.label_ids = {label: idx for idx, label in enumerate(self.labels)}
+        row_labels = table['label'].map(self.label_ids).to_numpy()
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(row_labels, minlength=len(self.labels)))])
+
+        self.weights = table['weight'].to_numpy(dtype=float)
+        self.values = table[NUTRITION_COLUMNS].to_numpy(dtype=float)
+        # Composite key: rows of label i occupy [i * span, (i + 1) * span), still sorted
+        self.key_span = 2 * self.weights.max() + 1
+        self.keys = row_labels * self.key_span + self.weights
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls(pd.read_csv(path))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def lookup(self, labels, grams):
+        """
+        Nutrition of each (label, grams) item
+
+        Returns (an (n_items x len(NUTRITION_COLUMNS)) array, found mask).
+        Rows of unknown labels are zero and marked not found.
+        """
+        grams = np.asarray(grams, dtype=float)
+        label_ids = np.array([self.label_ids.get(normalize_food_label(label), -1) for label in labels], dtype=np.int64)
+        found = label_ids >= 0
+        result = np.zeros((len(label_ids), len(NUTRITION_COLUMNS)))
+        if not found.any():
+            return result, found
+
+        ids, amounts = label_ids[found], grams[found]
+        first, last = self.offsets[ids], self.offsets[ids + 1] - 1
+
+        # Lower reference row: last reference weight <= grams, clamped to the label's rows
+        lower = np.searchsorted(self.keys, ids * self.key_span + np.minimum(amounts, self.key_span - 1), side='right') - 1
+        lower = np.clip(lower, first, np.maximum(last - 1, first))
+        upper = np.minimum(lower + 1, last)
+
+        w0, w1 = self.weights[lower], self.weights[upper]
+        inside = (amounts >= w0) & (amounts <= w1) & (w1 > w0)
+        t = np.where(inside, (amounts - w0) / np.where(w1 > w0, w1 - w0, 1), 0)
+        interpolated = self.values[lower] + t[:, None] * (self.values[upper] - self.values[lower])
+
+        # Outside the reference range: scale the nearest reference row
+        nearest = np.where(amounts > w1, upper, lower)
+        scaled = self.values[nearest] * (amounts / self.weights[nearest])[:, None]
+
+        result[found] = np.where(inside[:, None], interpolated, scaled)
+        return result, found
@@ -0,0 +1,305 @@
+"""
+NutriGuide AI - Columnar Meal Catalog
+Array view of the meal recommendation system for vectorized serving
+
+The recommendation pickle stores meals as a list of dicts. Planning, filtering
+and search endpoints need to touch every meal per request, so the catalog
+keeps each field as a NumPy column (nutrients as float arrays, categories as
+integer codes, allergens and dietary tags as per-meal bitmasks) and turns
+user filters into boolean masks in a few array operations.
+"""
+
+import numpy as np
+
+from meal_names import MealNameIndex
+
+# ======================
+# Configuration
+# ======================
+NUTRIENTS = ['calories', 'protein', 'carbohydrates', 'fats', 'fiber']
+NEIGHBOR_K = 50  # Nearest neighbours stored per meal
+
+# User-facing allergy names mapped onto the allergen vocabulary of the meal data
+ALLERGEN_ALIASES = {
+    'peanut': 'nuts', 'peanuts': 'nuts', 'tree_nuts': 'nuts', 'nut': 'nuts',
+    'gluten': 'wheat', 'milk': 'dairy', 'lactose': 'dairy',
+    'egg': 'eggs', 'shrimp': 'shellfish', 'crustaceans': 'shellfish', 'soya': 'soy'
+}
+
+# Diets that are hard restrictions, with the meal tags that satisfy each.
+# Other dietary preferences (low_carb, high_protein, ...) are soft preferences.
+STRICT_DIETS = {
+    'vegetarian': ['vegetarian', 'vegan'],
+    'vegan': ['vegan'],
+    'gluten_free': ['gluten_free']
+}
+
+
+def _top_k_rows(rows, self_columns, k):
+    """Best-first top k columns of each row of a similarity block, skipping each row's own meal"""
+    rows[np.arange(rows.shape[0]), self_columns] = -np.inf
+    top = np.argpartition(-rows, k - 1, axis=1)[:, :k] if k else np.empty((rows.shape[0], 0), dtype=int)
+    top_scores = np.take_along_axis(rows, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def top_k_neighbors(similarity_matrix, k=NEIGHBOR_K, block_size=2048):
+    """
+    Indices and scores of each meal's k most similar other meals, best first
+
+    Works block by block on the rows, so only a (block_size x n) slice is
+    sorted at a time.
+    """
+    n_meals = similarity_matrix.shape[0]
+    k = max(0, min(k, n_meals - 1))
+    indices = np.empty((n_meals, k), dtype=np.int32)
+    scores = np.empty((n_meals, k), dtype=np.float32)
+
+    for start in range(0, n_meals, block_size):
+        rows = np.array(similarity_matrix[start:start + block_size], dtype=float)
+        stop = start + rows.shape[0]
+        indices[start:stop], scores[start:stop] = _top_k_rows(rows, np.arange(start, stop), k)
+
+    return indices, scores
+
+
+def feature_neighbors(features, k=NEIGHBOR_K, rows=None, block_size=2048):
+    """
+    top_k_neighbors() for unit feature rows, without an n x n similarity matrix
+
+    Similarities are dot products of `features` (dense or sparse), computed
+    for block_size query rows at a time. `rows` limits the query meals (all
+    by default); neighbours are always searched over every meal.
+    """
+    n_meals = features.shape[0]
+    rows = np.arange(n_meals) if rows is None else np.asarray(rows)
+    k = max(0, min(k, n_meals - 1))
+    indices = np.empty((len(rows), k), dtype=np.int32)
+    scores = np.empty((len(rows), k), dtype=np.float32)
+
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        similarity = features[block] @ features.T
+        similarity = similarity.toarray() if hasattr(similarity, 'toarray') else similarity
+        indices[start:start + len(block)], scores[start:start + len(block)] = \
+            _top_k_rows(np.array(similarity, dtype=float), block, k)
+
+    return indices, scores
+
+
+def _rows(rows):
+    return slice(None) if rows is None else rows
+
+
+def normalize_label(label):
+    return str(label).strip().lower().replace(' ', '_').replace('-', '_')
+
+
+class MealCatalog:
+    """
+    Column arrays for every meal in the recommendation system
+
+    Meal i is row i of every array and entry i of `meals` (the original
+    records, used to build responses), so indices from the similarity matrix
+    and meal_index.json address the catalog directly. `neighbor_indices` and
+    `neighbor_scores` are the (n_meals x K) nearest-neighbour lists,
+    `features` the L2-normalized meal feature vectors and `similarity_matrix`
+    the dense pairwise similarities (either one serves similarity lookups).
+    """
+
+    def __init__(self, meals, neighbor_indices=None, neighbor_scores=None, features=None,
+                 similarity_matrix=None):
+        self.meals = list(meals)
+        self.neighbor_indices = neighbor_indices
+        self.neighbor_scores = neighbor_scores
+        self.features = features
+        self.similarity_matrix = similarity_matrix
+        self.names = [meal['name'] for meal in self.meals]
+        self.name_index = {name: idx for idx, name in enumerate(self.names)}
+        self.name_lookup = MealNameIndex(self.names)
+
+        for nutrient in NUTRIENTS:
+            values = np.array([meal.get(nutrient) or 0 for meal in self.meals], dtype=float)
+            setattr(self, nutrient, values)
+        # Minutes; NaN when unknown so range filters never match it
+        self.cook_time = np.array(
+            [np.nan if meal.get('cookTime') is None else meal['cookTime'] for meal in self.meals], dtype=float
+        )
+        # Rows in (calories, protein, carbohydrates, fats) order for plan arithmetic
+        self.macros = np.column_stack([self.calories, self.protein, self.carbohydrates, self.fats])
+
+        self.category_names = sorted({meal.get('category') or 'other' for meal in self.meals})
+        category_codes = {name: code for code, name in enumerate(self.category_names)}
+        self.category_codes = np.array(
+            [category_codes[meal.get('category') or 'other'] for meal in self.meals], dtype=np.int16
+        )
+
+        self.allergen_names, self.allergen_bits = self._encode_labels('allergens')
+        self.dietary_names, self.dietary_bits = self._encode_labels('dietaryTags')
+
+    def __len__(self):
+        return len(self.meals)
+
+    def _encode_labels(self, field):
+        """Vocabulary and one bit per label for a multi-label field"""
+        vocabulary = sorted({normalize_label(label) for meal in self.meals for label in (meal.get(field) or [])})
+        if len(vocabulary) > 64:
+            raise ValueError(f'Too many distinct {field} for a 64-bit mask: {len(vocabulary)}')
+        bit_of = {label: np.uint64(1) << np.uint64(bit) for bit, label in enumerate(vocabulary)}
+
+        bits = np.zeros(len(self.meals), dtype=np.uint64)
+        for idx, meal in enumerate(self.meals):
+            for label in meal.get(field) or []:
+                bits[idx] |= bit_of[normalize_label(label)]
+        return vocabulary, bits
+
+    def _label_bits(self, vocabulary, labels, aliases=None):
+        mask = np.uint64(0)
+        for label in labels or []:
+            label = normalize_label(label)
+            label = (aliases or {}).get(label, label)
+            if label in vocabulary:
+                mask |= np.uint64(1) << np.uint64(vocabulary.index(label))
+        return mask
+
+    # ======================
+    # Filters
+    # ======================
+
+    def category_mask(self, categories, rows=None):
+        """Meals in any of the given categories"""
+        codes = [self.category_names.index(c) for c in categories if c in self.category_names]
+        return np.isin(self.category_codes[_rows(rows)], codes)
+
+    def allergen_safe_mask(self, allergies, rows=None):
+        """Meals containing none of the user's allergens"""
+        blocked = self._label_bits(self.allergen_names, allergies, ALLERGEN_ALIASES)
+        return (self.allergen_bits[_rows(rows)] & blocked) == 0
+
+    def diet_mask(self, dietary_preferences, rows=None):
+        """Meals satisfying every strict diet (vegetarian, vegan, gluten_free) in the preferences"""
+        dietary_bits = self.dietary_bits[_rows(rows)]
+        mask = np.ones(len(dietary_bits), dtype=bool)
+        for preference in dietary_preferences or []:
+            satisfying_tags = STRICT_DIETS.get(normalize_label(preference))
+            if satisfying_tags:
+                mask &= (dietary_bits & self._label_bits(self.dietary_names, satisfying_tags)) != 0
+        return mask
+
+    def any_tag_mask(self, dietary_tags):
+        """Meals carrying at least one of the given dietary tags"""
+        return (self.dietary_bits & self._label_bits(self.dietary_names, dietary_tags)) != 0
+
+    def preference_matches(self, dietary_preferences):
+        """Per-meal count of soft dietary preferences (tags like high_protein) the meal carries"""
+        soft = [p for p in dietary_preferences or [] if normalize_label(p) not in STRICT_DIETS]
+        matches = np.zeros(len(self.meals), dtype=np.int8)
+        for preference in soft:
+            bit = self._label_bits(self.dietary_names, [preference])
+            if bit:
+                matches += ((self.dietary_bits & bit) != 0).astype(np.int8)
+        return matches
+
+    def allowed_mask(self, allergies=None, dietary_preferences=None, categories=None, rows=None):
+        """
+        Combined hard filters for a user
+
+        Covers every meal, or only the meals at index array `rows` so that
+        filtering a short candidate list does not touch the whole catalog.
+        """
+        mask = self.allergen_safe_mask(allergies, rows) & self.diet_mask(dietary_preferences, rows)
+        if categories:
+            mask &= self.category_mask(categories, rows)
+        return mask
+
+    # ======================
+    # Similarity
+    # ======================
+
+    def similarity(self, idx, candidates):
+        """Cosine similarity of meal `idx` to each meal in `candidates`"""
+        if self.features is not None:
+            return self.features[candidates] @ self.features[idx]
+        return self.similarity_matrix[idx, candidates]
+
+    def similarity_row(self, idx):
+        """Similarities of one meal to every meal"""
+        return self.similarity_rows([idx])[0]
+
+    def pairwise_similarity(self, indices):
+        """(len(indices) x len(indices)) similarities among a few meals"""
+        if self.features is not None:
+            vectors = self.features[indices]
+            return vectors @ vectors.T
+        return np.asarray(self.similarity_matrix[np.ix_(indices, indices)], dtype=float)
+
+    def similarity_rows(self, indices):
+        """(len(indices) x n_meals) similarities of several meals to every meal, in one matrix product"""
+        if self.features is not None:
+            return self.features[indices] @ self.features.T
+        return np.asarray(self.similarity_matrix[indices], dtype=float)
+
+    # ======================
+    # Lookup
+    # ======================
+
+    def resolve(self, meal_refs):
+        """
+        Catalog indices for a list of meal names or integer ids
+
+        Names that are not exact keys go through the fuzzy name index.
+        Returns (indices, unresolved references), indices in request order.
+        """
+        indices, unresolved = [], []
+        for ref in meal_refs:
+            idx = None
+            if isinstance(ref, int) and not isinstance(ref, bool) and 0 <= ref < len(self.meals):
+                idx = ref
+            elif isinstance(ref, str):
+                idx = self.name_index.get(ref)
+                if idx is None:
+                    idx, _, _ = self.name_lookup.lookup(ref)
+            if idx is None:
+                unresolved.append(ref)
+            else:
+                indices.append(idx)
+        return indices, unresolved
+
+    # ======================
+    # Responses
+    # ======================
+
+    def meal_summary(self, idx):
+        """Meal fields as returned by the recommendation endpoints"""
+        meal = self.meals[idx]
+        return {
+            'name': meal['name'],
+            'calories': meal['calories'],
+            'protein': meal['protein'],
+            'carbohydrates': meal['carbohydrates'],
+            'fats': meal['fats'],
+            'fiber': meal.get('fiber'),
+            'category': meal['category'],
+            'cuisine': meal.get('cuisine'),
+            'dietary_tags': meal.get('dietaryTags', []),
+            'allergens': meal.get('allergens', []),
+            'cook_time': meal.get('cookTime')
+        }
+
+
+def catalog_from_system(recommendation_system):
+    """
+    Build the catalog from a loaded meal_recommendation_system.pkl
+
+    Neighbour lists come from the pickle, or are derived from the similarity
+    matrix for systems trained before they were stored.
+    """
+    similarity_matrix = recommendation_system.get('similarity_matrix')
+    neighbor_indices = recommendation_system.get('neighbor_indices')
+    neighbor_scores = recommendation_system.get('neighbor_scores')
+    if neighbor_indices is None and similarity_matrix is not None:
+        neighbor_indices, neighbor_scores = top_k_neighbors(similarity_matrix)
+    return MealCatalog(recommendation_system['meals_df'], neighbor_indices, neighbor_scores,
+                       recommendation_system.get('feature_matrix'), similarity_matrix)
+
@@ -0,0 +1,116 @@
+"""
+NutriGuide AI - Meal Recommendation Features
+Shared by train_meal_recommendation.py and incremental catalog updates
+
+Turns seed-format meals (nutrition nested under 'nutrition', ingredients as
+{name, quantity, unit} dicts) into the recommender's feature columns, and
+featurizes new meals with the fitted (frozen) vectorizer, binarizers,
+scaler and optional embedding model stored in the recommendation pickle, so
+they land in the same feature space as the meals the system was trained on.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+# ======================
+# Configuration
+# ======================
+NUTRITION_FEATURES = ['calories', 'protein', 'carbohydrates', 'fats', 'fiber',
+                      'protein_ratio', 'carb_ratio', 'fat_ratio']
+
+# TF-IDF: 40%, Nutrition: 40%, Dietary: 15%, Allergens: 5%
+FEATURE_WEIGHTS = {
+    'tfidf': 0.4,
+    'nutrition': 0.4,
+    'dietary': 0.15,
+    'allergens': 0.05
+}
+
+# Meal fields kept in the recommendation pickle (meals_df records)
+RECORD_FIELDS = ['name', 'category', 'cuisine', 'calories', 'protein', 'carbohydrates', 'fats', 'fiber',
+                 'dietaryTags', 'allergens', 'cookTime', 'ingredients']
+
+
+def prepare_meals(meals_df):
+    """Flatten nutrition, ingredient names, macro ratios and the TF-IDF text of seed-format meals"""
+    meals_df = meals_df.copy()
+    for column in ('description', 'cuisine', 'category'):
+        if column not in meals_df:
+            meals_df[column] = ''
+    for column in ('dietaryTags', 'allergens', 'ingredients'):
+        if column not in meals_df:
+            meals_df[column] = [[] for _ in range(len(meals_df))]
+    if 'cookTime' not in meals_df:
+        meals_df['cookTime'] = None
+
+    for nutrient in ('calories', 'protein', 'carbohydrates', 'fats', 'fiber'):
+        meals_df[nutrient] = meals_df['nutrition'].apply(lambda x: x.get(nutrient, 0))
+
+    # Ingredient names only, for ingredient search
+    meals_df['ingredients'] = meals_df['ingredients'].apply(
+        lambda x: [i['name'] if isinstance(i, dict) else str(i) for i in x] if isinstance(x, list) else []
+    )
+
+    # Calculate derived features
+    meals_df['protein_ratio'] = meals_df['protein'] * 4 / meals_df['calories'].replace(0, 1)
+    meals_df['carb_ratio'] = meals_df['carbohydrates'] * 4 / meals_df['calories'].replace(0, 1)
+    meals_df['fat_ratio'] = meals_df['fats'] * 9 / meals_df['calories'].replace(0, 1)
+
+    # Create text features for TF-IDF
+    meals_df['text_features'] = (
+        meals_df['name'].fillna('') + ' ' +
+        meals_df['description'].fillna('') + ' ' +
+        meals_df['category'].fillna('') + ' ' +
+        meals_df['cuisine'].fillna('') + ' ' +
+        meals_df['dietaryTags'].apply(lambda x: ' '.join(x) if isinstance(x, list) else '')
+    )
+    return meals_df
+
+
+def combine_features(tfidf_matrix, nutrition_scaled, dietary_matrix, allergen_matrix, weights=FEATURE_WEIGHTS):
+    """Weighted feature blocks side by side, sparse so a wide text block costs only its non-zeros"""
+    return sparse.hstack([
+        tfidf_matrix * weights['tfidf'],
+        nutrition_scaled * weights['nutrition'],
+        dietary_matrix * weights['dietary'],
+        allergen_matrix * weights['allergens']
+    ]).tocsr()
+
+
+def unit_rows(matrix):
+    """Unit-length float32 rows, so dot products are cosine similarities"""
+    return normalize(matrix).astype(np.float32)
+
+
+def featurize_meals(recommendation_system, meals_df):
+    """
+    Serving feature rows and TF-IDF rows for prepared meals, using the system's fitted featurizers
+
+    Returns (features, tfidf rows). Features match the system's
+    feature_matrix: embeddings when it was trained with an embedding model,
+    the full combined features otherwise. Tags and allergens the binarizers
+    never saw are ignored.
+    """
+    tfidf_rows = recommendation_system['tfidf_vectorizer'].transform(meals_df['text_features'])
+    nutrition = recommendation_system['scaler_nutrition'].transform(meals_df[NUTRITION_FEATURES].fillna(0))
+    with warnings.catch_warnings():
+        # MultiLabelBinarizer warns about unknown labels and drops them
+        warnings.simplefilter('ignore', UserWarning)
+        dietary = recommendation_system['mlb_dietary'].transform(meals_df['dietaryTags'])
+        allergens = recommendation_system['mlb_allergens'].transform(meals_df['allergens'])
+
+    combined = combine_features(tfidf_rows, nutrition, dietary, allergens,
+                                recommendation_system.get('feature_weights', FEATURE_WEIGHTS))
+    embedding_model = recommendation_system.get('embedding_model')
+    if embedding_model is not None:
+        return unit_rows(embedding_model.transform(combined)), tfidf_rows
+    return unit_rows(combined).toarray(), tfidf_rows
+
+
+def meal_records(meals_df):
+    """meals_df rows as the records stored in the recommendation pickle"""
+    return pd.DataFrame(meals_df)[RECORD_FIELDS].to_dict('records')
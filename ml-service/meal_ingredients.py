@@ -0,0 +1,166 @@
+"""
+NutriGuide AI - Ingredient Set Search
+"What can I cook" matching of a user's ingredients against meal ingredient lists
+
+Ingredient names are normalized (lowercase, punctuation removed, last word
+singularized) into a vocabulary. Each ingredient has a posting list of the
+meals that use it: a packed bitset over all meals for common ingredients,
+a sorted meal-id array for rare ones (a bitset costs N/8 bytes whatever the
+posting length). A query adds up the postings of the user's ingredients to
+get, per meal, how many of its ingredients the user has, so a 20-ingredient
+pantry costs 20 bit-parallel passes over the catalog.
+"""
+
+import re
+
+import numpy as np
+
+# ======================
+# Configuration
+# ======================
+
+# Ingredients assumed to be in every kitchen unless the request says otherwise
+PANTRY_STAPLES = ['salt', 'pepper', 'black pepper', 'salt and pepper', 'water']
+
+DENSE_POSTING_SHARE = 1 / 32  # Ingredients in more meals than this share get a bitset posting
+
+
+def singularize(word):
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith(('oes', 'ches', 'shes', 'xes')):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def normalize_ingredient(name):
+    """'Garlic Cloves,' -> 'garlic clove'"""
+    words = re.sub(r'[^a-z ]+', ' ', str(name).lower()).split()
+    if not words:
+        return ''
+    return ' '.join(words[:-1] + [singularize(words[-1])])
+
+
+class IngredientIndex:
+    """Ingredient vocabulary with per-ingredient meal postings"""
+
+    def __init__(self, meal_ingredients):
+        n_meals = len(meal_ingredients)
+        self.n_meals = n_meals
+        self.vocabulary = []
+        self.ingredient_ids = {}
+
+        pair_ingredients, pair_meals = [], []
+        for meal_idx, ingredients in enumerate(meal_ingredients):
+            for ingredient in {normalize_ingredient(name) for name in ingredients or []} - {''}:
+                ingredient_id = self.ingredient_ids.setdefault(ingredient, len(self.vocabulary))
+                if ingredient_id == len(self.vocabulary):
+                    self.vocabulary.append(ingredient)
+                pair_ingredients.append(ingredient_id)
+                pair_meals.append(meal_idx)
+
+        pair_ingredients = np.array(pair_ingredients, dtype=np.int64)
+        pair_meals = np.array(pair_meals, dtype=np.int32)
+        self.ingredient_counts = np.bincount(pair_meals, minlength=n_meals).astype(np.int16)
+
+        # Forward index (pairs are in meal order): meal_ingredients[meal_offsets[m]:meal_offsets[m + 1]]
+        self.meal_ingredients = pair_ingredients.astype(np.int32)
+        self.meal_offsets = np.concatenate([[0], np.cumsum(self.ingredient_counts)])
+
+        # Sorted-array postings for every ingredient: meals[offsets[i]:offsets[i + 1]]
+        order = np.argsort(pair_ingredients, kind='stable')
+        self.posting_meals = pair_meals[order]
+        document_frequency = np.bincount(pair_ingredients, minlength=len(self.vocabulary))
+        self.offsets = np.concatenate([[0], np.cumsum(document_frequency)])
+
+        # Packed bitsets for common ingredients
+        self.bitsets = {}
+        for ingredient_id in np.flatnonzero(document_frequency > DENSE_POSTING_SHARE * n_meals):
+            bits = np.zeros(n_meals, dtype=bool)
+            bits[self.posting(ingredient_id)] = True
+            self.bitsets[int(ingredient_id)] = np.packbits(bits)
+
+        # Word -> ingredients, for expanding "chicken" to "whole chicken", "cooked chicken", ...
+        self.word_index = {}
+        for ingredient_id, ingredient in enumerate(self.vocabulary):
+            for word in set(ingredient.split()):
+                self.word_index.setdefault(word, []).append(ingredient_id)
+
+    @classmethod
+    def from_system(cls, recommendation_system):
+        """Build from a loaded recommendation pickle, or None if it has no ingredient lists"""
+        meals = recommendation_system['meals_df']
+        if not meals or 'ingredients' not in meals[0]:
+            return None
+        return cls([meal['ingredients'] for meal in meals])
+
+    def staple_ids(self):
+        """Vocabulary ids of the pantry staples, matched exactly ('pepper', not 'red bell pepper')"""
+        return {self.ingredient_ids[staple] for staple in PANTRY_STAPLES if staple in self.ingredient_ids}
+
+    def posting(self, ingredient_id):
+        return self.posting_meals[self.offsets[ingredient_id]:self.offsets[ingredient_id + 1]]
+
+    def resolve(self, name):
+        """
+        Vocabulary ids an ingredient the user has covers
+
+        Ingredients containing all of its words and ending in the same head
+        noun match, so "chicken" covers "whole chicken" but not "chicken
+        broth", and "rice" covers "brown rice" but not "rice vinegar".
+        """
+        words = normalize_ingredient(name).split()
+        if not words or words[0] not in self.word_index:
+            return []
+        matches = set(self.word_index[words[0]])
+        for word in words[1:]:
+            matches &= set(self.word_index.get(word, []))
+        return sorted(i for i in matches if self.vocabulary[i].rsplit(' ', 1)[-1] == words[-1])
+
+    def match_counts(self, ingredient_ids):
+        """Per-meal number of distinct ingredients among `ingredient_ids`"""
+        counts = np.zeros(self.n_meals, dtype=np.int16)
+        for ingredient_id in set(ingredient_ids):
+            bits = self.bitsets.get(ingredient_id)
+            if bits is not None:
+                counts += np.unpackbits(bits, count=self.n_meals)
+            else:
+                counts[self.posting(ingredient_id)] += 1
+        return counts
+
+    def search(self, have, max_missing=2, include_staples=True, allowed=None):
+        """
+        Meals cookable with the given ingredients
+
+        Returns (meal indices, matched counts, missing counts, resolved
+        ingredients per query term). Meals must use at least one of the user's
+        ingredients and miss at most `max_missing` of their own. Results are
+        ordered by coverage, then fewest missing, then most matched.
+        """
+        resolved = {term: self.resolve(term) for term in have}
+        user_ids = {i for ids in resolved.values() for i in ids}
+        staple_ids = self.staple_ids() - user_ids if include_staples else set()
+
+        user_matched = self.match_counts(user_ids)
+        matched = user_matched + self.match_counts(staple_ids) if staple_ids else user_matched
+        missing = self.ingredient_counts - matched
+
+        # Staples alone do not make a meal a match
+        keep = (user_matched > 0) & (missing <= max_missing)
+        if allowed is not None:
+            keep &= allowed
+        meals = np.flatnonzero(keep)
+
+        coverage = matched[meals] / np.maximum(self.ingredient_counts[meals], 1)
+        order = np.lexsort((-matched[meals], missing[meals], -coverage))
+        meals = meals[order]
+
+        resolved = {term: [self.vocabulary[i] for i in ids] for term, ids in resolved.items()}
+        return meals, matched[meals], missing[meals], resolved
+
+    def meal_ingredient_names(self, meal_idx):
+        """Normalized distinct ingredients of one meal"""
+        ids = self.meal_ingredients[self.meal_offsets[meal_idx]:self.meal_offsets[meal_idx + 1]]
+        return [self.vocabulary[i] for i in ids]
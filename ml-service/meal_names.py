@@ -0,0 +1,113 @@
+"""
+NutriGuide AI - Fuzzy Meal Name Index
+Resolves user-typed meal names to catalog entries
+
+Names are normalized (lowercase, punctuation and repeated spaces removed)
+and looked up by exact match first. Otherwise the query's character
+trigrams are looked up in an inverted index (CSR-style postings: one sorted
+array of meal ids per trigram). Candidates are the meals listed under at
+least MIN_SEED_HITS (three) of the query's SEED_TRIGRAMS rarest trigrams, or
+under any of them when no meal reaches that, so a typo only has to leave a
+few distinctive trigrams intact. The candidates' own trigram lists (a forward
+index) are then checked against the query in one pass, and the best candidate is
+scored with the Dice coefficient 2 * shared / (query trigrams + name
+trigrams).
+"""
+
+import re
+
+import numpy as np
+
+# ======================
+# Configuration
+# ======================
+MIN_CONFIDENCE = 0.5   # Fuzzy matches below this Dice score are rejected
+SEED_TRIGRAMS = 6      # Rarest query trigrams whose postings supply the candidates
+MIN_SEED_HITS = 3      # Candidates must appear under this many seed trigrams (when any do)
+
+
+def normalize_name(name):
+    """Lowercase, keep letters and digits, single spaces"""
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', str(name).lower()).split())
+
+
+def name_trigrams(normalized):
+    """Distinct character trigrams of a normalized name, padded at word edges"""
+    padded = f'  {normalized} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MealNameIndex:
+    """Exact and trigram lookup of meal names to catalog indices"""
+
+    def __init__(self, names):
+        self.names = list(names)
+        normalized = [normalize_name(name) for name in self.names]
+
+        # First meal wins when two names normalize the same way
+        self.exact = {}
+        for idx, name in enumerate(normalized):
+            self.exact.setdefault(name, idx)
+
+        self.trigram_ids = {}
+        pair_trigrams = []
+        self.trigram_counts = np.zeros(len(self.names), dtype=np.int64)
+        for idx, name in enumerate(normalized):
+            grams = name_trigrams(name)
+            self.trigram_counts[idx] = len(grams)
+            pair_trigrams.extend(self.trigram_ids.setdefault(gram, len(self.trigram_ids)) for gram in grams)
+
+        # Forward index: meal_trigrams[meal_offsets[i]:meal_offsets[i + 1]] are meal i's trigrams
+        self.meal_trigrams = np.array(pair_trigrams, dtype=np.int32)
+        self.meal_offsets = np.concatenate([[0], np.cumsum(self.trigram_counts)])
+
+        # Inverted index, sorted by trigram id: offsets[t]:offsets[t + 1] are the meals containing trigram t
+        pair_meals = np.repeat(np.arange(len(self.names), dtype=np.int32), self.trigram_counts)
+        order = np.argsort(self.meal_trigrams, kind='stable')
+        self.postings = pair_meals[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(self.meal_trigrams, minlength=len(self.trigram_ids)))])
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup(self, query, min_confidence=MIN_CONFIDENCE):
+        """
+        Resolve a meal name
+
+        Returns (index, match, confidence) with match 'normalized' (identical
+        after normalization) or 'fuzzy', or (None, None, best confidence) when no
+        name is similar enough.
+        """
+        normalized = normalize_name(query)
+        if normalized in self.exact:
+            return self.exact[normalized], 'normalized', 1.0
+
+        query_grams = name_trigrams(normalized)
+        grams = np.array([self.trigram_ids[g] for g in query_grams if g in self.trigram_ids], dtype=np.int64)
+        if grams.size == 0:
+            return None, None, 0.0
+
+        # Rarest trigrams first; their postings are the candidate set
+        grams = grams[np.argsort(self.offsets[grams + 1] - self.offsets[grams])]
+        candidates, hits = np.unique(np.concatenate(
+            [self.postings[self.offsets[g]:self.offsets[g + 1]] for g in grams[:SEED_TRIGRAMS]]
+        ), return_counts=True)
+        if (hits >= MIN_SEED_HITS).any():
+            candidates = candidates[hits >= MIN_SEED_HITS]
+
+        # Shared trigrams per candidate from the forward index, via a query-trigram lookup table
+        counts = self.trigram_counts[candidates]
+        starts = self.meal_offsets[candidates]
+        run_starts = np.cumsum(counts) - counts
+        positions = np.repeat(starts - run_starts, counts) + np.arange(counts.sum())
+        in_query = np.zeros(len(self.trigram_ids), dtype=bool)
+        in_query[grams] = True
+        hits = in_query[self.meal_trigrams[positions]]
+        shared = np.add.reduceat(hits, run_starts)
+
+        dice = 2 * shared / (len(query_grams) + self.trigram_counts[candidates])
+        best = int(np.argmax(dice))
+        confidence = float(dice[best])
+        if confidence < min_confidence:
+            return None, None, round(confidence, 3)
+        return int(candidates[best]), 'fuzzy', round(confidence, 3)
@@ -0,0 +1,197 @@
+"""
+NutriGuide AI - Meal Plan Optimizer
+Builds daily meal plans whose totals hit calorie and macro targets
+
+A day is a sequence of slots (breakfast, lunch, dinner, snack). For each slot
+the allowed meals of that category are scored against the slot's share of the
+daily targets and cut down to a small candidate pool with argpartition. A
+beam search then walks the slots in order: every kept partial plan is extended
+by every pool candidate at once as a (beam x pool x nutrient) array, scored
+against the cumulative target, and the best partial plans are kept.
+
+Plans are scored by the weighted root-mean-square relative deviation. When the
+catalog cannot hit every target at once (e.g. mostly high-fat meals against a
+40% carb target), the squared error spreads the miss across nutrients instead
+of giving up on whichever one has the lowest weight.
+"""
+
+import os
+
+import numpy as np
+
+# ======================
+# Configuration
+# ======================
+
+# Meal categories each plan slot draws from
+PLAN_SLOTS = {
+    'breakfast': ['breakfast'],
+    'lunch': ['lunch'],
+    'dinner': ['dinner'],
+    'snack': ['snack', 'dessert']
+}
+
+# Share of the daily targets each slot is expected to cover
+SLOT_SHARES = {'breakfast': 0.25, 'lunch': 0.35, 'dinner': 0.30, 'snack': 0.10}
+
+# Relative importance of (calories, protein, carbohydrates, fats) deviations;
+# requests may override them (see /plan/day)
+NUTRIENT_WEIGHTS = np.array([1.0, 1.0, 1.0, 1.0])
+
+POOL_SIZE = 40           # Candidates kept per slot
+BEAM_WIDTH = 256         # Partial plans kept after each slot
+PREFERENCE_BONUS = 0.05  # Cost reduction per matched soft dietary preference
+
+# Portion multiplier bounds for personalized recommendations (shared with app.py)
+SERVING_BOUNDS = (float(os.getenv('SERVING_MIN', 0.5)), float(os.getenv('SERVING_MAX', 2.0)))
+
+# Weekly diversity: cost added to a meal once it is planned, and to its near
+# neighbours in proportion to how far their similarity exceeds the threshold
+REPEAT_PENALTY = 1.0
+NEAR_REPEAT_PENALTY = 0.1
+NEAR_REPEAT_SIMILARITY = 0.9
+
+
+def plan_error(totals, targets, weights=NUTRIENT_WEIGHTS):
+    """Weighted root-mean-square relative deviation of nutrient totals (..., 4) from targets (4,)"""
+    relative = (totals - targets) / np.maximum(targets, 1e-9)
+    return np.sqrt((relative ** 2) @ weights / weights.sum())
+
+
+def optimal_serving_multipliers(nutrients, targets, bounds=SERVING_BOUNDS, weights=NUTRIENT_WEIGHTS):
+    """
+    Portion multiplier per meal that best fits the targets, for all meals at once
+
+    Minimizes sum_k w_k * (s * m_k / t_k - 1)^2 over s for each meal row of
+    `nutrients` (n, 4). The minimizer is s = sum(w r) / sum(w r^2) with
+    r = m / t. The problem is convex in s, so clipping to `bounds` gives the
+    bounded optimum. Meals with no nutrients keep a multiplier of 1.
+    """
+    relative = nutrients / np.maximum(targets, 1e-9)
+    numerator = relative @ weights
+    denominator = (relative ** 2) @ weights
+    multipliers = np.divide(numerator, denominator, out=np.ones_like(numerator), where=denominator > 0)
+    return np.clip(multipliers, *bounds)
+
+
+def candidate_pool(catalog, allowed, slot, slot_targets, extra_cost, pool_size=POOL_SIZE,
+                   weights=NUTRIENT_WEIGHTS):
+    """
+    Best `pool_size` allowed meals for a slot, judged on their own
+
+    Returns (meal indices, per-meal extra cost) for the pool.
+    """
+    indices = np.flatnonzero(allowed & catalog.category_mask(PLAN_SLOTS.get(slot, [slot])))
+    if indices.size > pool_size:
+        scores = plan_error(catalog.macros[indices], slot_targets, weights) + extra_cost[indices]
+        indices = indices[np.argpartition(scores, pool_size - 1)[:pool_size]]
+    return indices, extra_cost[indices]
+
+
+def plan_day(catalog, targets, allowed=None, slots=None, preference_matches=None, penalty=None,
+             pool_size=POOL_SIZE, beam_width=BEAM_WIDTH, weights=None):
+    """
+    Choose one meal per slot so the day's totals best match the targets
+
+    `targets` is (calories, protein, carbohydrates, fats). `allowed` is a
+    boolean mask of meals the user may eat, `preference_matches` a per-meal
+    count of matched soft preferences and `penalty` an optional per-meal cost
+    (used by weekly planning to discourage repeats). `weights` overrides
+    NUTRIENT_WEIGHTS for this plan.
+
+    Returns a dict with the chosen meal index per slot, the nutrient totals,
+    the targets the plan was scored against and any slots with no candidates.
+    """
+    targets = np.asarray(targets, dtype=float)
+    weights = NUTRIENT_WEIGHTS if weights is None else np.asarray(weights, dtype=float)
+    slots = slots or list(PLAN_SLOTS)
+    n_meals = len(catalog)
+    allowed = np.ones(n_meals, dtype=bool) if allowed is None else allowed
+
+    extra_cost = np.zeros(n_meals) if penalty is None else np.asarray(penalty, dtype=float).copy()
+    if preference_matches is not None:
+        extra_cost -= PREFERENCE_BONUS * preference_matches
+
+    shares = np.array([SLOT_SHARES.get(slot, 1.0 / len(slots)) for slot in slots])
+    shares = shares / shares.sum()
+
+    beam_totals = np.zeros((1, 4))
+    beam_cost = np.zeros(1)
+    beam_error = np.zeros(1)
+    history = []
+    skipped = []
+    covered_share = 0.0
+
+    for slot, share in zip(slots, shares):
+        pool, pool_cost = candidate_pool(catalog, allowed, slot, targets * share, extra_cost, pool_size, weights)
+        if pool.size == 0:
+            skipped.append(slot)
+            continue
+        covered_share += share
+
+        # Extend every partial plan by every candidate: (beam, pool, nutrient)
+        totals = beam_totals[:, None, :] + catalog.macros[pool][None, :, :]
+        cost = beam_cost[:, None] + pool_cost[None, :]
+        error = plan_error(totals, targets * covered_share, weights)
+        score = (error + cost).ravel()
+
+        keep = np.argsort(score) if score.size <= beam_width else np.argpartition(score, beam_width - 1)[:beam_width]
+        parents, choices = np.divmod(keep, pool.size)
+        history.append((slot, parents, pool[choices]))
+
+        beam_totals = totals.reshape(-1, 4)[keep]
+        beam_cost = cost.ravel()[keep]
+        beam_error = error.ravel()[keep]
+
+    if not history:
+        return {'meals': {}, 'totals': np.zeros(4), 'targets': np.zeros(4), 'error': None, 'skipped_slots': skipped}
+
+    # Backtrack from the best complete plan
+    best = int(np.argmin(beam_error + beam_cost))
+    chosen = {}
+    position = best
+    for slot, parents, meals in reversed(history):
+        chosen[slot] = int(meals[position])
+        position = parents[position]
+
+    return {
+        'meals': {slot: chosen[slot] for slot in slots if slot in chosen},
+        'totals': beam_totals[best],
+        'targets': targets * covered_share,
+        'error': float(beam_error[best]),
+        'skipped_slots': skipped
+    }
+
+
+def add_repeat_penalty(catalog, penalty, meal_idx, threshold=NEAR_REPEAT_SIMILARITY):
+    """
+    Penalize a planned meal and its near-identical neighbours in place
+
+    Touches only the meal's K neighbour entries, so each update is O(K)
+    regardless of catalog size.
+    """
+    penalty[meal_idx] += REPEAT_PENALTY
+    if catalog.neighbor_indices is None:
+        return
+    neighbors = catalog.neighbor_indices[meal_idx]
+    closeness = (catalog.neighbor_scores[meal_idx] - threshold) / (1.0 - threshold)
+    near = closeness > 0
+    penalty[neighbors[near]] += NEAR_REPEAT_PENALTY * closeness[near]
+
+
+def plan_week(catalog, targets, allowed=None, slots=None, preference_matches=None, days=7, weights=None):
+    """
+    Plan `days` consecutive days, discouraging repeated and near-identical meals
+
+    Days are planned in order; every chosen meal adds to a per-meal penalty
+    vector that later days see as extra cost. Returns the list of day plans.
+    """
+    penalty = np.zeros(len(catalog))
+    plans = []
+    for _ in range(days):
+        plan = plan_day(catalog, targets, allowed, slots, preference_matches, penalty, weights=weights)
+        for meal_idx in plan['meals'].values():
+            add_repeat_penalty(catalog, penalty, meal_idx)
+        plans.append(plan)
+    return plans
+
@@ -0,0 +1,128 @@
+"""
+NutriGuide AI - Nutrient Range Queries
+Multi-constraint range filters over the columnar meal catalog
+
+Each queryable column keeps a sorted permutation of the meals (argsort) and
+the column values in that order. A range constraint becomes a contiguous
+span of the permutation found with two binary searches, so its match count
+is known before any meal is touched. The query starts from the most
+selective constraint's span and checks the other constraints and the
+allergen/diet/category filters on those meals only. Gathering scattered rows
+costs more per meal than a sequential pass, so when even the best span holds
+more than SCAN_SHARE of the catalog the query masks whole columns instead.
+Ordered results with a limit only sort the requested page.
+"""
+
+import numpy as np
+
+# ======================
+# Configuration
+# ======================
+
+# Query column -> MealCatalog attribute
+QUERY_COLUMNS = {
+    'calories': 'calories',
+    'protein': 'protein',
+    'carbohydrates': 'carbohydrates',
+    'fats': 'fats',
+    'fiber': 'fiber',
+    'cook_time': 'cook_time'
+}
+COLUMN_ALIASES = {'carbs': 'carbohydrates', 'fat': 'fats', 'cookTime': 'cook_time'}
+
+# Above this share of the catalog a sequential mask over whole columns beats gathering span rows
+SCAN_SHARE = 0.05
+
+
+def parse_constraints(where):
+    """
+    {"protein": {"min": 30}, "cookTime": {"max": 30}} -> {"protein": (30, inf), "cook_time": (-inf, 30)}
+
+    Raises ValueError for unknown columns, non-numeric bounds or min > max.
+    """
+    constraints = {}
+    for column, bounds in (where or {}).items():
+        name = COLUMN_ALIASES.get(column, column)
+        if name not in QUERY_COLUMNS:
+            raise ValueError(f'Unknown column: {column}. Use one of {sorted(QUERY_COLUMNS)}')
+        if not isinstance(bounds, dict) or not set(bounds) <= {'min', 'max'}:
+            raise ValueError(f'{column} must be an object with "min" and/or "max"')
+        low = float(bounds['min']) if bounds.get('min') is not None else -np.inf
+        high = float(bounds['max']) if bounds.get('max') is not None else np.inf
+        if low > high:
+            raise ValueError(f'{column}: min is greater than max')
+        constraints[name] = (low, high)
+    return constraints
+
+
+class NutrientRangeIndex:
+    """Sorted-permutation index over the catalog's numeric columns"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.columns = {name: getattr(catalog, attribute) for name, attribute in QUERY_COLUMNS.items()}
+        self.permutations = {}
+        self.sorted_values = {}
+        for name, values in self.columns.items():
+            # NaN sorts last, so unknown values never fall inside a finite span
+            order = np.argsort(values, kind='stable').astype(np.int32)
+            self.permutations[name] = order
+            self.sorted_values[name] = values[order]
+
+    def span(self, column, low, high):
+        """(start, stop) of the meals with low <= value <= high in the column's sorted permutation"""
+        values = self.sorted_values[column]
+        start = np.searchsorted(values, low, side='left') if np.isfinite(low) else 0
+        stop = np.searchsorted(values, high, side='right') if np.isfinite(high) else np.count_nonzero(~np.isnan(values))
+        return int(start), int(max(stop, start))
+
+    def _matches(self, constraints, filters, rows=None, skip=None):
+        """Mask over all meals, or over index array `rows`, for every constraint but `skip` and the filters"""
+        selected = slice(None) if rows is None else rows
+        keep = np.ones(len(self.catalog) if rows is None else len(rows), dtype=bool)
+        for column, (low, high) in constraints.items():
+            if column != skip:
+                values = self.columns[column][selected]
+                keep &= (values >= low) & (values <= high)
+        if filters:
+            keep &= self.catalog.allowed_mask(**filters, rows=rows)
+        return keep
+
+    def query(self, constraints, filters=None, order_by=None, descending=False, limit=20, offset=0):
+        """
+        Meals satisfying every range constraint and filter
+
+        `constraints` maps columns to (low, high) bounds from
+        parse_constraints; `filters` holds MealCatalog.allowed_mask keyword
+        arguments. Returns (meal indices for the requested page, total
+        matches, plan) where plan names the column the scan started from and
+        how many meals it read.
+        """
+        spans = {column: self.span(column, *bounds) for column, bounds in constraints.items()}
+        driver = min(spans, key=lambda column: spans[column][1] - spans[column][0]) if spans else None
+
+        if driver is not None and spans[driver][1] - spans[driver][0] <= SCAN_SHARE * len(self.catalog):
+            start, stop = spans[driver]
+            rows = self.permutations[driver][start:stop]
+            rows = rows[self._matches(constraints, filters, rows, skip=driver)]
+            plan = {'driver': driver, 'rows_scanned': stop - start}
+        else:
+            rows = np.flatnonzero(self._matches(constraints, filters))
+            driver = None
+            plan = {'driver': None, 'rows_scanned': len(self.catalog)}
+        total = len(rows)
+
+        page_end = offset + limit
+        if order_by == driver and order_by is not None:
+            # The driver span is already in column order (and holds no NaN)
+            rows = rows[::-1] if descending else rows
+        elif order_by is not None:
+            values = self.columns[order_by][rows]
+            key = np.where(np.isnan(values), np.inf, -values if descending else values)
+            if len(rows) > page_end:
+                # Only the requested page needs sorting
+                head = np.argpartition(key, page_end - 1)[:page_end]
+                rows, key = rows[head], key[head]
+            rows = rows[np.argsort(key, kind='stable')]
+
+        return rows[offset:page_end], total, plan
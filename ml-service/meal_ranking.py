@@ -0,0 +1,191 @@
+"""
+NutriGuide AI - Recommendation Re-ranking
+Diversity-aware ordering of recommendation candidates
+
+Maximal marginal relevance (MMR) picks results one at a time, trading a
+candidate's relevance against its similarity to the results already picked:
+
+    mmr = (1 - diversity) * relevance - diversity * max similarity to picked
+
+The max-similarity vector over all candidates is updated incrementally with
+one similarity row per pick, so choosing k results from N candidates costs
+k vectorized O(N) steps.
+"""
+
+import numpy as np
+
+from meal_planner import optimal_serving_multipliers
+
+# ======================
+# Configuration
+# ======================
+MMR_POOL_FACTOR = 5   # Candidates considered per requested result
+MMR_CANDIDATES = 500  # Upper bound on candidates considered for re-ranking
+
+
+def top_candidates(candidates, relevance, limit=MMR_CANDIDATES):
+    """The `limit` most relevant candidates and their relevance, unordered"""
+    candidates = np.asarray(candidates)
+    relevance = np.asarray(relevance, dtype=float)
+    if len(candidates) > limit:
+        keep = np.argpartition(-relevance, limit - 1)[:limit]
+        candidates, relevance = candidates[keep], relevance[keep]
+    return candidates, relevance
+
+
+def mmr_rerank(catalog, candidates, relevance, k, diversity=0.3):
+    """
+    Select k of `candidates` (meal indices) by maximal marginal relevance
+
+    `relevance` is any score aligned with `candidates` (higher is better);
+    it is min-max scaled so the trade-off behaves the same for similarity
+    scores and 0-100 recommendation scores. Only the MMR_POOL_FACTOR * k
+    most relevant candidates are considered, so results stay relevant.
+    diversity=0 is a plain relevance sort. Similarities below zero count
+    as zero. `catalog` is anything with pairwise_similarity(), such as a
+    MealCatalog or a ShardedMealCatalog.
+    """
+    candidates, relevance = top_candidates(candidates, relevance, min(MMR_CANDIDATES, MMR_POOL_FACTOR * max(k, 1)))
+    k = min(k, len(candidates))
+    if k <= 0 or diversity <= 0:
+        return candidates[np.argsort(-relevance, kind='stable')[:k]]
+
+    span = relevance.max() - relevance.min()
+    scaled = (relevance - relevance.min()) / span if span > 0 else np.zeros_like(relevance)
+    base = (1 - diversity) * scaled
+
+    # Pairwise similarities of the pool in one call; the loop only reads rows
+    pool_similarity = catalog.pairwise_similarity(candidates)
+    max_similarity = np.zeros(len(candidates))
+    available = np.ones(len(candidates), dtype=bool)
+    selected = []
+
+    for _ in range(k):
+        mmr = np.where(available, base - diversity * max_similarity, -np.inf)
+        best = int(np.argmax(mmr))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, pool_similarity[best], out=max_similarity)
+
+    return candidates[selected]
+
+
+def personalized_scores(catalog, targets, dietary_preferences=None, allergies=None, serving_bounds=None):
+    """
+    0-100 fit of every catalog meal to a user's nutrition targets
+
+    `targets` is (daily calories, protein, carbohydrates, fats); a meal is
+    judged against 30% of the day. With `serving_bounds` each meal is scored
+    on its best-fitting portion within the bounds. Returns (scores, portion
+    multipliers). Scores depend on each meal alone, so scoring a slice of
+    the catalog gives the same values as scoring all of it.
+    """
+    daily_calories, target_protein, target_carbs, target_fats = targets
+    meal_targets = np.array(targets, dtype=float) * 0.3
+
+    # Portion multiplier per meal that best fits the meal targets (closed form, all meals at once)
+    if serving_bounds:
+        multipliers = optimal_serving_multipliers(catalog.macros, meal_targets, serving_bounds)
+    else:
+        multipliers = np.ones(len(catalog))
+    scaled_calories = catalog.calories * multipliers
+
+    # Score every meal on its scaled portion, start from a perfect score
+    score = np.full(len(catalog), 100.0)
+
+    # 1. Calorie match (40% weight) - prefer within ±200 calories
+    calorie_diff = np.abs(scaled_calories - meal_targets[0])
+    calorie_score = np.maximum(0, 100 - calorie_diff / 10)
+    score -= (100 - calorie_score) * 0.4
+
+    # 2. Macro match (30% weight)
+    protein_ratio_target = (target_protein * 4) / daily_calories
+    carb_ratio_target = (target_carbs * 4) / daily_calories
+    fat_ratio_target = (target_fats * 9) / daily_calories
+
+    meal_calories = np.where(catalog.calories > 0, catalog.calories, 1)
+    macro_diff = (
+        np.abs(catalog.protein * 4 / meal_calories - protein_ratio_target) +
+        np.abs(catalog.carbohydrates * 4 / meal_calories - carb_ratio_target) +
+        np.abs(catalog.fats * 9 / meal_calories - fat_ratio_target)
+    ) / 3
+    macro_score = np.maximum(0, 100 - macro_diff * 200)
+    score -= (100 - macro_score) * 0.3
+
+    # 3. Dietary preferences (20% weight) - partial credit without a shared tag
+    if dietary_preferences and 'none' not in dietary_preferences:
+        dietary_match = np.where(catalog.any_tag_mask(dietary_preferences), 100, 50)
+        score -= (100 - dietary_match) * 0.2
+
+    # 4. Allergen check - critical factor, immediate disqualification
+    if allergies:
+        score[~catalog.allergen_safe_mask(allergies)] = 0
+
+    return score, multipliers
+
+
+def best_first(rows, values, k):
+    """
+    The k rows with the highest values, best first, ties to the lower row
+
+    Same result as a stable descending sort of ascending rows cut to k, but
+    only the rows at or above the k-th value are sorted.
+    """
+    rows, values = np.asarray(rows), np.asarray(values)
+    if len(rows) > k > 0:
+        threshold = np.partition(values, len(values) - k)[len(values) - k]
+        keep = np.flatnonzero(values >= threshold)
+        rows, values = rows[keep], values[keep]
+    order = np.lexsort((rows, -values))[:max(k, 0)]
+    return rows[order], values[order]
+
+
+def filtered_similar(catalog, idx, k, filters=None, scan=None):
+    """
+    The k meals most similar to meal `idx` that pass `filters`
+
+    `filters` holds MealCatalog.allowed_mask keyword arguments. The search
+    walks the precomputed neighbour list first, checking the filters on
+    those K meals only. It widens to a full scan of the similarity row
+    (and a catalog-wide filter mask) only when fewer than k neighbours pass.
+    `scan(idx, k, filters)` replaces that full scan when given (a sharded
+    catalog's). Returns (indices, scores, search) with search 'neighbors'
+    or 'full_scan'.
+    """
+    if catalog.neighbor_indices is not None:
+        neighbors = catalog.neighbor_indices[idx]
+        scores = catalog.neighbor_scores[idx]
+        exhaustive = len(neighbors) >= len(catalog) - 1
+        if filters:
+            keep = catalog.allowed_mask(**filters, rows=neighbors)
+            neighbors, scores = neighbors[keep], scores[keep]
+        if len(neighbors) >= k or exhaustive:
+            return neighbors[:k], scores[:k], 'neighbors'
+
+    if scan is not None:
+        indices, scores = scan(idx, k, filters)
+        return indices, scores, 'full_scan'
+
+    row = np.array(catalog.similarity_row(idx), dtype=float)
+    row[idx] = -np.inf
+    if filters:
+        row[~catalog.allowed_mask(**filters)] = -np.inf
+    top, top_scores = top_k_per_row(row[None, :], k)
+    found = np.isfinite(top_scores[0])
+    return top[0][found], top_scores[0][found], 'full_scan'
+
+
+def top_k_per_row(scores, k):
+    """
+    Column indices and values of the k largest entries in each row, best first
+
+    Entries set to -inf (excluded meals) sort last; callers drop them.
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=int), np.empty((scores.shape[0], 0))
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
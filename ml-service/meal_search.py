@@ -0,0 +1,79 @@
+"""
+NutriGuide AI - Free-text Meal Search
+Sparse inverted index over the recommendation system's TF-IDF vectors
+
+The meal-by-term TF-IDF matrix is stored transposed as CSR (one row of meal
+ids and weights per term), so a query touches only the posting lists of its
+own terms. Scores are the sparse dot product of the query vector with those
+postings, filters are checked on the matching meals only, and the top N are
+picked with a partial sort (ties go to the lower meal index).
+"""
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from meal_ranking import best_first
+
+
+class MealTextIndex:
+    """Term -> meal postings for TF-IDF scored search"""
+
+    def __init__(self, vectorizer, tfidf_matrix):
+        self.vectorizer = vectorizer
+        self.inverted = csr_matrix(tfidf_matrix, dtype=np.float32).T.tocsr()
+        self.inverted.sort_indices()
+        self.posting_counts = np.diff(self.inverted.indptr)
+
+    @classmethod
+    def from_system(cls, recommendation_system):
+        """
+        Build from a loaded meal_recommendation_system.pkl
+
+        Uses the stored TF-IDF matrix, or re-vectorizes name, category,
+        cuisine and dietary tags for systems trained before it was stored.
+        """
+        vectorizer = recommendation_system['tfidf_vectorizer']
+        tfidf_matrix = recommendation_system.get('tfidf_matrix')
+        if tfidf_matrix is None:
+            texts = [
+                ' '.join([meal['name'] or '', meal.get('category') or '', meal.get('cuisine') or '',
+                          ' '.join(meal.get('dietaryTags') or [])])
+                for meal in recommendation_system['meals_df']
+            ]
+            tfidf_matrix = vectorizer.transform(texts)
+        return cls(vectorizer, tfidf_matrix)
+
+    def query_terms(self, query):
+        """Vocabulary terms of the query that the index knows"""
+        if not hasattr(self.vectorizer, 'get_feature_names_out'):
+            # Hashed features have no vocabulary: keep the query terms whose column has postings
+            terms = list(dict.fromkeys(self.vectorizer.build_analyzer()(query)))
+            columns = self.vectorizer.term_columns(terms)
+            return [term for term, column in zip(terms, columns) if self.posting_counts[column] > 0]
+        vector = self.vectorizer.transform([query])
+        vocabulary = self.vectorizer.get_feature_names_out()
+        return [vocabulary[i] for i in vector.indices]
+
+    def release_postings(self):
+        """Drop the postings once shards serve search; query_terms() keeps working"""
+        self.inverted = None
+
+    def search(self, query, top_n=10, catalog=None, filters=None):
+        """
+        Top meals for a free-text query
+
+        Returns (meal indices, scores) best first. Meals sharing no term with
+        the query are never scored. `filters` holds MealCatalog.allowed_mask
+        keyword arguments and is checked on the matching meals only.
+        """
+        vector = self.vectorizer.transform([query]).astype(np.float32)
+        if vector.nnz == 0:
+            return np.empty(0, dtype=int), np.empty(0)
+
+        scores = vector @ self.inverted
+        meals, values = scores.indices, scores.data
+        if filters and catalog is not None and len(meals):
+            keep = catalog.allowed_mask(**filters, rows=meals)
+            meals, values = meals[keep], values[keep]
+
+        return best_first(meals, values, top_n)
@@ -0,0 +1,297 @@
+"""
+NutriGuide AI - Sharded Meal Catalog
+Scatter-gather top-K queries over catalog partitions served by worker processes
+
+Personalized, similar-meal and free-text queries score every meal. Here the
+catalog is split into contiguous row ranges (shards), each served by its own
+worker process with its own column arrays, feature rows and TF-IDF postings.
+A query is sent to every shard at once. Each shard returns its local top K
+as global meal indices, best first, and the parent merges those sorted
+lists with a heap, stopping after K results. Every score depends on one meal
+only, so the merged results match a scan over the whole catalog.
+
+Workers are started from a forkserver, a single-threaded helper process,
+never by forking the (multi-threaded) service itself: a fork copies locks
+other threads may hold at that moment, and the worker could deadlock on
+them. Each worker receives only its own slice of the catalog, pickled. Once
+every worker is up the service can drop its copies, so the per-shard data
+lives only in the workers; query vectors are fetched from the shards that
+hold them.
+
+Catalogs below SHARD_MIN_MEALS (or MEAL_SHARDS=1) are served in-process by a
+single shard over the full catalog, without workers.
+"""
+
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+
+import numpy as np
+
+from meal_catalog import catalog_from_system
+from meal_ranking import personalized_scores, best_first, top_k_per_row
+from meal_search import MealTextIndex
+
+# ======================
+# Configuration
+# ======================
+MEAL_SHARDS = int(os.getenv('MEAL_SHARDS', 0))              # 0: one shard per CPU core for large catalogs
+SHARD_MIN_MEALS = int(os.getenv('SHARD_MIN_MEALS', 50000))  # Smaller catalogs are served in-process
+# Workers fork from a single-threaded server process, never from the service's request or reload threads.
+# The server imports the main module once as __mp_main__ (app.py skips loading models there).
+SHARD_START_METHOD = 'forkserver'
+SHARD_PRELOAD = ['__main__', 'meal_shards']
+
+
+def shard_count(recommendation_system, requested=MEAL_SHARDS):
+    """
+    Number of shards for a loaded recommendation system
+
+    Shards score similarity against their own feature rows, so systems
+    without a dense feature_matrix are always served in-process.
+    """
+    n_meals = len(recommendation_system['meals_df'])
+    if recommendation_system.get('feature_matrix') is None:
+        return 1
+    if requested <= 0:
+        requested = (os.cpu_count() or 1) if n_meals >= SHARD_MIN_MEALS else 1
+    return max(1, min(requested, n_meals))
+
+
+def merge_top_k(shard_results, k):
+    """
+    Global top k of per-shard (indices, scores) results, each best first
+
+    A heap merge of the sorted lists: ties go to the lower meal index, as in
+    a stable sort over the whole catalog. Returns (indices, scores).
+    """
+    streams = [zip(-np.asarray(scores, dtype=float), indices) for indices, scores in shard_results]
+    top = list(itertools.islice(heapq.merge(*streams), max(k, 0)))
+    return (np.array([idx for _, idx in top], dtype=np.int64),
+            np.array([-score for score, _ in top], dtype=float))
+
+
+def shard_part(recommendation_system, start, stop):
+    """
+    The part of a loaded recommendation system that the shard over meals [start, stop) needs
+
+    Arrays are copies, not views, so the part does not keep the full
+    matrices alive.
+    """
+    tfidf_matrix = recommendation_system.get('tfidf_matrix')
+    return {
+        'meals_df': recommendation_system['meals_df'][start:stop],
+        'feature_matrix': np.array(recommendation_system['feature_matrix'][start:stop]),
+        'tfidf_matrix': None if tfidf_matrix is None else tfidf_matrix[start:stop],
+        'tfidf_vectorizer': recommendation_system['tfidf_vectorizer']
+    }
+
+
+class MealShard:
+    """A contiguous slice of the catalog; answers queries with global meal indices"""
+
+    def __init__(self, catalog, text_index, offset=0):
+        self.catalog = catalog
+        self.text_index = text_index
+        self.offset = offset
+
+    @classmethod
+    def from_part(cls, part, offset):
+        """Shard over a shard_part() whose first meal has global index `offset`"""
+        return cls(catalog_from_system(part), MealTextIndex.from_system(part), offset)
+
+    @classmethod
+    def from_system(cls, recommendation_system, start, stop):
+        """Shard over meals [start, stop) of a loaded meal_recommendation_system.pkl"""
+        return cls.from_part(shard_part(recommendation_system, start, stop), start)
+
+    def __len__(self):
+        return len(self.catalog)
+
+    def personalized(self, targets, dietary_preferences, allergies, meal_type, k, serving_bounds):
+        """Top k meals of this shard by personalized score"""
+        score, _ = personalized_scores(self.catalog, targets, dietary_preferences, allergies, serving_bounds)
+        rows = np.flatnonzero(self.catalog.category_mask([meal_type])) if meal_type else np.arange(len(score))
+        rows, values = best_first(rows, score[rows], k)
+        return rows + self.offset, values
+
+    def top_similar(self, scores, k, exclude, filters):
+        """Per query row of (n_queries x shard meals) `scores`: top k meals, skipping `exclude` and filtered meals"""
+        scores = np.array(scores, dtype=float)
+        if filters:
+            scores[:, ~self.catalog.allowed_mask(**filters)] = -np.inf
+        for row, excluded in enumerate(exclude):
+            local = np.asarray(excluded, dtype=np.int64) - self.offset
+            scores[row, local[(local >= 0) & (local < len(self))]] = -np.inf
+        top, top_scores = top_k_per_row(scores, k)
+        found = np.isfinite(top_scores)
+        return [(top[row][found[row]] + self.offset, top_scores[row][found[row]]) for row in range(len(scores))]
+
+    def similar(self, vectors, k, exclude, filters):
+        """top_similar() for query feature vectors against this shard's meals"""
+        return self.top_similar(vectors @ self.catalog.features.T, k, exclude, filters)
+
+    def vectors(self, indices):
+        """Feature rows of the global meal `indices` held by this shard, as (indices, rows)"""
+        indices = np.asarray(indices, dtype=np.int64)
+        held = indices[(indices >= self.offset) & (indices < self.offset + len(self))]
+        return held, self.catalog.features[held - self.offset]
+
+    def search(self, query, k, filters):
+        """Top k meals of this shard for a free-text query"""
+        meals, scores = self.text_index.search(query, k, self.catalog, filters)
+        return meals + self.offset, scores
+
+
+def release_full_copies(recommendation_system, catalog, text_index):
+    """Drop the full feature rows, similarity matrix and TF-IDF postings once shards hold them"""
+    catalog.features = catalog.similarity_matrix = None
+    text_index.release_postings()
+    for key in ('feature_matrix', 'similarity_matrix', 'tfidf_matrix'):
+        recommendation_system[key] = None
+
+
+def serve_shard(connection, part, offset):
+    """Worker loop: build one shard from its shard_part(), then answer (method, args) messages until None arrives"""
+    shard = MealShard.from_part(part, offset)
+    del part
+    connection.send(len(shard))
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        method, args = message
+        try:
+            connection.send((True, getattr(shard, method)(*args)))
+        except Exception as e:
+            connection.send((False, f'{type(e).__name__}: {e}'))
+    connection.close()
+
+
+class ShardedMealCatalog:
+    """
+    Scatter-gather front end over the catalog shards
+
+    `catalog` and `text_index` are the full, in-process catalog and text
+    index; the single-process mode serves queries from them directly. With
+    `release_local` the sharded mode then drops their feature rows,
+    similarity matrix and TF-IDF postings (and those of
+    `recommendation_system`), since the workers hold their own copies of
+    their slices; similarities for the parent come from the shards instead.
+    """
+
+    def __init__(self, recommendation_system, catalog, text_index, n_shards=None, release_local=False):
+        self.catalog = catalog
+        self.n_shards = shard_count(recommendation_system) if n_shards is None else n_shards
+        self.local = MealShard(catalog, text_index) if self.n_shards == 1 else None
+        self.connections, self.workers = [], []
+        self.lock = threading.Lock()
+
+        if self.local is None:
+            context = multiprocessing.get_context(SHARD_START_METHOD)
+            if SHARD_START_METHOD == 'forkserver':
+                context.set_forkserver_preload(SHARD_PRELOAD)
+            bounds = np.linspace(0, len(catalog), self.n_shards + 1).astype(int)
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                connection, worker_connection = context.Pipe()
+                part = shard_part(recommendation_system, int(start), int(stop))
+                worker = context.Process(target=serve_shard, daemon=True,
+                                         args=(worker_connection, part, int(start)))
+                worker.start()
+                worker_connection.close()
+                self.connections.append(connection)
+                self.workers.append(worker)
+            del part
+            # Wait until every shard is built
+            self.shard_sizes = [connection.recv() for connection in self.connections]
+
+            if release_local:
+                release_full_copies(recommendation_system, catalog, text_index)
+        else:
+            self.shard_sizes = [len(catalog)]
+
+    @property
+    def mode(self):
+        return 'single_process' if self.local is not None else 'sharded'
+
+    def scatter(self, method, *args):
+        """Call `method` on every shard at once; the shards' results in shard order"""
+        if self.local is not None:
+            return [getattr(self.local, method)(*args)]
+        with self.lock:
+            for connection in self.connections:
+                connection.send((method, args))
+            replies = [connection.recv() for connection in self.connections]
+        errors = [result for ok, result in replies if not ok]
+        if errors:
+            raise RuntimeError(f'Shard error: {errors[0]}')
+        return [result for _, result in replies]
+
+    def personalized(self, targets, dietary_preferences=None, allergies=None, meal_type=None, k=10,
+                     serving_bounds=None):
+        """Top k meals by personalized_scores(), optionally within one meal type"""
+        return merge_top_k(self.scatter('personalized', tuple(targets), dietary_preferences, allergies,
+                                        meal_type, k, serving_bounds), k)
+
+    def similar(self, query_indices, k, exclude=None, filters=None):
+        """
+        The k meals most similar to each query meal
+
+        `exclude` lists meal indices to skip for every query (each query meal
+        is always skipped for itself). Returns one (indices, scores) per query.
+        """
+        exclude = [[idx] + list(exclude or []) for idx in query_indices]
+        if self.local is not None:
+            shard_results = [self.local.top_similar(self.catalog.similarity_rows(query_indices), k, exclude, filters)]
+        else:
+            shard_results = self.scatter('similar', self.vectors(query_indices), k, exclude, filters)
+        return [merge_top_k([results[row] for results in shard_results], k) for row in range(len(query_indices))]
+
+    def similar_scan(self, idx, k, filters=None):
+        """similar() for one meal, as filtered_similar()'s full scan"""
+        return self.similar([idx], k, filters=filters)[0]
+
+    def search(self, query, k, filters=None):
+        """Top k meals for a free-text query"""
+        return merge_top_k(self.scatter('search', query, k, filters), k)
+
+    def vectors(self, indices):
+        """Feature rows of the global meal `indices`, gathered from the shards that hold them"""
+        indices = np.asarray(indices, dtype=np.int64)
+        if self.local is not None:
+            return self.catalog.features[indices]
+        unique = np.unique(indices)
+        replies = self.scatter('vectors', unique)
+        rows = np.empty((len(unique), replies[0][1].shape[1]), dtype=replies[0][1].dtype)
+        for held, values in replies:
+            rows[np.searchsorted(unique, held)] = values
+        return rows[np.searchsorted(unique, indices)]
+
+    def similarity(self, idx, candidates):
+        """MealCatalog.similarity() that also works once the parent's feature rows are released"""
+        if self.local is not None:
+            return self.catalog.similarity(idx, candidates)
+        vectors = self.vectors(np.concatenate([[idx], candidates]))
+        return vectors[1:] @ vectors[0]
+
+    def pairwise_similarity(self, indices):
+        """MealCatalog.pairwise_similarity() that also works once the parent's feature rows are released"""
+        if self.local is not None:
+            return self.catalog.pairwise_similarity(indices)
+        vectors = self.vectors(indices)
+        return vectors @ vectors.T
+
+    def close(self):
+        """Stop the shard workers"""
+        with self.lock:
+            for connection in self.connections:
+                try:
+                    connection.send(None)
+                    connection.close()
+                except OSError:
+                    pass
+            for worker in self.workers:
+                worker.join(timeout=5)
+            self.connections, self.workers = [], []
@@ -0,0 +1,123 @@
+"""
+NutriGuide AI - Streaming Meal Text Features
+TF-IDF over hashed terms, fitted chunk by chunk
+
+TfidfVectorizer needs the whole corpus in memory to build its vocabulary and
+has to be refit whenever meals change. Here terms are hashed straight to one
+of a fixed number of columns (sklearn's HashingVectorizer), so there is no
+vocabulary to fit. IDF weighting comes from a document-frequency table over
+those columns, updated one chunk at a time by partial_fit. Memory is bounded
+by the chunk size plus the table (8 bytes per column), and new meals are
+vectorized with transform() without refitting anything.
+
+Weights match TfidfVectorizer's defaults: raw term counts times the smoothed
+idf = ln((1 + n_docs) / (1 + df)) + 1, rows L2-normalized.
+"""
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+# ======================
+# Configuration
+# ======================
+HASH_FEATURES = 2 ** 18  # Hashed term columns; collisions are rare well below this many distinct terms
+CHUNK_SIZE = 10000       # Documents hashed per step
+
+
+def chunks(texts, chunk_size=CHUNK_SIZE):
+    """Lists of up to chunk_size texts from any iterable"""
+    chunk = []
+    for text in texts:
+        chunk.append(text)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class StreamingTfidfVectorizer:
+    """Hashed term counts weighted by an incrementally maintained IDF"""
+
+    def __init__(self, n_features=HASH_FEATURES, stop_words='english', ngram_range=(1, 2)):
+        self.hasher = HashingVectorizer(
+            n_features=n_features,
+            stop_words=stop_words,
+            ngram_range=ngram_range,
+            alternate_sign=False,
+            norm=None
+        )
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self.n_documents = 0
+
+    @property
+    def idf_(self):
+        return np.log((1 + self.n_documents) / (1 + self.document_frequency)) + 1
+
+    def partial_fit(self, texts):
+        """Add one chunk of documents to the document-frequency table"""
+        self._add_counts(self.hasher.transform(texts))
+        return self
+
+    def _add_counts(self, counts):
+        # Each distinct column in a row is one document containing that term
+        self.document_frequency += np.bincount(counts.indices, minlength=len(self.document_frequency))
+        self.n_documents += counts.shape[0]
+
+    def fit(self, texts, chunk_size=CHUNK_SIZE):
+        for chunk in chunks(texts, chunk_size):
+            self.partial_fit(chunk)
+        return self
+
+    def transform(self, texts):
+        """L2-normalized TF-IDF rows (sparse, float32) with the current IDF"""
+        counts = self.hasher.transform(texts).astype(np.float32)
+        counts.data *= self.idf_[counts.indices].astype(np.float32)
+        return normalize(counts)
+
+    def transform_chunks(self, texts, chunk_size=CHUNK_SIZE):
+        """transform() one chunk at a time, yielding sparse row blocks"""
+        for chunk in chunks(texts, chunk_size):
+            yield self.transform(chunk)
+
+    def fit_transform(self, texts, chunk_size=CHUNK_SIZE):
+        """
+        fit() then transform() of all texts as one CSR matrix
+
+        The fitting pass records each row's number of terms, so the result's
+        arrays are allocated once at their final size and filled chunk by
+        chunk; no list of blocks is stacked into a second copy. `texts` is
+        read twice, so pass a list or Series rather than a generator.
+        """
+        row_terms = []
+        for chunk in chunks(texts, chunk_size):
+            counts = self.hasher.transform(chunk)
+            self._add_counts(counts)
+            row_terms.append(np.diff(counts.indptr))
+
+        row_terms = np.concatenate(row_terms) if row_terms else np.zeros(0, dtype=np.int64)
+        n_nonzero = int(row_terms.sum())
+        index_dtype = np.int32 if n_nonzero < 2 ** 31 else np.int64
+        indptr = np.zeros(len(row_terms) + 1, dtype=index_dtype)
+        np.cumsum(row_terms, out=indptr[1:])
+        data = np.empty(n_nonzero, dtype=np.float32)
+        indices = np.empty(n_nonzero, dtype=index_dtype)
+
+        row = 0
+        for block in self.transform_chunks(texts, chunk_size):
+            span = slice(indptr[row], indptr[row + block.shape[0]])
+            data[span] = block.data
+            indices[span] = block.indices
+            row += block.shape[0]
+        return csr_matrix((data, indices, indptr), shape=(len(row_terms), self.hasher.n_features))
+
+    def build_analyzer(self):
+        return self.hasher.build_analyzer()
+
+    def term_columns(self, terms):
+        """Hashed column of each analyzed term (a word or n-gram, as build_analyzer() returns them)"""
+        hasher = FeatureHasher(n_features=self.hasher.n_features, input_type='string', alternate_sign=False)
+        return hasher.transform([[term] for term in terms]).indices.tolist()
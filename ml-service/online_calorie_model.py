@@ -0,0 +1,306 @@
+"""
+NutriGuide AI - Incremental Calorie Model Updates
+Updates the calorie model from observed progress records without a full retrain
+
+Each record describes one user over a period: their profile, average daily
+intake and weight change (exported from Progress documents as JSONL, our local
+stand-in for the Mongo feed). Energy balance turns a record into an observed
+calorie target:
+
+    observed TDEE   = avg intake - avg exercise burn - weight change (kg) * 7700 / days
+    observed target = observed TDEE + goal adjustment
+
+The trained model is kept frozen as a base and a partial_fit-capable
+SGDRegressor learns a bounded correction on its residuals. Each update reads
+only the new lines of the feed (a byte offset is stored in the manifest), so
+its cost scales with the batch, not the history. Every update publishes a new
+versioned pickle and atomically replaces models/nutrition_model.pkl.
+
+The manifest also records a hash of the base model and scaler. When the
+pipeline retrains them, the next update drops the old correction and replays
+every feed from the start against the new base model.
+
+Record format (one JSON object per line):
+    {"user_id": "...", "age": 30, "gender": "female", "height": 165, "weight": 62,
+     "activity_level": "light", "fitness_goal": "lose_weight",
+     "avg_daily_calories": 1750, "avg_calories_burned": 150,
+     "weight_change_kg": -0.6, "days": 14}
+
+Usage:
+    python online_calorie_model.py data/progress_feed.jsonl
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDRegressor
+
+from calorie_features import build_feature_matrix
+from file_utils import save_json_atomic, dump_joblib_atomic
+from synthetic_users import GOAL_CALORIE_ADJUSTMENTS
+from weight_forecast import ENERGY_PER_KG
+
+# ======================
+# Configuration
+# ======================
+OUTPUT_DIR = 'models'
+MODEL_PATH = os.path.join(OUTPUT_DIR, 'nutrition_model.pkl')
+SCALER_PATH = os.path.join(OUTPUT_DIR, 'scaler.pkl')
+VERSIONS_DIR = os.path.join(OUTPUT_DIR, 'versions')
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, 'model_versions.json')
+
+MIN_RECORD_DAYS = 7           # Shorter periods are dominated by water weight
+TARGET_BOUNDS = (1200, 5000)  # Same plausibility range as /predict
+MAX_CORRECTION = 300          # Largest adjustment (kcal) applied on top of the base model
+UPDATE_BATCH_SIZE = 5000
+KEEP_VERSIONS = 5             # Older versioned pickles are deleted
+
+REQUIRED_FIELDS = ['age', 'gender', 'height', 'weight', 'activity_level', 'fitness_goal',
+                   'avg_daily_calories', 'weight_change_kg', 'days']
+
+# ======================
+# Online Model
+# ======================
+
+class OnlineCalorieModel:
+    """
+    Frozen base regressor plus an incrementally trained residual correction
+
+    Exposes predict() like any scikit-learn regressor so the Flask service
+    can load it in place of the batch-trained model.
+    """
+
+    def __init__(self, base_model, max_correction=MAX_CORRECTION):
+        self.base_model = base_model
+        self.max_correction = max_correction
+        self.correction = SGDRegressor(
+            loss='huber',
+            epsilon=100.0,
+            alpha=1e-4,
+            learning_rate='invscaling',
+            eta0=0.01,
+            random_state=42
+        )
+        self.version = 0
+        self.n_records = 0
+        self.n_updates = 0
+
+    def predict_correction(self, X):
+        if self.n_records == 0:
+            return np.zeros(len(X))
+        return np.clip(self.correction.predict(X), -self.max_correction, self.max_correction)
+
+    def predict(self, X):
+        return self.base_model.predict(X) + self.predict_correction(X)
+
+    def partial_fit(self, X, y):
+        residuals = np.asarray(y, dtype=float) - self.base_model.predict(X)
+        self.correction.partial_fit(X, residuals)
+        self.n_records += len(residuals)
+        self.n_updates += 1
+        return self
+
+
+def as_online_model(model):
+    """Wrap a batch-trained model so it can be updated incrementally"""
+    return model if isinstance(model, OnlineCalorieModel) else OnlineCalorieModel(model)
+
+
+def base_model_hash(model, scaler):
+    """Content hash of the batch-trained base model and its scaler"""
+    base = model.base_model if isinstance(model, OnlineCalorieModel) else model
+    return joblib.hash((base, scaler))
+
+# ======================
+# Progress Records
+# ======================
+
+def observed_targets(records):
+    """
+    Derive observed calorie targets from energy balance
+
+    Returns (targets, valid mask); records that are too short, incomplete or
+    imply an implausible target are masked out.
+    """
+    days = records['days'].to_numpy(dtype=float)
+    intake = records['avg_daily_calories'].to_numpy(dtype=float)
+    burned = records.get('avg_calories_burned', pd.Series(0.0, index=records.index)).fillna(0).to_numpy(dtype=float)
+    weight_change = records['weight_change_kg'].to_numpy(dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tdee = intake - burned - weight_change * ENERGY_PER_KG / days
+
+    # Unknown goals count as maintenance, as encode_profiles() treats them
+    targets = tdee + records['fitness_goal'].map(GOAL_CALORIE_ADJUSTMENTS).fillna(0).to_numpy(dtype=float)
+
+    valid = (
+        (days >= MIN_RECORD_DAYS) &
+        np.isfinite(targets) &
+        (targets >= TARGET_BOUNDS[0]) & (targets <= TARGET_BOUNDS[1])
+    )
+    return targets, valid
+
+
+def read_feed(feed_path, offset=0, batch_size=UPDATE_BATCH_SIZE):
+    """
+    Yield (records DataFrame, end offset) batches from a JSONL feed starting at a byte offset
+
+    Malformed lines and records missing required fields are skipped.
+    """
+    with open(feed_path, 'rb') as f:
+        f.seek(offset)
+        batch = []
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            if not line.endswith(b'\n'):
+                # Partially written last line: leave it for the next run
+                break
+            offset += len(line)
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if all(record.get(field) is not None for field in REQUIRED_FIELDS):
+                batch.append(record)
+            if len(batch) >= batch_size:
+                yield pd.DataFrame(batch), offset
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch), offset
+
+# ======================
+# Versioning
+# ======================
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'current_version': 0, 'feed_offsets': {}, 'versions': []}
+
+
+def publish_model(model, manifest, update_info):
+    """Save a versioned pickle and atomically swap it in as the serving model"""
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    model.version = manifest['current_version'] + 1
+
+    version_path = os.path.join(VERSIONS_DIR, f'nutrition_model_v{model.version}.pkl')
+    joblib.dump(model, version_path)
+
+    dump_joblib_atomic(model, MODEL_PATH)
+
+    manifest['current_version'] = model.version
+    manifest['versions'].append(dict(update_info, version=model.version, path=version_path,
+                                     published_at=datetime.now().isoformat()))
+
+    # Prune old versioned pickles, keep their manifest entries
+    for entry in manifest['versions'][:-KEEP_VERSIONS]:
+        if entry.get('path') and os.path.exists(entry['path']):
+            os.remove(entry['path'])
+            entry['path'] = None
+
+    return version_path
+
+# ======================
+# Update
+# ======================
+
+def update_from_feed(feed_path, batch_size=UPDATE_BATCH_SIZE):
+    """
+    Apply all new records in the feed and publish one new model version
+
+    Returns the update summary, or None when there was nothing new.
+    """
+    manifest = load_manifest()
+    start = time.perf_counter()
+    model = joblib.load(MODEL_PATH)
+    scaler = joblib.load(SCALER_PATH)
+
+    base_hash = base_model_hash(model, scaler)
+    if manifest.get('base_model_hash') != base_hash:
+        # The base model was retrained: its correction starts over and sees the whole feed
+        if manifest.get('base_model_hash') is not None:
+            print("⊙ Base calorie model was retrained, replaying progress feeds from the start")
+        model = OnlineCalorieModel(model.base_model if isinstance(model, OnlineCalorieModel) else model)
+        manifest['feed_offsets'] = {}
+        manifest['base_model_hash'] = base_hash
+    model = as_online_model(model)
+
+    feed_key = os.path.abspath(feed_path)
+    offset = manifest['feed_offsets'].get(feed_key, 0)
+    if offset > os.path.getsize(feed_path):
+        # Feed was truncated or rotated: start over
+        offset = 0
+
+    n_read, n_used = 0, 0
+    abs_error_before, abs_error_after = 0.0, 0.0
+    end_offset = offset
+
+    for records, end_offset in read_feed(feed_path, offset, batch_size):
+        n_read += len(records)
+        targets, valid = observed_targets(records)
+        if not valid.any():
+            continue
+
+        X = build_feature_matrix(records[valid], scaler)
+        y = targets[valid]
+
+        # Prequential evaluation: score each batch before learning from it
+        abs_error_before += np.abs(model.predict(X) - y).sum()
+        model.partial_fit(X, y)
+        abs_error_after += np.abs(model.predict(X) - y).sum()
+        n_used += len(y)
+
+    manifest['feed_offsets'][feed_key] = end_offset
+
+    if n_used == 0:
+        save_json_atomic(MANIFEST_PATH, manifest)
+        print(f"⊙ No usable new records ({n_read} read), model unchanged")
+        return None
+
+    update_info = {
+        'records_read': n_read,
+        'records_used': n_used,
+        'total_records': model.n_records,
+        'mae_before_update': round(abs_error_before / n_used, 2),
+        'mae_after_update': round(abs_error_after / n_used, 2),
+        'update_seconds': round(time.perf_counter() - start, 3)
+    }
+    version_path = publish_model(model, manifest, update_info)
+    save_json_atomic(MANIFEST_PATH, manifest)
+
+    print(f"✓ Published model v{model.version}: {version_path}")
+    print(f"  Records used: {n_used:,} of {n_read:,} new | total seen: {model.n_records:,}")
+    print(f"  Batch MAE: {update_info['mae_before_update']:.1f} → {update_info['mae_after_update']:.1f} calories")
+    print(f"  Update time: {update_info['update_seconds']:.2f}s")
+
+    return update_info
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incrementally update the calorie model from progress records')
+    parser.add_argument('feed', help='JSONL file of progress records')
+    parser.add_argument('--batch-size', type=int, default=UPDATE_BATCH_SIZE, help='Records per partial_fit call')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("NUTRIGUIDE AI - INCREMENTAL CALORIE MODEL UPDATE")
+    print("=" * 60)
+
+    update_from_feed(args.feed, args.batch_size)
+
+
+if __name__ == '__main__':
+    # Run through the importable module so published pickles reference
+    # online_calorie_model.OnlineCalorieModel instead of __main__
+    from online_calorie_model import main as module_main
+    module_main()
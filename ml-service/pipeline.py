@@ -0,0 +1,396 @@
+"""
+NutriGuide AI - Incremental Training Pipeline
+Runs the data and training scripts as a DAG of stages with declared inputs and outputs
+
+Each stage is keyed by a content hash of its code and inputs. A stage's code is
+its script plus every local module it imports, directly or through other local
+modules, found by parsing the import statements. A stage is skipped
+when its key matches the last successful run and its outputs are unchanged on
+disk; independent stages (e.g. calorie model training and the recommender
+build) run in parallel as separate processes.
+
+Usage:
+    python pipeline.py                      # build everything that is out of date
+    python pipeline.py meal_recommendation  # build one stage (and stale upstream stages)
+    python pipeline.py --force calorie_model
+    python pipeline.py --dry-run
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+from file_utils import save_json_atomic
+
+# ======================
+# Configuration
+# ======================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_PATH = os.path.join(BASE_DIR, 'models', 'pipeline_state.json')
+LOG_DIR = os.path.join(BASE_DIR, 'logs', 'pipeline')
+MAX_PARALLEL_STAGES = 2
+HASH_BLOCK_SIZE = 1 << 20
+
+# Paths are relative to the ml-service directory (the scripts' working directory).
+# Local modules a script imports are part of its code automatically; 'code' lists
+# any other files a stage reads as code.
+STAGES = {
+    'meal_database': {
+        'script': 'create_meal_database.py',
+        'inputs': ['../datasets/archive/RAW_recipes.csv'],
+        'outputs': ['../backend/seeds/meals_seed.json', '../datasets/processed_meals.csv']
+    },
+    'meal_recommendation': {
+        'script': 'train_meal_recommendation.py',
+        'inputs': ['../backend/seeds/meals_seed.json'],
+        'outputs': [
+            'models/meal_recommendation_system.pkl',
+            'models/meal_index.json',
+            'models/recommendation_stats.json'
+        ],
+        # catalog_updates.py publishes incremental catalog versions over the trained system
+        'updated_in_place': ['models/meal_recommendation_system.pkl', 'models/meal_index.json']
+    },
+    'calorie_model': {
+        'script': 'train_model_with_real_data.py',
+        'inputs': [],
+        # Falls back to synthetic users when the Kaggle dump is absent
+        'optional_inputs': ['../datasets/archive/RAW_recipes.csv'],
+        'outputs': ['models/nutrition_model.pkl', 'models/scaler.pkl', 'models/model_stats.json'],
+        # online_calorie_model.py publishes incremental updates over the trained model
+        'updated_in_place': ['models/nutrition_model.pkl']
+    }
+}
+
+# ======================
+# Content Hashing
+# ======================
+
+def resolve(path):
+    return os.path.normpath(os.path.join(BASE_DIR, path))
+
+
+def file_digest(path, file_cache):
+    """
+    SHA-256 of a file, or None if it does not exist
+
+    Digests are cached by (size, mtime) so unchanged files are not re-read,
+    which keeps a no-op rebuild down to a few stat() calls.
+    """
+    full_path = resolve(path)
+    try:
+        stat = os.stat(full_path)
+    except FileNotFoundError:
+        return None
+
+    cached = file_cache.get(path)
+    if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+        return cached['sha256']
+
+    digest = hashlib.sha256()
+    with open(full_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+
+    file_cache[path] = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': digest.hexdigest()
+    }
+    return file_cache[path]['sha256']
+
+
+def local_imports(path, file_cache):
+    """
+    Local modules (ml-service/*.py) imported by a Python file
+
+    Parsed imports are cached alongside the file's digest, so they are only
+    re-parsed when the file changes.
+    """
+    if file_digest(path, file_cache) is None:
+        return []
+    cached = file_cache[path]
+    if 'imports' not in cached:
+        with open(resolve(path), 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=path)
+        modules = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules.update(alias.name.split('.')[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules.add(node.module.split('.')[0])
+        cached['imports'] = sorted(f'{module}.py' for module in modules
+                                   if os.path.isfile(os.path.join(BASE_DIR, f'{module}.py')))
+    return cached['imports']
+
+
+def stage_code(stage, file_cache):
+    """The stage's script, the local modules it imports (transitively) and any extra 'code' files"""
+    code, pending = [], [stage['script']]
+    while pending:
+        path = pending.pop()
+        if path not in code:
+            code.append(path)
+            pending.extend(local_imports(path, file_cache))
+    return sorted(code) + [path for path in stage.get('code', []) if path not in code]
+
+
+def stage_inputs(stage):
+    return stage['inputs'] + stage.get('optional_inputs', [])
+
+
+def compute_stage_key(stage, file_cache):
+    """Content address of a stage: hash of its code, inputs and arguments"""
+    manifest = {
+        'code': {path: file_digest(path, file_cache) for path in stage_code(stage, file_cache)},
+        'inputs': {path: file_digest(path, file_cache) for path in stage_inputs(stage)},
+        'args': stage.get('args', [])
+    }
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def is_stage_valid(name, stage, state, file_cache):
+    """
+    A stage is valid if its key matches the last run and its outputs are untouched
+
+    Outputs listed in 'updated_in_place' only need to exist, since other tools
+    legitimately rewrite them between pipeline runs.
+    """
+    record = state['stages'].get(name)
+    if not record or record['key'] != compute_stage_key(stage, file_cache):
+        return False
+    in_place = set(stage.get('updated_in_place', []))
+    return all(
+        os.path.exists(resolve(path)) if path in in_place else file_digest(path, file_cache) == digest
+        for path, digest in record['outputs'].items()
+    )
+
+# ======================
+# DAG Construction
+# ======================
+
+def build_dependencies(stages, file_cache):
+    """Upstream stages of each stage, inferred from outputs consumed as inputs"""
+    producers = {}
+    for name, stage in stages.items():
+        for path in stage['outputs']:
+            producers[os.path.normpath(path)] = name
+
+    dependencies = {}
+    for name, stage in stages.items():
+        dependencies[name] = {
+            producers[os.path.normpath(path)]
+            for path in stage_inputs(stage) + stage_code(stage, file_cache)
+            if os.path.normpath(path) in producers and producers[os.path.normpath(path)] != name
+        }
+    return dependencies
+
+
+def topological_order(dependencies):
+    order, visiting, done = [], set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f'Pipeline has a dependency cycle through "{name}"')
+        visiting.add(name)
+        for upstream in sorted(dependencies[name]):
+            visit(upstream)
+        visiting.discard(name)
+        done.add(name)
+        order.append(name)
+
+    for name in sorted(dependencies):
+        visit(name)
+    return order
+
+
+def select_stages(targets, dependencies):
+    """Targets plus everything upstream of them"""
+    selected, pending = set(), list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(dependencies[name])
+    return selected
+
+# ======================
+# State
+# ======================
+
+def load_state():
+    try:
+        with open(STATE_PATH, 'r') as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        state = {}
+    state.setdefault('stages', {})
+    state.setdefault('file_cache', {})
+    return state
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    save_json_atomic(STATE_PATH, state)
+
+# ======================
+# Execution
+# ======================
+
+def run_stage(name, stage):
+    """Run a stage's script in its own process, logging output to logs/pipeline/<stage>.log"""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f'{name}.log')
+
+    start = time.perf_counter()
+    with open(log_path, 'w') as log:
+        result = subprocess.run(
+            [sys.executable, stage['script']] + stage.get('args', []),
+            cwd=BASE_DIR,
+            stdout=log,
+            stderr=subprocess.STDOUT
+        )
+    return result.returncode, time.perf_counter() - start, log_path
+
+
+def run_pipeline(targets=None, force=(), dry_run=False, max_parallel=MAX_PARALLEL_STAGES):
+    """
+    Build the requested stages, skipping those whose outputs are still valid
+
+    Returns a dict of stage name -> 'skipped' | 'built' | 'failed' | 'blocked' | 'would_build'
+    """
+    state = load_state()
+    file_cache = state['file_cache']
+
+    dependencies = build_dependencies(STAGES, file_cache)
+    order = topological_order(dependencies)
+    selected = select_stages(targets or list(STAGES), dependencies)
+    order = [name for name in order if name in selected]
+    status = {}
+    timings = {}
+    pipeline_start = time.perf_counter()
+
+    def ready(name):
+        return all(status.get(upstream) in ('skipped', 'built') for upstream in dependencies[name] if upstream in selected)
+
+    def blocked(name):
+        return any(status.get(upstream) in ('failed', 'blocked') for upstream in dependencies[name] if upstream in selected)
+
+    with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        running = {}
+        pending = list(order)
+
+        while pending or running:
+            for name in list(pending):
+                if blocked(name):
+                    status[name] = 'blocked'
+                    pending.remove(name)
+                    print(f"⊘ {name}: blocked by failed upstream stage")
+                    continue
+                if dry_run:
+                    upstream_dirty = any(status.get(up) == 'would_build' for up in dependencies[name])
+                    if all(up in status for up in dependencies[name] if up in selected):
+                        stale = name in force or upstream_dirty or not is_stage_valid(name, STAGES[name], state, file_cache)
+                        if stale and not all(os.path.exists(resolve(p)) for p in STAGES[name]['inputs']):
+                            print(f"⊙ {name}: inputs missing, existing outputs would be kept")
+                            status[name] = 'skipped'
+                            pending.remove(name)
+                            continue
+                        status[name] = 'would_build' if stale else 'skipped'
+                        print(f"{'→' if stale else '✓'} {name}: {'out of date' if stale else 'up to date'}")
+                        pending.remove(name)
+                    continue
+                if not ready(name) or len(running) >= max_parallel:
+                    continue
+                pending.remove(name)
+
+                if name not in force and is_stage_valid(name, STAGES[name], state, file_cache):
+                    status[name] = 'skipped'
+                    print(f"✓ {name}: up to date (skipped)")
+                    continue
+
+                missing_inputs = [p for p in STAGES[name]['inputs'] if not os.path.exists(resolve(p))]
+                if missing_inputs:
+                    if all(os.path.exists(resolve(p)) for p in STAGES[name]['outputs']):
+                        status[name] = 'skipped'
+                        print(f"⊙ {name}: inputs missing ({', '.join(missing_inputs)}), keeping existing outputs")
+                    else:
+                        status[name] = 'failed'
+                        print(f"✗ {name}: inputs missing ({', '.join(missing_inputs)})")
+                    continue
+
+                # The key is taken before running so edits made during the run trigger a rebuild
+                key = compute_stage_key(STAGES[name], file_cache)
+                print(f"▶ {name}: running {STAGES[name]['script']}...")
+                running[executor.submit(run_stage, name, STAGES[name])] = (name, key)
+
+            if not running:
+                if pending and not dry_run:
+                    continue
+                break
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name, key = running.pop(future)
+                returncode, seconds, log_path = future.result()
+                timings[name] = seconds
+                missing_outputs = [p for p in STAGES[name]['outputs'] if not os.path.exists(resolve(p))]
+
+                if returncode != 0 or missing_outputs:
+                    status[name] = 'failed'
+                    state['stages'].pop(name, None)
+                    reason = f'exit code {returncode}' if returncode != 0 else f'missing outputs {missing_outputs}'
+                    print(f"✗ {name}: failed after {seconds:.1f}s ({reason}), see {log_path}")
+                    continue
+
+                status[name] = 'built'
+                state['stages'][name] = {
+                    'key': key,
+                    'outputs': {path: file_digest(path, file_cache) for path in STAGES[name]['outputs']},
+                    'completed_at': datetime.now().isoformat(),
+                    'duration_seconds': round(seconds, 2)
+                }
+                save_state(state)
+                print(f"✓ {name}: built in {seconds:.1f}s")
+
+    if not dry_run:
+        save_state(state)
+
+    total = time.perf_counter() - pipeline_start
+    counts = {s: list(status.values()).count(s) for s in sorted(set(status.values()))}
+    print(f"\nPipeline finished in {total:.2f}s: " + ', '.join(f'{n} {s}' for s, n in counts.items()))
+
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NutriGuide AI incremental training pipeline')
+    parser.add_argument('stages', nargs='*', help=f'Stages to build (default: all). Available: {", ".join(STAGES)}')
+    parser.add_argument('--force', nargs='*', default=[], help='Rebuild these stages even if up to date')
+    parser.add_argument('--dry-run', action='store_true', help='Only report which stages are out of date')
+    parser.add_argument('--jobs', type=int, default=MAX_PARALLEL_STAGES, help='Maximum stages run in parallel')
+    args = parser.parse_args()
+
+    unknown = [s for s in args.stages + args.force if s not in STAGES]
+    if unknown:
+        parser.error(f'Unknown stage(s): {", ".join(unknown)}')
+
+    print("=" * 60)
+    print("NUTRIGUIDE AI - INCREMENTAL TRAINING PIPELINE")
+    print("=" * 60)
+
+    status = run_pipeline(args.stages or None, set(args.force), args.dry_run, args.jobs)
+    sys.exit(1 if any(s in ('failed', 'blocked') for s in status.values()) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,9 @@ Data Preprocessing Script for NutriGuide AI
 Handles cleaning, transformation, and preparation of nutrition datasets
 
 This script should be used to preprocess Kaggle nutrition datasets before training.
+Datasets larger than memory can be processed with --stream, which reads the
+CSV in chunks over several passes and keeps the deduplicated rows in a
+temporary spill file between them.
 Example datasets you can use:
 1. USDA Food Composition Database
 2. MyFitnessPal Food Database
@@ -13,7 +16,10 @@ Example datasets you can use:
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import LabelEncoder, StandardScaler
+import argparse
 import os
+import pickle
+import tempfile
 
 # ======================
 # Configuration
@@ -21,6 +27,14 @@ import os
 INPUT_FILE = 'data/raw_nutrition_data.csv'  # Update with your Kaggle dataset path
 OUTPUT_FILE = 'data/processed_nutrition_data.csv'
 
+# Streaming (out-of-core) mode for datasets that do not fit in memory
+STREAM_CHUNK_SIZE = 100_000   # Rows read per chunk
+SKETCH_CAPACITY = 4096        # Items per quantile sketch level (rank error ~ 1/capacity)
+MODE_CAPACITY = 1000          # Category counts kept per column for mode estimation
+VOCABULARY_CAPACITY = 1000    # Encoded categories per column; rarer values share an "other" code
+FINGERPRINT_RUN_LIMIT = 1 << 22  # Duplicate-check fingerprints per run before it is spilled to disk (32 MB)
+OUTLIER_COLUMNS = ['calories', 'protein', 'carbohydrates', 'fats']
+
 # ======================
 # Data Loading
 # ======================
@@ -48,6 +62,13 @@ def load_dataset(filepath):
 # Data Cleaning
 # ======================
 
+def compute_outlier_bounds(q_low, q_high):
+    """
+    Outlier bounds from the 1%/99% quantiles, widened by 1.5x their spread
+    """
+    spread = q_high - q_low
+    return q_low - 1.5 * spread, q_high + 1.5 * spread
+
 def clean_dataset(df):
     """
     Clean the dataset by handling missing values and outliers
@@ -81,15 +102,10 @@ def clean_dataset(df):
     df = df.drop_duplicates()
     
     # Remove outliers using IQR method for key nutritional columns
-    nutrition_cols = ['calories', 'protein', 'carbohydrates', 'fats']
-    existing_nutrition_cols = [col for col in nutrition_cols if col in df.columns]
+    existing_nutrition_cols = [col for col in OUTLIER_COLUMNS if col in df.columns]
     
     for col in existing_nutrition_cols:
-        Q1 = df[col].quantile(0.01)
-        Q3 = df[col].quantile(0.99)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
+        lower_bound, upper_bound = compute_outlier_bounds(df[col].quantile(0.01), df[col].quantile(0.99))
         df = df[(df[col] >= lower_bound) & (df[col] <= upper_bound)]
     
     final_rows = len(df)
@@ -102,11 +118,12 @@ def clean_dataset(df):
 # Feature Engineering
 # ======================
 
-def engineer_nutrition_features(df):
+def engineer_nutrition_features(df, verbose=True):
     """
     Create additional features from nutrition data
     """
-    print("\n🔧 Engineering features...")
+    if verbose:
+        print("\n🔧 Engineering features...")
     
     # Calculate calories from macronutrients if not present
     if 'calories' not in df.columns and all(col in df.columns for col in ['protein', 'carbohydrates', 'fats']):
@@ -129,7 +146,8 @@ def engineer_nutrition_features(df):
     if all(col in df.columns for col in ['protein', 'fiber']):
         df['quality_score'] = df['protein'] + df.get('fiber', 0) * 2
     
-    print(f"✅ Feature engineering complete")
+    if verbose:
+        print(f"✅ Feature engineering complete")
     
     return df
 
@@ -192,6 +210,387 @@ def save_processed_data(df, filepath):
     print(f"\nProcessed dataset info:")
     print(df.info())
 
+# ======================
+# Streaming (Out-of-Core) Mode
+# ======================
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch (simplified KLL compactor)
+
+    Values enter level 0; when a level holds more than `capacity` items it is
+    sorted and every other item (random offset) is promoted to the next level
+    with double weight. Memory is O(capacity * log(n / capacity)) and rank
+    error is on the order of 1 / capacity, independent of the input order.
+    Sketches built on separate chunks can be merged level by level.
+    """
+
+    def __init__(self, capacity=SKETCH_CAPACITY, seed=0):
+        self.capacity = capacity
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.rng = np.random.RandomState(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity:
+                items = np.sort(items)
+                # An odd item stays behind so total weight is preserved exactly
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items) - len(keep)]
+                promoted = pairs[self.rng.randint(2)::2]
+
+                self.levels[level] = keep
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantile(self, q):
+        """Approximate quantile(s) for q in [0, 1]"""
+        if self.count == 0:
+            return np.nan
+        if len(self.levels) == 1:
+            # Nothing compacted yet: exact, interpolated like pandas quantile()
+            return np.quantile(self.levels[0], q)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(lv), 2.0 ** i) for i, lv in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items, cumulative = items[order], np.cumsum(weights[order])
+        ranks = np.asarray(q, dtype=float) * cumulative[-1]
+        positions = np.clip(np.searchsorted(cumulative, ranks, side='left'), 0, len(items) - 1)
+        return items[positions]
+
+
+class CategoryCounter:
+    """
+    Bounded frequency counter for streaming mode estimation
+
+    Keeps the `capacity` most frequent values after each update, so the mode
+    is exact whenever a column has fewer than `capacity` distinct values and
+    a heavy-hitter approximation otherwise.
+    """
+
+    def __init__(self, capacity=MODE_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='int64')
+
+    def update(self, values):
+        self.counts = self.counts.add(values.value_counts(), fill_value=0)
+        if len(self.counts) > self.capacity:
+            self.counts = self.counts.nlargest(self.capacity)
+
+    def mode(self):
+        if self.counts.empty:
+            return 'Unknown'
+        # Ties break on the smallest value, like pandas Series.mode()[0]
+        top = self.counts[self.counts == self.counts.max()]
+        return sorted(top.index)[0]
+
+
+class FingerprintSet:
+    """
+    Set of 64-bit row fingerprints stored as sorted runs (log-structured merge)
+
+    Runs of similar size are merged so there are O(log n) runs and both
+    membership checks and inserts stay O(m log n) per chunk of m rows. Runs
+    that reach FINGERPRINT_RUN_LIMIT are written to `spill_dir` and memory
+    mapped instead of held in memory, and are not merged further; exact
+    duplicate detection needs every fingerprint, but only on disk.
+    """
+
+    def __init__(self, spill_dir=None, run_limit=FINGERPRINT_RUN_LIMIT):
+        self.runs = []
+        self.spilled = []
+        self.run_limit = run_limit
+        self.spill_dir = spill_dir
+        self.spill_paths = []
+
+    def contains(self, fingerprints):
+        found = np.zeros(len(fingerprints), dtype=bool)
+        for run in self.spilled + self.runs:
+            positions = np.clip(np.searchsorted(run, fingerprints), 0, len(run) - 1)
+            found |= run[positions] == fingerprints
+        return found
+
+    def add(self, fingerprints):
+        run = np.unique(fingerprints)
+        while self.runs and len(self.runs[-1]) <= 2 * len(run):
+            run = np.union1d(self.runs.pop(), run)
+        if len(run) >= self.run_limit and self.spill_dir is not None:
+            self.spilled.append(self._spill(run))
+        else:
+            self.runs.append(run)
+
+    def _spill(self, run):
+        handle, path = tempfile.mkstemp(suffix='.npy', prefix='fingerprints_', dir=self.spill_dir)
+        os.close(handle)
+        np.save(path, run)
+        self.spill_paths.append(path)
+        return np.load(path, mmap_mode='r')
+
+    def close(self):
+        """Remove spilled runs from disk"""
+        self.spilled = []
+        for path in self.spill_paths:
+            if os.path.exists(path):
+                os.remove(path)
+        self.spill_paths = []
+
+
+def iter_chunks(filepath, chunksize=STREAM_CHUNK_SIZE, usecols=None):
+    """Yield DataFrame chunks of the input CSV"""
+    return pd.read_csv(filepath, chunksize=chunksize, usecols=usecols)
+
+
+def iter_spilled_chunks(spill_path, columns=None):
+    """Yield the DataFrame chunks pickled one after another into `spill_path`"""
+    with open(spill_path, 'rb') as f:
+        while True:
+            try:
+                chunk = pickle.load(f)
+            except EOFError:
+                return
+            yield chunk if columns is None else chunk[columns]
+
+
+def within_bounds(chunk, bounds):
+    """Mask of the rows inside every (lower, upper) outlier bound"""
+    mask = np.ones(len(chunk), dtype=bool)
+    for col, (lower_bound, upper_bound) in bounds.items():
+        mask &= ((chunk[col] >= lower_bound) & (chunk[col] <= upper_bound)).values
+    return mask
+
+
+def scan_dataset_statistics(filepath, chunksize=STREAM_CHUNK_SIZE):
+    """
+    Pass 1: fill values and missing-value counts without holding the data
+
+    Collects quantile sketches (for medians) of numerical columns and
+    bounded mode counters of categorical columns. Rows are subject to the
+    same "too many missing values" filter as in-memory cleaning before they
+    are counted, so the fill values match clean_dataset().
+    """
+    print(f"\n📏 Pass 1: scanning {filepath} in chunks of {chunksize:,} rows...")
+
+    sketches, counters = {}, {}
+    numeric_columns, columns = None, None
+    missing_values = None
+    total_rows, kept_rows = 0, 0
+
+    for chunk in iter_chunks(filepath, chunksize):
+        if columns is None:
+            columns = list(chunk.columns)
+            missing_values = pd.Series(0, index=columns)
+            numeric_columns = set(chunk.select_dtypes(include=[np.number]).columns)
+        # A column is numerical only if every chunk parsed it as numerical
+        numeric_columns &= set(chunk.select_dtypes(include=[np.number]).columns)
+
+        total_rows += len(chunk)
+        missing_values += chunk.isnull().sum()
+        chunk = chunk.dropna(thresh=len(chunk.columns) * 0.5)
+        kept_rows += len(chunk)
+
+        for col in columns:
+            if col in numeric_columns and pd.api.types.is_numeric_dtype(chunk[col]):
+                sketches.setdefault(col, QuantileSketch()).update(chunk[col].values)
+            else:
+                counters.setdefault(col, CategoryCounter()).update(chunk[col].dropna().astype(str))
+
+    if columns is None:
+        return None
+
+    numerical_cols = [col for col in columns if col in numeric_columns]
+    categorical_cols = [col for col in columns if col not in numeric_columns]
+
+    stats = {
+        'columns': columns,
+        'numerical_cols': numerical_cols,
+        'categorical_cols': categorical_cols,
+        'total_rows': total_rows,
+        'kept_rows': kept_rows,
+        'missing_values': missing_values,
+        'medians': {col: float(sketches[col].quantile(0.5)) for col in numerical_cols if col in sketches},
+        'modes': {col: counters[col].mode() for col in categorical_cols if col in counters}
+    }
+
+    print(f"✅ Scanned {total_rows:,} rows ({total_rows - kept_rows:,} with too many missing values)")
+    if missing_values.sum() > 0:
+        print("\nMissing values per column:")
+        print(missing_values[missing_values > 0])
+
+    return stats
+
+
+def fill_and_deduplicate(filepath, spill_path, stats, chunksize=STREAM_CHUNK_SIZE):
+    """
+    Pass 2: drop sparse rows, fill missing values and remove duplicates, as clean_dataset() does
+
+    Surviving chunks are pickled to `spill_path` so later passes see exactly
+    the rows (and dtypes) the outlier filter of clean_dataset() sees.
+    Duplicates are found across chunks by 64-bit row fingerprints.
+    """
+    print("\n🧹 Pass 2: filling missing values and removing duplicates...")
+
+    seen_fingerprints = FingerprintSet(os.path.dirname(spill_path) or '.')
+    unique_rows = 0
+    try:
+        with open(spill_path, 'wb') as spill:
+            for chunk in iter_chunks(filepath, chunksize):
+                chunk = chunk.dropna(thresh=len(chunk.columns) * 0.5)
+
+                numerical_cols = stats['numerical_cols']
+                chunk[numerical_cols] = chunk[numerical_cols].apply(pd.to_numeric, errors='coerce')
+                chunk = chunk.fillna(stats['medians'])
+                for col in stats['categorical_cols']:
+                    chunk[col] = chunk[col].astype(object).where(chunk[col].notna(), stats['modes'].get(col, 'Unknown')).astype(str)
+
+                # Remove duplicates within the chunk and against earlier chunks. Numbers are
+                # hashed as float64: a column parsed as int in one chunk and float (after
+                # filling) in another must give identical rows the same fingerprint.
+                hashed = chunk.astype({col: np.float64 for col in numerical_cols})
+                fingerprints = pd.util.hash_pandas_object(hashed, index=False).values
+                unique_mask = ~pd.Series(fingerprints).duplicated().values
+                unique_mask &= ~seen_fingerprints.contains(fingerprints)
+                seen_fingerprints.add(fingerprints[unique_mask])
+
+                chunk = chunk[unique_mask]
+                pickle.dump(chunk, spill, protocol=pickle.HIGHEST_PROTOCOL)
+                unique_rows += len(chunk)
+    finally:
+        seen_fingerprints.close()
+
+    print(f"✅ {unique_rows:,} unique rows")
+    return unique_rows
+
+
+def scan_outlier_bounds(spill_path, stats):
+    """
+    Passes 3+: outlier bounds, one pass per outlier column
+
+    clean_dataset() filters the outlier columns one after another, each
+    bound computed on the rows the previous filters kept. Each pass here
+    sketches one column over the filled, deduplicated rows inside the bounds
+    found so far, so both paths compute the same quantiles. The sketch is
+    exact (with the same linear interpolation as pandas) until a column has
+    more than SKETCH_CAPACITY values, and within ~1 / SKETCH_CAPACITY rank
+    error beyond that.
+    """
+    bounds = {}
+    for col in [col for col in OUTLIER_COLUMNS if col in stats['numerical_cols']]:
+        sketch = QuantileSketch()
+        for chunk in iter_spilled_chunks(spill_path, list(bounds) + [col]):
+            sketch.update(chunk[col].values[within_bounds(chunk, bounds)])
+        if sketch.count == 0:
+            bounds[col] = (np.nan, np.nan)
+            continue
+        q_low, q_high = sketch.quantile([0.01, 0.99])
+        bounds[col] = compute_outlier_bounds(q_low, q_high)
+        print(f"   {col}: median {stats['medians'][col]:.2f}, bounds [{bounds[col][0]:.2f}, {bounds[col][1]:.2f}]")
+    return bounds
+
+
+def scan_vocabularies(spill_path, stats):
+    """
+    Category vocabularies of the rows that pass every outlier bound
+
+    Each column keeps its VOCABULARY_CAPACITY most frequent values (sorted,
+    so codes match LabelEncoder whenever the column has no more distinct
+    values than that); rarer values share the trailing "other" code.
+    """
+    categorical_cols = stats['categorical_cols']
+    if not categorical_cols:
+        return {}
+    counters = {col: CategoryCounter(VOCABULARY_CAPACITY) for col in categorical_cols}
+    for chunk in iter_spilled_chunks(spill_path, categorical_cols + list(stats['outlier_bounds'])):
+        chunk = chunk[within_bounds(chunk, stats['outlier_bounds'])]
+        for col in categorical_cols:
+            counters[col].update(chunk[col])
+    return {col: sorted(counters[col].counts.index) for col in categorical_cols}
+
+
+def stream_clean_and_write(spill_path, output_path, stats):
+    """
+    Last pass: filter outliers, engineer features and encode each deduplicated chunk, then append it to the output
+    """
+    print(f"\n💾 Writing chunks to {output_path}...")
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    written_rows = 0
+    header = True
+
+    for chunk in iter_spilled_chunks(spill_path):
+        chunk = chunk[within_bounds(chunk, stats['outlier_bounds'])]
+        chunk = engineer_nutrition_features(chunk.copy(), verbose=False)
+
+        for col in stats['categorical_cols']:
+            vocabulary = stats['vocabularies'][col]
+            codes = pd.Categorical(chunk[col], categories=vocabulary).codes
+            # Values outside the capped vocabulary share the "other" code
+            chunk[col + '_encoded'] = np.where(codes < 0, len(vocabulary), codes)
+
+        chunk.to_csv(output_path, mode='a', header=header, index=False)
+        header = False
+        written_rows += len(chunk)
+
+    print(f"✅ Removed {stats['total_rows'] - written_rows:,} rows during cleaning")
+    print(f"   Final dataset size: {written_rows:,} rows")
+
+    return written_rows
+
+
+def preprocess_streaming(input_path, output_path, chunksize=STREAM_CHUNK_SIZE):
+    """
+    Multi-pass out-of-core preprocessing pipeline
+
+    Applies clean_dataset()'s steps in the same order: sparse-row filter,
+    fill, deduplication, then outlier filters computed on the filled,
+    deduplicated rows. Memory use depends on the chunk size, sketch capacity
+    and vocabulary cap, not on the input size; the deduplicated rows are
+    kept in a temporary spill file next to the output between passes.
+    """
+    if not os.path.exists(input_path):
+        print(f"❌ File not found: {input_path}")
+        return None
+
+    stats = scan_dataset_statistics(input_path, chunksize)
+    if stats is None:
+        print("❌ Input file is empty")
+        return None
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    spill_path = output_path + '.spill'
+    try:
+        fill_and_deduplicate(input_path, spill_path, stats, chunksize)
+        print("\n📏 Computing outlier bounds on the deduplicated rows...")
+        stats['outlier_bounds'] = scan_outlier_bounds(spill_path, stats)
+        stats['vocabularies'] = scan_vocabularies(spill_path, stats)
+        return stream_clean_and_write(spill_path, output_path, stats)
+    finally:
+        if os.path.exists(spill_path):
+            os.remove(spill_path)
+
 # ======================
 # Main Pipeline
 # ======================
@@ -200,12 +599,34 @@ def main():
     """
     Main data preprocessing pipeline
     """
+    parser = argparse.ArgumentParser(description='NutriGuide AI data preprocessing')
+    parser.add_argument('--stream', action='store_true',
+                        help='Multi-pass out-of-core mode for datasets larger than memory '
+                             '(keeps deduplicated rows in a temporary spill file)')
+    parser.add_argument('--chunksize', type=int, default=STREAM_CHUNK_SIZE,
+                        help='Rows per chunk in streaming mode')
+    parser.add_argument('--input', default=INPUT_FILE, help='Raw dataset CSV')
+    parser.add_argument('--output', default=OUTPUT_FILE, help='Processed dataset CSV')
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("NutriGuide AI - Data Preprocessing Pipeline")
     print("=" * 60)
     
+    if args.stream:
+        written_rows = preprocess_streaming(args.input, args.output, args.chunksize)
+        if written_rows is None:
+            return
+        
+        print("\n" + "=" * 60)
+        print("✅ Streaming Preprocessing Complete!")
+        print("=" * 60)
+        print(f"\nProcessed data saved to: {args.output}")
+        print("Next step: Run train_model.py to train the ML model")
+        return
+    
     # Load dataset
-    df = load_dataset(INPUT_FILE)
+    df = load_dataset(args.input)
     
     if df is None:
         print("\n⚠️  No dataset found. Using synthetic data generation instead.")
@@ -229,12 +650,12 @@ def main():
     df, label_encoders = encode_categorical_variables(df)
     
     # Save processed data
-    save_processed_data(df, OUTPUT_FILE)
+    save_processed_data(df, args.output)
     
     print("\n" + "=" * 60)
     print("✅ Preprocessing Complete!")
     print("=" * 60)
-    print(f"\nProcessed data saved to: {OUTPUT_FILE}")
+    print(f"\nProcessed data saved to: {args.output}")
     print("Next step: Run train_model.py to train the ML model")
 
 if __name__ == '__main__':
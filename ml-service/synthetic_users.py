@@ -0,0 +1,220 @@
+"""
+NutriGuide AI - Synthetic User Profile Generator
+Vectorized, sharded generation of user profiles with target daily calories
+
+Users are produced in fixed-size chunks, each drawn from its own child seed
+(numpy SeedSequence.spawn), so output depends only on (seed, chunk_size) and
+not on how many worker processes generate it. Chunks can be generated in
+parallel and streamed to disk as shards for 10M+ profile training sets.
+Shards are .npz column archives by default (CSV formatting is ~40x slower
+than generation itself); pass --format csv for human-readable shards. Each run
+replaces the shards of earlier runs and lists its own in a manifest.json,
+which is what load_user_shards() reads.
+
+Usage:
+    python synthetic_users.py --users 10000000 --output data/synthetic_users --workers 8
+"""
+
+import argparse
+import json
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from file_utils import save_json_atomic
+
+# ======================
+# Configuration
+# ======================
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_SIZE = 500_000
+DEFAULT_OUTPUT_DIR = 'data/synthetic_users'
+SHARD_FORMATS = ('npz', 'csv')
+MANIFEST_NAME = 'manifest.json'
+
+# Category lookup arrays, indexed by the encoded value used as a model feature
+ACTIVITY_LEVELS = np.array(['sedentary', 'light', 'moderate', 'active', 'very_active'])
+ACTIVITY_PROBABILITIES = np.array([0.15, 0.25, 0.35, 0.20, 0.05])
+ACTIVITY_MULTIPLIERS = np.array([1.2, 1.375, 1.55, 1.725, 1.9])
+
+# Daily calorie adjustment per fitness goal accepted by the API. Training data,
+# online model updates and the /predict formula all use this one table.
+GOAL_CALORIE_ADJUSTMENTS = {
+    'lose_weight': -500,     # Calorie deficit for weight loss
+    'maintain_weight': 0,    # Maintenance calories
+    'gain_weight': 500,      # Calorie surplus for weight gain
+    'build_muscle': 300,     # Moderate surplus for muscle building
+    'improve_health': 0      # Maintenance with focus on nutrition quality
+}
+
+# Goals the model is trained on, in the encoding train_model.py uses
+# (improve_health is encoded as maintain_weight)
+FITNESS_GOALS = np.array(['lose_weight', 'maintain_weight', 'gain_weight', 'build_muscle'])
+GOAL_PROBABILITIES = np.array([0.40, 0.35, 0.10, 0.15])
+GOAL_ADJUSTMENTS = np.array([GOAL_CALORIE_ADJUSTMENTS[goal] for goal in FITNESS_GOALS], dtype=float)
+
+CALORIE_BOUNDS = (1200, 4000)  # Safety bounds on daily calories
+
+# ======================
+# Generation
+# ======================
+
+def generate_user_chunk(n_users, seed):
+    """
+    Generate one chunk of synthetic user profiles
+
+    All categorical effects are applied through lookup arrays indexed by the
+    encoded category, so the whole chunk is computed without Python loops.
+    `seed` may be an int or a numpy SeedSequence.
+    """
+    rng = np.random.default_rng(seed)
+
+    # User demographics
+    ages = rng.integers(18, 70, n_users)
+    gender = (rng.random(n_users) < 0.5).astype(np.int64)  # 1=male, 0=female
+    heights = np.clip(rng.normal(170, 10, n_users), 140, 210)  # cm
+
+    # Realistic weights from a normal BMI distribution
+    bmi_target = np.clip(rng.normal(24, 4, n_users), 16, 40)
+    weights = bmi_target * (heights / 100) ** 2
+
+    # Activity and goals as encoded indices into the lookup arrays
+    activity_level = rng.choice(len(ACTIVITY_LEVELS), n_users, p=ACTIVITY_PROBABILITIES)
+    fitness_goal = rng.choice(len(FITNESS_GOALS), n_users, p=GOAL_PROBABILITIES)
+
+    # Mifflin-St Jeor BMR: +5 for men, -161 for women
+    bmr = 10 * weights + 6.25 * heights - 5 * ages + np.where(gender == 1, 5, -161)
+
+    tdee = bmr * ACTIVITY_MULTIPLIERS[activity_level]
+    daily_calories = np.clip(tdee + GOAL_ADJUSTMENTS[fitness_goal], *CALORIE_BOUNDS)
+
+    return pd.DataFrame({
+        'age': ages,
+        'gender': gender,
+        'height': heights,
+        'weight': weights,
+        'bmi': weights / ((heights / 100) ** 2),
+        'bmr': bmr,
+        'activity_level': activity_level,
+        'fitness_goal': fitness_goal,
+        'daily_calories': daily_calories
+    })
+
+
+def plan_chunks(n_users, chunk_size=DEFAULT_CHUNK_SIZE, seed=DEFAULT_SEED):
+    """Split n_users into (chunk_index, size, child_seed) work items"""
+    n_chunks = max(1, -(-n_users // chunk_size))
+    child_seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    return [
+        (i, min(chunk_size, n_users - i * chunk_size), child_seeds[i])
+        for i in range(n_chunks)
+    ]
+
+
+def generate_user_dataset(n_users, chunk_size=DEFAULT_CHUNK_SIZE, seed=DEFAULT_SEED):
+    """Generate profiles in memory (same rows as the sharded on-disk output)"""
+    return pd.concat(
+        [generate_user_chunk(size, child_seed) for _, size, child_seed in plan_chunks(n_users, chunk_size, seed)],
+        ignore_index=True
+    )
+
+
+def _write_chunk(args):
+    """Worker: generate one chunk and write it as a shard"""
+    index, size, child_seed, output_dir, shard_format = args
+    chunk = generate_user_chunk(size, child_seed)
+    path = os.path.join(output_dir, f'users-{index:05d}.{shard_format}')
+    if shard_format == 'npz':
+        np.savez(path, **{col: chunk[col].values for col in chunk.columns})
+    else:
+        chunk.to_csv(path, index=False)
+    return path, len(chunk), float(chunk['daily_calories'].sum())
+
+
+def generate_users_to_disk(n_users, output_dir=DEFAULT_OUTPUT_DIR, chunk_size=DEFAULT_CHUNK_SIZE,
+                           n_workers=None, seed=DEFAULT_SEED, shard_format='npz'):
+    """
+    Generate profiles in parallel, streaming each chunk to its own shard
+
+    Memory per worker is bounded by chunk_size. Shards and the manifest of
+    a previous run in output_dir are removed first, so a smaller run never
+    leaves stale shards behind. Returns the list of shard paths.
+    """
+    if shard_format not in SHARD_FORMATS:
+        raise ValueError(f"shard_format must be one of {SHARD_FORMATS}")
+    
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    for filename in os.listdir(output_dir):
+        if filename == MANIFEST_NAME or (filename.startswith('users-') and filename.endswith(SHARD_FORMATS)):
+            os.remove(os.path.join(output_dir, filename))
+    work = [
+        (i, size, child_seed, output_dir, shard_format)
+        for i, size, child_seed in plan_chunks(n_users, chunk_size, seed)
+    ]
+    n_workers = n_workers or os.cpu_count() or 1
+
+    print(f"🔄 Generating {n_users:,} users in {len(work)} chunks on {n_workers} workers...")
+    start = time.perf_counter()
+
+    paths, total_rows, calorie_sum = [], 0, 0.0
+    with Pool(min(n_workers, len(work))) as pool:
+        for path, rows, chunk_calories in pool.imap(_write_chunk, work):
+            paths.append(path)
+            total_rows += rows
+            calorie_sum += chunk_calories
+
+    # Written last: the manifest only ever lists a complete set of shards
+    manifest = {
+        'users': total_rows,
+        'chunk_size': chunk_size,
+        'seed': seed,
+        'format': shard_format,
+        'shards': [os.path.basename(path) for path in paths]
+    }
+    save_json_atomic(manifest_path, manifest)
+
+    seconds = time.perf_counter() - start
+    print(f"✅ Wrote {total_rows:,} users to {output_dir} in {seconds:.1f}s "
+          f"({total_rows / max(seconds, 1e-9):,.0f} users/s)")
+    print(f"   Average daily calories: {calorie_sum / max(total_rows, 1):.0f}")
+
+    return paths
+
+
+def load_user_shards(output_dir=DEFAULT_OUTPUT_DIR):
+    """
+    Yield the shards (npz or csv) listed in output_dir's manifest as DataFrames, in chunk order
+
+    Raises FileNotFoundError when the directory has no manifest (no
+    complete run was written there).
+    """
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'r') as f:
+        manifest = json.load(f)
+    for filename in manifest['shards']:
+        path = os.path.join(output_dir, filename)
+        if filename.endswith('.npz'):
+            with np.load(path) as shard:
+                yield pd.DataFrame({col: shard[col] for col in shard.files})
+        elif filename.endswith('.csv'):
+            yield pd.read_csv(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic NutriGuide user profiles')
+    parser.add_argument('--users', type=int, default=1_000_000, help='Number of user profiles')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_DIR, help='Directory for shards')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Users per shard')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Root random seed')
+    parser.add_argument('--format', choices=SHARD_FORMATS, default='npz', help='Shard file format')
+    args = parser.parse_args()
+
+    generate_users_to_disk(args.users, args.output, args.chunk_size, args.workers, args.seed, args.format)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+import os
+import sys
+
+# Service modules live next to this folder, not in an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    """
+    The Flask service module, imported from the service folder
+
+    app.py loads its models from paths relative to the service folder at
+    import time. Sharding is turned off so no worker processes start.
+    """
+    cwd = os.getcwd()
+    os.environ.setdefault('MEAL_SHARDS', '1')
+    os.chdir(SERVICE_DIR)
+    try:
+        import app
+    finally:
+        os.chdir(cwd)
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
@@ -0,0 +1,124 @@
+"""
+Request-level tests for the Flask service
+"""
+
+import pytest
+
+
+@pytest.fixture
+def recommendations(app_module):
+    if not app_module.RECOMMENDATION_LOADED:
+        pytest.skip('meal recommendation system not trained (run train_meal_recommendation.py)')
+
+
+# ======================
+# /recommend/pareto
+# ======================
+
+def test_pareto_returns_at_most_limit(client, recommendations):
+    response = client.post('/recommend/pareto', json={'objectives': ['protein', 'calories'], 'limit': 3})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert 0 < len(body['results']) <= 3
+    assert body['skyline_size'] >= len(body['results'])
+
+
+@pytest.mark.parametrize('limit', [0, -5])
+def test_pareto_rejects_limit_below_one(client, recommendations, limit):
+    response = client.post('/recommend/pareto', json={'objectives': ['protein', 'calories'], 'limit': limit})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+# ======================
+# /nutrition/lookup
+# ======================
+
+@pytest.fixture
+def food_table(app_module):
+    if app_module.food_table is None:
+        pytest.skip('food nutrition table not found')
+
+
+def test_lookup_valid_items(client, food_table):
+    # apple_pie is listed at 80 g (240 kcal) and 100 g (300 kcal)
+    response = client.post('/nutrition/lookup', json={'items': [
+        {'label': 'apple_pie', 'grams': 100},
+        {'label': 'Apple Pie', 'grams': 90}
+    ]})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [item['found'] for item in body['items']] == [True, True]
+    assert body['items'][0]['nutrition']['calories'] == 300.0
+    assert body['items'][1]['nutrition']['calories'] == 270.0
+    assert body['totals']['calories'] == 570.0
+    assert body['unknown_labels'] == []
+
+
+def test_lookup_unknown_food(client, food_table):
+    response = client.post('/nutrition/lookup', json={'items': [
+        {'label': 'apple_pie', 'grams': 100},
+        {'label': 'moon_cheese', 'grams': 50}
+    ]})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['items'][1]['found'] is False
+    assert body['items'][1]['nutrition'] is None
+    assert body['unknown_labels'] == ['moon_cheese']
+    # Unknown foods add nothing to the totals
+    assert body['totals']['calories'] == 300.0
+
+
+@pytest.mark.parametrize('items', [{'label': 'apple_pie', 'grams': 100}, 'apple_pie', [], None])
+def test_lookup_rejects_items_that_are_not_a_list(client, food_table, items):
+    response = client.post('/nutrition/lookup', json={'items': items})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+@pytest.mark.parametrize('grams', ['lots', None, True, [100], -20, 0])
+def test_lookup_rejects_bad_quantity(client, food_table, grams):
+    response = client.post('/nutrition/lookup', json={'items': [
+        {'label': 'apple_pie', 'grams': 100},
+        {'label': 'caesar_salad', 'grams': grams}
+    ]})
+    body = response.get_json()
+    assert response.status_code == 400
+    assert body['index'] == 1
+    assert body['message'].startswith('items[1]:')
+
+
+# ======================
+# Catalog reloads
+# ======================
+
+class FakeShards:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeServices:
+    def __init__(self, users):
+        self.users = users
+        self.shards = FakeShards()
+
+
+def test_requests_release_the_catalog_version_they_hold(app_module, client, recommendations):
+    services = app_module.meal_services
+    users = services.users
+    client.post('/search', json={'query': 'chicken', 'top_n': 2})
+    client.post('/recommend/pareto', json={'objectives': ['protein'], 'limit': 1})  # 400
+    assert services.users == users
+
+
+def test_retired_versions_close_only_when_idle(app_module):
+    busy, idle = FakeServices(users=1), FakeServices(users=0)
+    retired = app_module.close_idle_services([busy, idle])
+    assert retired == [busy]
+    assert idle.shards.closed and not busy.shards.closed
+
+    busy.users -= 1
+    assert app_module.close_idle_services(retired) == []
+    assert busy.shards.closed
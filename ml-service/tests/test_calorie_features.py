@@ -0,0 +1,30 @@
+"""Tests for the calorie model goal and activity encodings"""
+
+import numpy as np
+
+from calorie_features import GOAL_CODES, encode_profiles
+from synthetic_users import FITNESS_GOALS, GOAL_ADJUSTMENTS, GOAL_CALORIE_ADJUSTMENTS
+
+
+def profile(goal):
+    return {'age': 30, 'gender': 'male', 'height': 180, 'weight': 80,
+            'activity_level': 'moderate', 'fitness_goal': goal}
+
+
+def test_goal_codes_match_train_model_encoding():
+    # train_model.py: 0=lose, 1=maintain, 2=gain, 3=build_muscle
+    goals = ['lose_weight', 'maintain_weight', 'gain_weight', 'build_muscle']
+    encoded = encode_profiles([profile(goal) for goal in goals])
+    assert encoded['fitness_goal'].tolist() == [0.0, 1.0, 2.0, 3.0]
+
+
+def test_improve_health_is_encoded_as_maintain():
+    encoded = encode_profiles([profile('improve_health')])
+    assert encoded['fitness_goal'].iloc[0] == GOAL_CODES['maintain_weight']
+
+
+def test_goal_adjustments_follow_the_encoding():
+    for code, goal in enumerate(FITNESS_GOALS):
+        assert GOAL_CODES[goal] == code
+        assert GOAL_ADJUSTMENTS[code] == GOAL_CALORIE_ADJUSTMENTS[goal]
+    np.testing.assert_array_equal(GOAL_ADJUSTMENTS, [-500, 0, 500, 300])
@@ -0,0 +1,127 @@
+"""
+Incremental catalog updates against a rebuild of the same catalog
+
+A full rebuild here refits nothing: it featurizes the final catalog from
+scratch with the same fitted featurizers (as catalog_updates.py promises)
+and searches every neighbour list exhaustively, so the patched system must
+match it exactly.
+"""
+
+import copy
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import StandardScaler, MultiLabelBinarizer
+
+from catalog_updates import apply_changes, read_deltas
+from meal_catalog import feature_neighbors
+from meal_features import (prepare_meals, featurize_meals, meal_records,
+                           NUTRITION_FEATURES, FEATURE_WEIGHTS)
+
+SEED_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'backend', 'seeds', 'meals_seed.json')
+SEED_MEALS = 200  # Small enough to rebuild quickly, large enough for many merged neighbour lists
+NEIGHBOR_K = 20
+
+
+@pytest.fixture(scope='module')
+def seed_meals():
+    with open(SEED_PATH) as f:
+        return json.load(f)[:SEED_MEALS]
+
+
+@pytest.fixture(scope='module')
+def featurizers(seed_meals):
+    """Featurizers fit on the seed catalog, as train_meal_recommendation.py fits them"""
+    meals_df = prepare_meals(pd.DataFrame(seed_meals))
+    return {
+        'tfidf_vectorizer': TfidfVectorizer(max_features=100, stop_words='english', ngram_range=(1, 2)).fit(meals_df['text_features']),
+        'mlb_dietary': MultiLabelBinarizer().fit(meals_df['dietaryTags']),
+        'mlb_allergens': MultiLabelBinarizer().fit(meals_df['allergens']),
+        'scaler_nutrition': StandardScaler().fit(meals_df[NUTRITION_FEATURES].fillna(0)),
+        'embedding_model': None,
+        'feature_weights': FEATURE_WEIGHTS
+    }
+
+
+def build_system(meals, featurizers):
+    """Recommendation system for `meals`, featurized and neighbour-searched from scratch"""
+    meals_df = prepare_meals(pd.DataFrame(meals))
+    system = dict(featurizers)
+    features, tfidf_rows = featurize_meals(system, meals_df)
+    neighbor_indices, neighbor_scores = feature_neighbors(features, NEIGHBOR_K)
+    system.update({
+        'similarity_matrix': None,
+        'neighbor_indices': neighbor_indices,
+        'neighbor_scores': neighbor_scores,
+        'feature_matrix': features,
+        'tfidf_matrix': tfidf_rows,
+        'meals_df': meal_records(meals_df),
+        'catalog_version': 0
+    })
+    return system
+
+
+def write_deltas(path, deltas):
+    with open(path, 'w') as f:
+        for delta in deltas:
+            f.write(json.dumps(delta) + '\n')
+
+
+def test_patched_system_matches_rebuild(seed_meals, featurizers, tmp_path):
+    system = build_system(seed_meals, featurizers)
+
+    # A near-copy of an existing meal lands among many neighbour lists
+    added = copy.deepcopy(seed_meals[3])
+    added['name'] = 'Brand New Oat Bowl'
+    added['nutrition']['calories'] += 5
+    distinct = copy.deepcopy(seed_meals[10])
+    distinct.update(name='Lentil Power Salad', category='lunch', dietaryTags=['vegan', 'high_protein'])
+    distinct['nutrition'].update(calories=420, protein=35, carbohydrates=40, fats=8)
+    # An edit moves a meal far from where it was
+    updated = copy.deepcopy(seed_meals[20])
+    updated['nutrition'].update(calories=1500, protein=90, fats=70)
+    hidden = dict(seed_meals[40], isActive=False)
+
+    feed_path = tmp_path / 'deltas.jsonl'
+    write_deltas(feed_path, [
+        {'op': 'upsert', 'meal': added},
+        {'op': 'upsert', 'meal': distinct},
+        {'op': 'upsert', 'meal': updated},
+        {'op': 'deactivate', 'name': seed_meals[5]['name']},
+        {'op': 'deactivate', 'name': seed_meals[0]['name']},
+        {'op': 'upsert', 'meal': hidden},
+    ])
+    changes, _ = read_deltas(str(feed_path))
+    summary = apply_changes(system, changes)
+
+    assert summary['meals_added'] == 2
+    assert summary['meals_updated'] == 1
+    assert summary['meals_deactivated'] == 3
+    assert summary['neighbor_rows_merged'] > 0
+
+    # The same catalog, in the order the update leaves it: kept meals, then upserts
+    removed = {seed_meals[i]['name'] for i in (0, 5, 20, 40)}
+    final_meals = [meal for meal in seed_meals if meal['name'] not in removed] + [added, distinct, updated]
+    rebuilt = build_system(final_meals, featurizers)
+
+    assert [meal['name'] for meal in system['meals_df']] == [meal['name'] for meal in final_meals]
+    assert system['meals_df'] == rebuilt['meals_df']
+    np.testing.assert_allclose(system['feature_matrix'], rebuilt['feature_matrix'], atol=1e-6)
+    np.testing.assert_allclose(system['tfidf_matrix'].toarray(), rebuilt['tfidf_matrix'].toarray(), atol=1e-9)
+    assert system['similarity_matrix'] is None
+
+    # Same neighbour scores; ties may list equally similar meals in another order
+    indices, scores = system['neighbor_indices'], system['neighbor_scores']
+    assert indices.shape == rebuilt['neighbor_indices'].shape
+    np.testing.assert_allclose(scores, rebuilt['neighbor_scores'], atol=1e-5)
+    features = system['feature_matrix']
+    rows = np.arange(len(features))[:, None]
+    np.testing.assert_allclose(np.einsum('ij,ikj->ik', features, features[indices]), scores, atol=1e-5)
+    assert not (indices == rows).any()
+    assert all(len(set(row)) == NEIGHBOR_K for row in indices)
+    untied = np.abs(np.diff(rebuilt['neighbor_scores'], axis=1)).min(axis=1) > 1e-5
+    np.testing.assert_array_equal(indices[untied], rebuilt['neighbor_indices'][untied])
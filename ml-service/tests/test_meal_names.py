@@ -0,0 +1,56 @@
+"""
+Exact, normalized, fuzzy and rejected meal name lookups
+"""
+
+import pytest
+
+from meal_names import MealNameIndex, MIN_CONFIDENCE
+
+NAMES = [
+    'Grilled Chicken Salad',
+    'Overnight Oats with Berries',
+    'Beef Stir-Fry',
+    'Salmon Teriyaki Bowl',
+    'grilled chicken salad!',   # Normalizes like the first name
+    'Chicken Tikka Masala'
+]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return MealNameIndex(NAMES)
+
+
+def test_exact_name(index):
+    assert index.lookup('Salmon Teriyaki Bowl') == (3, 'normalized', 1.0)
+
+
+def test_normalized_name_resolves_to_first_match(index):
+    assert index.lookup('  GRILLED-chicken   salad ') == (0, 'normalized', 1.0)
+    assert index.lookup('beef stir fry') == (2, 'normalized', 1.0)
+
+
+def test_typo_is_matched_fuzzily(index):
+    idx, match, confidence = index.lookup('Overnite Oats with Bereis')
+    assert (idx, match) == (1, 'fuzzy')
+    assert MIN_CONFIDENCE <= confidence < 1.0
+
+    idx, match, _ = index.lookup('chicken tika masla')
+    assert (idx, match) == (5, 'fuzzy')
+
+
+def test_dissimilar_name_is_rejected(index):
+    idx, match, confidence = index.lookup('Chicken Noodle Soup')
+    assert (idx, match) == (None, None)
+    assert 0.0 < confidence < MIN_CONFIDENCE
+
+
+def test_query_without_known_trigrams_is_rejected(index):
+    assert index.lookup('xyzzy qwv') == (None, None, 0.0)
+    assert index.lookup('') == (None, None, 0.0)
+
+
+def test_min_confidence_threshold(index):
+    idx, _, confidence = index.lookup('Overnite Oats with Bereis')
+    assert index.lookup('Overnite Oats with Bereis', min_confidence=confidence + 0.01)[0] is None
+    assert idx == 1
@@ -0,0 +1,45 @@
+"""
+Skyline against brute-force dominance
+"""
+
+import numpy as np
+import pytest
+
+from meal_pareto import skyline, parse_objectives
+
+
+def brute_force_skyline(points):
+    """Rows no other row dominates (no worse everywhere, better somewhere)"""
+    no_worse = (points[:, None, :] <= points[None, :, :]).all(axis=2)
+    better = (points[:, None, :] < points[None, :, :]).any(axis=2)
+    dominated = (no_worse & better).any(axis=0)
+    return np.flatnonzero(~dominated)
+
+
+@pytest.mark.parametrize('dims', [2, 3, 4])
+@pytest.mark.parametrize('block_size', [1, 8, 64])
+def test_skyline_matches_brute_force(dims, block_size):
+    rng = np.random.default_rng(dims * 100 + block_size)
+    for _ in range(20):
+        n = int(rng.integers(1, 400))
+        # Small integer grid: many ties and duplicate rows
+        points = rng.integers(0, 12, (n, dims)).astype(float)
+        if rng.random() < 0.5:
+            # Anti-correlated objectives give large fronts
+            points[:, 1] = 20 - points[:, 0] + rng.integers(0, 3, n)
+        np.testing.assert_array_equal(np.sort(skyline(points, block_size)), brute_force_skyline(points))
+
+
+def test_skyline_edge_cases():
+    assert skyline(np.empty((0, 2))).size == 0
+    # Identical rows do not dominate each other
+    np.testing.assert_array_equal(np.sort(skyline([[1, 2], [1, 2], [2, 3]])), [0, 1])
+    # A constant column leaves the others to decide
+    np.testing.assert_array_equal(skyline([[5, 1], [5, 2], [5, 0]]), [2])
+
+
+def test_parse_objectives_rejects_bad_specs():
+    assert parse_objectives(['protein', {'name': 'cook_time', 'goal': 'min'}]) == [('protein', 'max'), ('cook_time', 'min')]
+    for spec in (['protein'], ['protein', 'protein'], ['protein', 'sugar'], ['protein', {'name': 'fiber', 'goal': 'up'}]):
+        with pytest.raises(ValueError):
+            parse_objectives(spec)
@@ -0,0 +1,115 @@
+"""
+NutrientRangeIndex against a brute-force mask and sort
+"""
+
+import numpy as np
+import pytest
+
+from meal_query import NutrientRangeIndex, QUERY_COLUMNS, SCAN_SHARE, parse_constraints
+
+N_MEALS = 4000
+CATEGORIES = np.array(['breakfast', 'lunch', 'dinner', 'snack'])
+
+
+class FakeCatalog:
+    """Just the columns and filter NutrientRangeIndex reads from a MealCatalog"""
+
+    def __init__(self, rng):
+        for column in QUERY_COLUMNS.values():
+            # Integers give ties; a few unknown values are NaN
+            values = rng.integers(0, 800, N_MEALS).astype(float)
+            values[rng.random(N_MEALS) < 0.05] = np.nan
+            setattr(self, column, values)
+        self.category = CATEGORIES[rng.integers(0, len(CATEGORIES), N_MEALS)]
+
+    def __len__(self):
+        return N_MEALS
+
+    def allowed_mask(self, categories=None, rows=None):
+        category = self.category if rows is None else self.category[rows]
+        return np.isin(category, categories) if categories else np.ones(len(category), dtype=bool)
+
+
+def brute_force(catalog, constraints, filters):
+    mask = np.ones(N_MEALS, dtype=bool)
+    for column, (low, high) in constraints.items():
+        values = getattr(catalog, QUERY_COLUMNS[column])
+        mask &= (values >= low) & (values <= high)
+    if filters:
+        mask &= catalog.allowed_mask(**filters)
+    return np.flatnonzero(mask)
+
+
+def random_where(rng):
+    """1-3 constraints, each either a narrow range (span path) or a wide one (scan path)"""
+    where = {}
+    for column in rng.choice(list(QUERY_COLUMNS), rng.integers(1, 4), replace=False):
+        width = rng.choice([5, 20, 400, 900])
+        low = rng.integers(-50, 800)
+        bounds = rng.choice(['both', 'min', 'max'])
+        where[column] = {'min': None if bounds == 'max' else int(low),
+                         'max': None if bounds == 'min' else int(low + width)}
+    return where
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    return FakeCatalog(np.random.default_rng(11))
+
+
+@pytest.fixture(scope='module')
+def index(catalog):
+    return NutrientRangeIndex(catalog)
+
+
+def test_matches_brute_force(catalog, index):
+    rng = np.random.default_rng(5)
+    plans = set()
+    for _ in range(300):
+        constraints = parse_constraints(random_where(rng))
+        filters = {'categories': ['lunch', 'dinner']} if rng.random() < 0.3 else None
+        expected = brute_force(catalog, constraints, filters)
+
+        rows, total, plan = index.query(constraints, filters, limit=N_MEALS)
+        plans.add(plan['driver'] is not None)
+        assert total == len(expected)
+        np.testing.assert_array_equal(np.sort(rows), expected)
+
+        # Ordered pages: same values in the same order as a full sort (NaN last)
+        order_by = rng.choice(list(QUERY_COLUMNS))
+        descending = bool(rng.random() < 0.5)
+        limit, offset = int(rng.integers(1, 30)), int(rng.integers(0, 20))
+        values = getattr(catalog, QUERY_COLUMNS[order_by])
+        key = np.where(np.isnan(values[expected]), np.inf, -values[expected] if descending else values[expected])
+        expected_page = values[expected[np.argsort(key, kind='stable')]][offset:offset + limit]
+
+        rows, total, _ = index.query(constraints, filters, order_by, descending, limit, offset)
+        assert total == len(expected)
+        assert len(np.unique(rows)) == len(rows)
+        assert np.isin(rows, expected).all()
+        np.testing.assert_array_equal(values[rows], expected_page)
+
+    # Both sides of the SCAN_SHARE cutoff were exercised
+    assert plans == {True, False}
+
+
+def test_scan_share_cutoff(catalog, index):
+    start, stop = index.span('calories', 100, 100)
+    assert stop - start <= SCAN_SHARE * N_MEALS
+    _, _, plan = index.query({'calories': (100, 100)})
+    assert plan == {'driver': 'calories', 'rows_scanned': stop - start}
+
+    _, _, plan = index.query({'calories': (0, 700)})
+    assert plan == {'driver': None, 'rows_scanned': N_MEALS}
+
+
+def test_nan_never_matches(catalog, index):
+    values = catalog.calories
+    rows, total, _ = index.query({'calories': (-np.inf, np.inf)}, limit=N_MEALS)
+    assert total == np.count_nonzero(~np.isnan(values))
+    assert not np.isnan(values[rows]).any()
+
+    # Driver span ordered by its own column, in both directions
+    rows, _, plan = index.query({'calories': (200, 205)}, order_by='calories', descending=True, limit=N_MEALS)
+    assert plan['driver'] == 'calories'
+    assert (np.diff(values[rows]) <= 0).all()
@@ -0,0 +1,57 @@
+"""
+Streaming (--stream) preprocessing must match the in-memory pipeline
+"""
+
+import numpy as np
+import pandas as pd
+
+from preprocess_data import (clean_dataset, encode_categorical_variables,
+                             engineer_nutrition_features, preprocess_streaming)
+
+CHUNK_SIZE = 4
+
+
+def raw_rows():
+    rng = np.random.default_rng(7)
+    rows = []
+    for i in range(24):
+        rows.append({
+            'name': f'food {i % 9}',
+            'category': ['fruit', 'grain', 'dairy'][i % 3],
+            'calories': int(rng.integers(50, 600)),
+            'protein': int(rng.integers(0, 40)),
+            'carbohydrates': int(rng.integers(0, 80)),
+            'fats': int(rng.integers(0, 30)),
+            'fiber': int(rng.integers(0, 10)),
+            'serving_size': 100
+        })
+    # A missing value in the first chunk turns its protein column into float
+    rows[1]['protein'] = None
+    # Duplicates of first-chunk rows in later (all-int) chunks
+    rows[9] = dict(rows[0])
+    rows[17] = dict(rows[2])
+    rows[22] = dict(rows[9])
+    # Nullable ints keep the CSV values integral ("12", not "12.0")
+    return pd.DataFrame(rows).astype({'protein': 'Int64'})
+
+
+def in_memory(path):
+    df = clean_dataset(pd.read_csv(path))
+    df = engineer_nutrition_features(df)
+    df, _ = encode_categorical_variables(df)
+    return df.reset_index(drop=True)
+
+
+def test_streaming_matches_in_memory(tmp_path):
+    raw_path = tmp_path / 'raw.csv'
+    output_path = tmp_path / 'processed.csv'
+    raw_rows().to_csv(raw_path, index=False)
+
+    written = preprocess_streaming(str(raw_path), str(output_path), chunksize=CHUNK_SIZE)
+
+    expected = in_memory(raw_path)
+    streamed = pd.read_csv(output_path)
+    assert written == len(expected)
+    # Three duplicates split across chunks are removed in both paths
+    assert len(expected) == 21
+    pd.testing.assert_frame_equal(streamed, expected, check_dtype=False)
@@ -10,9 +10,14 @@ import json
 import joblib
 import os
 from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.decomposition import TruncatedSVD
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.preprocessing import StandardScaler, MultiLabelBinarizer
 import ast
+from meal_catalog import top_k_neighbors, feature_neighbors, NEIGHBOR_K
+from meal_text_features import StreamingTfidfVectorizer, HASH_FEATURES, CHUNK_SIZE
+from meal_features import (prepare_meals, combine_features, unit_rows, meal_records,
+                           NUTRITION_FEATURES, FEATURE_WEIGHTS)
 
 print("=" * 60)
 print("NUTRIGUIDE AI - MEAL RECOMMENDATION MODEL TRAINING")
@@ -21,6 +26,14 @@ print("=" * 60)
 # Configuration
 OUTPUT_DIR = 'models'
 MEALS_PATH = '../backend/seeds/meals_seed.json'
+TEXT_FEATURIZER = os.getenv('TEXT_FEATURIZER', 'tfidf')  # 'tfidf' or 'hashing' (streaming, no vocabulary)
+TFIDF_MAX_FEATURES = int(os.getenv('TFIDF_MAX_FEATURES', 100))
+HASHING_FEATURES = int(os.getenv('HASHING_FEATURES', HASH_FEATURES))
+MAX_DENSE_FEATURES = 4096  # Wider combined features are always reduced to embeddings
+EMBEDDING_DIM = int(os.getenv('EMBEDDING_DIM', 0))  # 0 keeps the full combined features when they fit
+DEFAULT_EMBEDDING_DIM = 256                        # Used when EMBEDDING_DIM is 0 but features are too wide
+OVERLAP_K = 10                                     # Neighbours compared when reporting embedding quality
+STATS_SAMPLE = 1000                                # Meals sampled for the overlap report and similarity stats
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
@@ -48,26 +61,7 @@ except Exception as e:
 
 print("\n[2/6] Engineering features for recommendation...")
 
-# Extract nutrition features
-meals_df['calories'] = meals_df['nutrition'].apply(lambda x: x.get('calories', 0))
-meals_df['protein'] = meals_df['nutrition'].apply(lambda x: x.get('protein', 0))
-meals_df['carbohydrates'] = meals_df['nutrition'].apply(lambda x: x.get('carbohydrates', 0))
-meals_df['fats'] = meals_df['nutrition'].apply(lambda x: x.get('fats', 0))
-meals_df['fiber'] = meals_df['nutrition'].apply(lambda x: x.get('fiber', 0))
-
-# Calculate derived features
-meals_df['protein_ratio'] = meals_df['protein'] * 4 / meals_df['calories'].replace(0, 1)
-meals_df['carb_ratio'] = meals_df['carbohydrates'] * 4 / meals_df['calories'].replace(0, 1)
-meals_df['fat_ratio'] = meals_df['fats'] * 9 / meals_df['calories'].replace(0, 1)
-
-# Create text features for TF-IDF
-meals_df['text_features'] = (
-    meals_df['name'].fillna('') + ' ' +
-    meals_df['description'].fillna('') + ' ' +
-    meals_df['category'].fillna('') + ' ' +
-    meals_df['cuisine'].fillna('') + ' ' +
-    meals_df['dietaryTags'].apply(lambda x: ' '.join(x) if isinstance(x, list) else '')
-)
+meals_df = prepare_meals(meals_df)
 
 print(f"✓ Created nutrition and text features")
 
@@ -78,14 +72,19 @@ print(f"✓ Created nutrition and text features")
 print("\n[3/6] Building content-based recommendation system...")
 
 # TF-IDF for text features
-tfidf = TfidfVectorizer(
-    max_features=100,
-    stop_words='english',
-    ngram_range=(1, 2)
-)
-
-tfidf_matrix = tfidf.fit_transform(meals_df['text_features'])
-print(f"✓ TF-IDF matrix shape: {tfidf_matrix.shape}")
+if TEXT_FEATURIZER == 'hashing':
+    # Hashed terms with a chunk-by-chunk document-frequency table; no vocabulary to fit
+    tfidf = StreamingTfidfVectorizer(n_features=HASHING_FEATURES)
+    tfidf_matrix = tfidf.fit_transform(meals_df['text_features'], CHUNK_SIZE)
+    print(f"✓ Hashed TF-IDF matrix shape: {tfidf_matrix.shape} ({tfidf_matrix.nnz} non-zeros)")
+else:
+    tfidf = TfidfVectorizer(
+        max_features=TFIDF_MAX_FEATURES,
+        stop_words='english',
+        ngram_range=(1, 2)
+    )
+    tfidf_matrix = tfidf.fit_transform(meals_df['text_features'])
+    print(f"✓ TF-IDF matrix shape: {tfidf_matrix.shape}")
 
 # Multi-label binarizer for dietary tags
 mlb_dietary = MultiLabelBinarizer()
@@ -98,10 +97,7 @@ allergen_matrix = mlb_allergens.fit_transform(meals_df['allergens'])
 print(f"✓ Allergens encoded: {allergen_matrix.shape}")
 
 # Nutrition features (scaled)
-nutrition_features = meals_df[[
-    'calories', 'protein', 'carbohydrates', 'fats', 'fiber',
-    'protein_ratio', 'carb_ratio', 'fat_ratio'
-]].fillna(0)
+nutrition_features = meals_df[NUTRITION_FEATURES].fillna(0)
 
 scaler_nutrition = StandardScaler()
 nutrition_scaled = scaler_nutrition.fit_transform(nutrition_features)
@@ -113,31 +109,87 @@ print(f"✓ Nutrition features scaled: {nutrition_scaled.shape}")
 
 print("\n[4/6] Combining features...")
 
-# Combine all features with different weights
-# TF-IDF: 40%, Nutrition: 40%, Dietary: 15%, Allergens: 5%
-combined_features = np.hstack([
-    tfidf_matrix.toarray() * 0.4,
-    nutrition_scaled * 0.4,
-    dietary_matrix * 0.15,
-    allergen_matrix * 0.05
-])
+# Combine all features with different weights (FEATURE_WEIGHTS)
+combined_features = combine_features(tfidf_matrix, nutrition_scaled, dietary_matrix, allergen_matrix)
 
 print(f"✓ Combined feature matrix: {combined_features.shape}")
 
+# Features too wide to serve densely (e.g. 2^18 hashed terms) are always reduced
+if EMBEDDING_DIM == 0 and combined_features.shape[1] > MAX_DENSE_FEATURES:
+    EMBEDDING_DIM = DEFAULT_EMBEDDING_DIM
+    print(f"  {combined_features.shape[1]} columns is over {MAX_DENSE_FEATURES}; "
+          f"using {EMBEDDING_DIM}-dimensional embeddings (set EMBEDDING_DIM to change)")
+use_embedding = 0 < EMBEDDING_DIM < combined_features.shape[1]
+
+# Dense serving features, unless embeddings replace them or they are too wide
+# (then similarity lookups use the similarity matrix)
+feature_matrix = None
+if not use_embedding and combined_features.shape[1] <= MAX_DENSE_FEATURES:
+    feature_matrix = unit_rows(combined_features).toarray()
+
+# Fixed sample of meals for quality reports, compared against the whole catalog
+stats_rows = np.sort(np.random.default_rng(42).permutation(len(meals_df))[:STATS_SAMPLE])
+
 # ======================
-# Similarity Matrix
+# Embeddings (optional)
 # ======================
 
-print("\n[5/6] Computing similarity matrix...")
+# Randomized truncated SVD to EMBEDDING_DIM dense dimensions, fit directly on
+# the sparse combined features. Serving cost (similarity rows, neighbour
+# search) then depends on EMBEDDING_DIM, not on the TF-IDF vocabulary size.
+# No centering, unlike PCA, so dot products and cosine similarities of the
+# original features are what gets approximated.
+embedding_model = None
+embedding_stats = None
+if use_embedding:
+    print(f"\n[4b/6] Reducing features to {EMBEDDING_DIM} dimensions...")
+    embedding_model = TruncatedSVD(n_components=EMBEDDING_DIM, algorithm='randomized', random_state=42)
+    feature_matrix = unit_rows(embedding_model.fit_transform(combined_features))
+
+    full_neighbors, _ = feature_neighbors(unit_rows(combined_features), OVERLAP_K, stats_rows)
+    reduced_neighbors, _ = feature_neighbors(feature_matrix, OVERLAP_K, stats_rows)
+    overlap = np.mean([
+        len(set(full_row) & set(reduced_row)) / OVERLAP_K
+        for full_row, reduced_row in zip(full_neighbors, reduced_neighbors)
+    ])
+
+    embedding_stats = {
+        'dimensions': EMBEDDING_DIM,
+        'retained_variance': float(embedding_model.explained_variance_ratio_.sum()),
+        f'neighbor_overlap_at_{OVERLAP_K}': float(overlap),
+        'overlap_sample': len(stats_rows)
+    }
+    print(f"✓ Embeddings: {feature_matrix.shape}, float32")
+    print(f"  Retained variance: {embedding_stats['retained_variance']:.1%}")
+    print(f"  Top-{OVERLAP_K} neighbour overlap with full features: {overlap:.1%}")
 
-# Compute cosine similarity between all meals
-similarity_matrix = cosine_similarity(combined_features)
-print(f"✓ Similarity matrix computed: {similarity_matrix.shape}")
+# ======================
+# Nearest Neighbours
+# ======================
 
-# Statistics
-print(f"  Average similarity: {similarity_matrix.mean():.3f}")
-print(f"  Max similarity: {similarity_matrix.max():.3f}")
-print(f"  Min similarity (non-self): {similarity_matrix[~np.eye(len(similarity_matrix), dtype=bool)].min():.3f}")
+print("\n[5/6] Computing nearest neighbours...")
+
+if feature_matrix is not None:
+    # Serving computes similarities from the feature rows, so no n x n matrix is built or stored
+    similarity_matrix = None
+    neighbor_indices, neighbor_scores = feature_neighbors(feature_matrix, NEIGHBOR_K)
+else:
+    similarity_matrix = cosine_similarity(combined_features)
+    neighbor_indices, neighbor_scores = top_k_neighbors(similarity_matrix, NEIGHBOR_K)
+    print(f"✓ Similarity matrix computed: {similarity_matrix.shape}")
+print(f"✓ Nearest neighbours stored: {neighbor_indices.shape[1]} per meal")
+
+# Statistics over the sampled meals against every other meal
+if similarity_matrix is not None:
+    sample_similarities = np.array(similarity_matrix[stats_rows], dtype=float)
+else:
+    sample_similarities = np.asarray(feature_matrix[stats_rows] @ feature_matrix.T, dtype=float)
+non_self = np.ones(sample_similarities.shape, dtype=bool)
+non_self[np.arange(len(stats_rows)), stats_rows] = False
+
+print(f"  Average similarity: {sample_similarities.mean():.3f}")
+print(f"  Max similarity: {sample_similarities.max():.3f}")
+print(f"  Min similarity (non-self): {sample_similarities[non_self].min():.3f}")
 
 # ======================
 # Save Models and Data
@@ -148,21 +200,18 @@ print("\n[6/6] Saving recommendation system...")
 # Save all components
 recommendation_system = {
     'similarity_matrix': similarity_matrix,
+    'neighbor_indices': neighbor_indices,
+    'neighbor_scores': neighbor_scores,
+    'feature_matrix': feature_matrix,
+    'embedding_model': embedding_model,
     'tfidf_vectorizer': tfidf,
+    'tfidf_matrix': tfidf_matrix,
     'mlb_dietary': mlb_dietary,
     'mlb_allergens': mlb_allergens,
     'scaler_nutrition': scaler_nutrition,
-    'meals_df': meals_df[[
-        'name', 'category', 'cuisine', 'calories', 
-        'protein', 'carbohydrates', 'fats', 'fiber',
-        'dietaryTags', 'allergens', 'cookTime'
-    ]].to_dict('records'),
-    'feature_weights': {
-        'tfidf': 0.4,
-        'nutrition': 0.4,
-        'dietary': 0.15,
-        'allergens': 0.05
-    }
+    'meals_df': meal_records(meals_df),
+    'feature_weights': FEATURE_WEIGHTS,
+    'catalog_version': 0
 }
 
 # Save the system
@@ -192,17 +241,14 @@ def get_recommendations(meal_name, top_n=5):
         return []
     
     meal_idx = meal_index[meal_name]
-    similarities = similarity_matrix[meal_idx]
-    
-    # Get top N similar meals (excluding itself)
-    similar_indices = similarities.argsort()[::-1][1:top_n+1]
     
+    # Top N similar meals from the stored neighbour lists (best first, itself excluded)
     recommendations = []
-    for idx in similar_indices:
+    for idx, similarity in zip(neighbor_indices[meal_idx][:top_n], neighbor_scores[meal_idx][:top_n]):
         meal = recommendation_system['meals_df'][idx]
         recommendations.append({
             'name': meal['name'],
-            'similarity': float(similarities[idx]),
+            'similarity': float(similarity),
             'calories': meal['calories'],
             'category': meal['category']
         })
@@ -237,13 +283,16 @@ stats = {
         'nutrition': nutrition_scaled.shape[1],
         'dietary': dietary_matrix.shape[1],
         'allergens': allergen_matrix.shape[1],
-        'combined': combined_features.shape[1]
+        'combined': combined_features.shape[1],
+        'serving': feature_matrix.shape[1] if feature_matrix is not None else None
     },
+    'embedding': embedding_stats,
     'similarity_stats': {
-        'mean': float(similarity_matrix.mean()),
-        'std': float(similarity_matrix.std()),
-        'min_non_self': float(similarity_matrix[~np.eye(len(similarity_matrix), dtype=bool)].min()),
-        'max_non_self': float(similarity_matrix[~np.eye(len(similarity_matrix), dtype=bool)].max())
+        'sampled_meals': len(stats_rows),
+        'mean': float(sample_similarities.mean()),
+        'std': float(sample_similarities.std()),
+        'min_non_self': float(sample_similarities[non_self].min()),
+        'max_non_self': float(sample_similarities[non_self].max())
     }
 }
 
@@ -257,7 +306,8 @@ print("MEAL RECOMMENDATION SYSTEM COMPLETE!")
 print("=" * 60)
 print(f"\n✓ Recommendation system ready")
 print(f"✓ {len(meals_df)} meals indexed")
-print(f"✓ Feature dimension: {combined_features.shape[1]}")
-print(f"✓ Similarity matrix computed")
+print(f"✓ Feature dimension: {combined_features.shape[1]}"
+      + (f" (serving: {feature_matrix.shape[1]})" if feature_matrix is not None else " (served from the similarity matrix)"))
+print(f"✓ Nearest neighbours computed")
 print(f"\nNext step: Update Flask API to use this system")
 print("=" * 60)
@@ -14,6 +14,8 @@ from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
 import os
 
+from synthetic_users import GOAL_ADJUSTMENTS
+
 # ======================
 # Configuration
 # ======================
@@ -81,16 +83,15 @@ def generate_synthetic_dataset(n_samples=5000):
         10 * weight + 6.25 * height - 5 * age - 161     # Female
     )
     
-    # Activity multipliers
-    activity_multipliers = [1.2, 1.375, 1.55, 1.725, 1.9]
-    multiplier = np.array([activity_multipliers[int(a)] for a in activity_level])
+    # Activity multipliers (lookup array indexed by encoded activity level)
+    activity_multipliers = np.array([1.2, 1.375, 1.55, 1.725, 1.9])
+    multiplier = activity_multipliers[activity_level]
     
     # Calculate TDEE
     tdee = bmr * multiplier
     
-    # Goal adjustments
-    goal_adjustments = [-500, 0, 500, 300]
-    adjustment = np.array([goal_adjustments[int(g)] for g in fitness_goal])
+    # Goal adjustments (shared lookup array indexed by encoded fitness goal)
+    adjustment = GOAL_ADJUSTMENTS[fitness_goal]
     
     # Calculate target calories (with some noise for realism)
     daily_calories = tdee + adjustment + np.random.normal(0, 50, n_samples)
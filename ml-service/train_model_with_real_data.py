@@ -5,15 +5,24 @@ Trains multiple models using Food.com recipes dataset from Kaggle
 
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split, KFold
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.linear_model import LinearRegression, Ridge
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.base import clone
+from collections import deque
+from multiprocessing import Pool
+import io
+import queue
+import time
+import tracemalloc
 import joblib
 import os
-import json
 import ast
+from synthetic_users import generate_user_dataset
+from calorie_features import add_engineered_features
+from file_utils import save_json_atomic
 
 # ======================
 # Configuration
@@ -23,14 +32,29 @@ DATA_DIR = '../datasets'
 MODEL_FILENAME = 'nutrition_model.pkl'
 SCALER_FILENAME = 'scaler.pkl'
 STATS_FILENAME = 'model_stats.json'
+N_SYNTHETIC_USERS = int(os.getenv('N_SYNTHETIC_USERS', 5000))
+
+# Model tournament
+TOURNAMENT_WORKERS = os.cpu_count() or 1
+TOURNAMENT_BUDGET_SECONDS = 600   # Global wall-clock budget for all candidates
+CV_FOLDS = 5
+MIN_FOLDS_BEFORE_PRUNING = 2      # Folds a candidate must finish before it can be cut
+PRUNE_MARGIN = 1.25               # Cut candidates whose fold MAE exceeds the leader's by 25%
+
+# Model selection objective: best test MAE subject to serving constraints.
+# Among feasible models, any within MAE_TOLERANCE calories of the best MAE
+# count as tied and the one with the lowest single-row p99 latency wins.
+SELECTION_MAX_P99_MS = float(os.getenv('SELECTION_MAX_P99_MS', 10.0))        # Single-row predict p99
+SELECTION_MAX_SIZE_MB = float(os.getenv('SELECTION_MAX_SIZE_MB', 50.0))      # Serialized model size
+SELECTION_MAX_MEMORY_MB = float(os.getenv('SELECTION_MAX_MEMORY_MB', 200.0)) # Resident memory after load
+SELECTION_MAE_TOLERANCE = float(os.getenv('SELECTION_MAE_TOLERANCE', 0.0))
+LATENCY_SINGLE_RUNS = 200
+LATENCY_BATCH_RUNS = 20
+LATENCY_BATCH_SIZE = 1000
 
 # Create directories
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-print("=" * 60)
-print("NUTRIGUIDE AI - MACHINE LEARNING MODEL TRAINING")
-print("=" * 60)
-
 # ======================
 # Load Real Dataset
 # ======================
@@ -82,88 +106,18 @@ def load_kaggle_recipes():
         return None
 
 
-def generate_user_dataset_from_recipes(recipes_df, n_users=5000):
+def generate_user_dataset_from_recipes(recipes_df, n_users=N_SYNTHETIC_USERS):
     """
     Generate synthetic user profiles with realistic calorie needs
     based on the recipe dataset statistics
+    
+    Profiles come from the vectorized, chunk-seeded generator in
+    synthetic_users.py; use that script directly to stream 10M+ profiles
+    to disk.
     """
     print("\n[2/7] Generating user training data from recipe patterns...")
     
-    np.random.seed(42)
-    
-    # User demographics
-    ages = np.random.randint(18, 70, n_users)
-    genders = np.random.choice(['male', 'female'], n_users)
-    heights = np.random.normal(170, 10, n_users)  # cm
-    heights = np.clip(heights, 140, 210)
-    
-    # Generate realistic weights based on BMI distribution
-    bmi_target = np.random.normal(24, 4, n_users)  # Normal BMI distribution
-    bmi_target = np.clip(bmi_target, 16, 40)
-    weights = bmi_target * (heights / 100) ** 2
-    
-    # Activity and goals
-    activity_levels = np.random.choice(['sedentary', 'light', 'moderate', 'active', 'very_active'], n_users,
-                                      p=[0.15, 0.25, 0.35, 0.20, 0.05])
-    fitness_goals = np.random.choice(['lose_weight', 'maintain_weight', 'gain_muscle'], n_users,
-                                     p=[0.40, 0.35, 0.25])
-    
-    # Calculate BMR using Mifflin-St Jeor equation
-    bmr = np.where(
-        genders == 'male',
-        (10 * weights) + (6.25 * heights) - (5 * ages) + 5,
-        (10 * weights) + (6.25 * heights) - (5 * ages) - 161
-    )
-    
-    # Activity multipliers
-    activity_multipliers = {
-        'sedentary': 1.2,
-        'light': 1.375,
-        'moderate': 1.55,
-        'active': 1.725,
-        'very_active': 1.9
-    }
-    
-    tdee = np.array([bmr[i] * activity_multipliers[activity_levels[i]] for i in range(n_users)])
-    
-    # Goal adjustments
-    goal_adjustments = {
-        'lose_weight': -500,
-        'maintain_weight': 0,
-        'gain_muscle': 300
-    }
-    
-    daily_calories = np.array([tdee[i] + goal_adjustments[fitness_goals[i]] for i in range(n_users)])
-    daily_calories = np.clip(daily_calories, 1200, 4000)  # Safety bounds
-    
-    # Calculate BMI
-    bmi = weights / ((heights / 100) ** 2)
-    
-    # Encode categorical variables
-    gender_encoded = (genders == 'male').astype(int)
-    
-    activity_encoding = {
-        'sedentary': 0, 'light': 1, 'moderate': 2, 'active': 3, 'very_active': 4
-    }
-    activity_encoded = np.array([activity_encoding[a] for a in activity_levels])
-    
-    goal_encoding = {
-        'lose_weight': 0, 'maintain_weight': 1, 'gain_muscle': 2
-    }
-    goal_encoded = np.array([goal_encoding[g] for g in fitness_goals])
-    
-    # Create DataFrame
-    user_data = pd.DataFrame({
-        'age': ages,
-        'gender': gender_encoded,
-        'height': heights,
-        'weight': weights,
-        'bmi': bmi,
-        'bmr': bmr,
-        'activity_level': activity_encoded,
-        'fitness_goal': goal_encoded,
-        'daily_calories': daily_calories
-    })
+    user_data = generate_user_dataset(n_users)
     
     print(f"✓ Generated {len(user_data):,} user profiles")
     print(f"  - Daily calorie range: {user_data['daily_calories'].min():.0f} - {user_data['daily_calories'].max():.0f}")
@@ -176,17 +130,8 @@ def engineer_features(df):
     """Create additional features from base data"""
     print("\n[3/7] Engineering features...")
     
-    df_features = df.copy()
-    
-    # Interaction features
-    df_features['bmi_age'] = df_features['bmi'] * df_features['age']
-    df_features['weight_height_ratio'] = df_features['weight'] / df_features['height']
-    df_features['bmr_activity'] = df_features['bmr'] * df_features['activity_level']
-    df_features['age_squared'] = df_features['age'] ** 2
-    df_features['bmi_squared'] = df_features['bmi'] ** 2
-    
-    # Activity and goal interaction
-    df_features['activity_goal'] = df_features['activity_level'] * df_features['fitness_goal']
+    # Interaction features (shared with the serving-side feature builder)
+    df_features = add_engineered_features(df.copy())
     
     print(f"✓ Created {len(df_features.columns)} total features")
     
@@ -197,11 +142,9 @@ def engineer_features(df):
 # Model Training
 # ======================
 
-def train_models(X_train, X_test, y_train, y_test):
-    """Train and compare multiple regression models"""
-    print("\n[4/7] Training multiple ML models...")
-    
-    models = {
+def build_candidates():
+    """Candidate models for the tournament (each fits single-threaded inside a pool worker)"""
+    return {
         'Linear Regression': LinearRegression(),
         'Ridge Regression': Ridge(alpha=1.0),
         'Random Forest': RandomForestRegressor(
@@ -209,7 +152,7 @@ def train_models(X_train, X_test, y_train, y_test):
             max_depth=15,
             min_samples_split=5,
             random_state=42,
-            n_jobs=-1
+            n_jobs=1
         ),
         'Gradient Boosting': GradientBoostingRegressor(
             n_estimators=150,
@@ -217,68 +160,286 @@ def train_models(X_train, X_test, y_train, y_test):
             learning_rate=0.1,
             subsample=0.8,
             random_state=42
+        ),
+        'Hist Gradient Boosting': HistGradientBoostingRegressor(
+            max_iter=200,
+            learning_rate=0.1,
+            max_leaf_nodes=31,
+            random_state=42
         )
     }
-    
+
+
+# Training data shared with pool workers once, instead of pickled into every task
+_TOURNAMENT_DATA = {}
+
+
+def _init_tournament_worker(X_train, X_test, y_train, y_test):
+    _TOURNAMENT_DATA.update(X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test)
+
+
+def _run_tournament_task(name, estimator, fold, train_idx, val_idx):
+    """
+    Fit one candidate on one CV fold (fold >= 0) or on the full training set (fold is None)
+
+    Returns (name, fold, result, seconds) where result is the fold MAE or the final metrics
+    """
+    start = time.perf_counter()
+    X_train, y_train = _TOURNAMENT_DATA['X_train'], _TOURNAMENT_DATA['y_train']
+    model = clone(estimator)
+
+    if fold is not None:
+        model.fit(X_train[train_idx], y_train[train_idx])
+        result = mean_absolute_error(y_train[val_idx], model.predict(X_train[val_idx]))
+        return name, fold, result, time.perf_counter() - start
+
+    X_test, y_test = _TOURNAMENT_DATA['X_test'], _TOURNAMENT_DATA['y_test']
+    model.fit(X_train, y_train)
+    y_pred_train = model.predict(X_train)
+    y_pred_test = model.predict(X_test)
+
+    result = {
+        'model': model,
+        'train_mae': mean_absolute_error(y_train, y_pred_train),
+        'test_mae': mean_absolute_error(y_test, y_pred_test),
+        'train_rmse': np.sqrt(mean_squared_error(y_train, y_pred_train)),
+        'test_rmse': np.sqrt(mean_squared_error(y_test, y_pred_test)),
+        'train_r2': r2_score(y_train, y_pred_train),
+        'test_r2': r2_score(y_test, y_pred_test)
+    }
+    return name, fold, result, time.perf_counter() - start
+
+
+def train_models(X_train, X_test, y_train, y_test,
+                 budget_seconds=TOURNAMENT_BUDGET_SECONDS, n_workers=TOURNAMENT_WORKERS):
+    """
+    Train and compare multiple regression models as a parallel, time-budgeted tournament
+
+    Every (candidate, CV fold) fit runs as its own task on a process pool,
+    scheduled fold by fold across candidates. Once a candidate has finished
+    MIN_FOLDS_BEFORE_PRUNING folds, it is cut if its mean fold MAE is more than
+    PRUNE_MARGIN times the leader's, and its remaining folds are never run.
+    Survivors are refit on the full training set. Anything unfinished when
+    the global budget expires is dropped.
+
+    Returns (results of finished candidates, per-candidate tournament report)
+    """
+    print(f"\n[4/7] Training model tournament ({n_workers} workers, {budget_seconds}s budget)...")
+
+    X_train, X_test = np.asarray(X_train), np.asarray(X_test)
+    y_train, y_test = np.asarray(y_train), np.asarray(y_test)
+
+    candidates = build_candidates()
+    folds = list(KFold(n_splits=CV_FOLDS).split(X_train))
+
+    fold_maes = {name: {} for name in candidates}
+    seconds_spent = {name: 0.0 for name in candidates}
+    status = {name: 'running' for name in candidates}
     results = {}
-    
-    for name, model in models.items():
-        print(f"\n  Training {name}...")
-        
-        # Train
-        model.fit(X_train, y_train)
-        
-        # Predict
-        y_pred_train = model.predict(X_train)
-        y_pred_test = model.predict(X_test)
-        
-        # Calculate metrics
-        train_mae = mean_absolute_error(y_train, y_pred_train)
-        test_mae = mean_absolute_error(y_test, y_pred_test)
-        train_rmse = np.sqrt(mean_squared_error(y_train, y_pred_train))
-        test_rmse = np.sqrt(mean_squared_error(y_test, y_pred_test))
-        train_r2 = r2_score(y_train, y_pred_train)
-        test_r2 = r2_score(y_test, y_pred_test)
-        
-        # Cross-validation
-        cv_scores = cross_val_score(model, X_train, y_train, cv=5, 
-                                    scoring='neg_mean_absolute_error')
-        cv_mae = -cv_scores.mean()
-        
-        results[name] = {
-            'model': model,
-            'train_mae': train_mae,
-            'test_mae': test_mae,
-            'train_rmse': train_rmse,
-            'test_rmse': test_rmse,
-            'train_r2': train_r2,
-            'test_r2': test_r2,
-            'cv_mae': cv_mae
+
+    # Fold-major order so every candidate gets early folds before anyone's late folds
+    tasks = deque((name, fold) for fold in range(CV_FOLDS) for name in candidates)
+    finished = queue.Queue()
+    tournament_start = time.perf_counter()
+    deadline = tournament_start + budget_seconds
+    in_flight = 0
+
+    def leader_mae():
+        scored = [np.mean(list(f.values())) for n, f in fold_maes.items()
+                  if len(f) >= MIN_FOLDS_BEFORE_PRUNING and status[n] != 'failed']
+        return min(scored) if scored else None
+
+    with Pool(n_workers, initializer=_init_tournament_worker,
+              initargs=(X_train, X_test, y_train, y_test)) as pool:
+        while True:
+            while in_flight < n_workers and tasks and time.perf_counter() < deadline:
+                name, fold = tasks.popleft()
+                if status[name] != 'running':
+                    continue
+                train_idx, val_idx = folds[fold] if fold is not None else (None, None)
+                pool.apply_async(
+                    _run_tournament_task,
+                    (name, candidates[name], fold, train_idx, val_idx),
+                    callback=finished.put,
+                    error_callback=lambda error, name=name, fold=fold: finished.put((name, fold, error, 0.0))
+                )
+                in_flight += 1
+
+            if in_flight == 0:
+                break
+
+            try:
+                name, fold, result, seconds = finished.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            in_flight -= 1
+            seconds_spent[name] += seconds
+
+            if isinstance(result, Exception):
+                status[name] = 'failed'
+                print(f"  ✗ {name} failed: {result}")
+                continue
+
+            if fold is None:
+                result['cv_mae'] = float(np.mean(list(fold_maes[name].values())))
+                result['train_seconds'] = seconds_spent[name]
+                results[name] = result
+                status[name] = 'finished'
+                print(f"  ✓ {name:22s} | Test MAE: {result['test_mae']:.2f} | "
+                      f"Test R²: {result['test_r2']:.4f} | CV MAE: {result['cv_mae']:.2f}")
+                continue
+
+            fold_maes[name][fold] = result
+            if status[name] == 'running' and len(fold_maes[name]) == CV_FOLDS:
+                # CV complete: refit on the full training set next
+                tasks.appendleft((name, None))
+
+            leader = leader_mae()
+            for other in candidates:
+                completed = fold_maes[other]
+                if status[other] != 'running' or len(completed) < MIN_FOLDS_BEFORE_PRUNING:
+                    continue
+                mean_mae = np.mean(list(completed.values()))
+                if mean_mae > PRUNE_MARGIN * leader:
+                    status[other] = 'pruned'
+                    print(f"  ✂ {other:22s} | cut after {len(completed)} folds "
+                          f"(fold MAE {mean_mae:.2f} vs leader {leader:.2f})")
+
+        # Leaving the context manager terminates workers still running past the deadline
+
+    for name in candidates:
+        if status[name] == 'running':
+            status[name] = 'timed_out'
+            print(f"  ⏱ {name:22s} | not finished within the {budget_seconds}s budget")
+
+    report = {
+        name: {
+            'status': status[name],
+            'folds_completed': len(fold_maes[name]),
+            'cv_mae': float(np.mean(list(fold_maes[name].values()))) if fold_maes[name] else None,
+            'seconds': round(seconds_spent[name], 3)
         }
-        
-        print(f"    Train MAE: {train_mae:.2f} | Test MAE: {test_mae:.2f}")
-        print(f"    Train R²: {train_r2:.4f} | Test R²: {test_r2:.4f}")
-        print(f"    CV MAE (5-fold): {cv_mae:.2f}")
-    
-    return results
+        for name in candidates
+    }
+
+    print(f"\n  Tournament finished in {time.perf_counter() - tournament_start:.1f}s")
+    print("  " + "-" * 62)
+    print(f"  {'Candidate':22s} | {'Status':9s} | {'Folds':5s} | {'Time (s)':>8s}")
+    for name, entry in report.items():
+        print(f"  {name:22s} | {entry['status']:9s} | {entry['folds_completed']:5d} | {entry['seconds']:8.2f}")
 
+    if not results:
+        # Budget too small for anything to finish: fall back to the cheapest candidate
+        print("  ⚠️  No candidate finished within budget, fitting Linear Regression as fallback")
+        _init_tournament_worker(X_train, X_test, y_train, y_test)
+        name, _, result, seconds = _run_tournament_task('Linear Regression', LinearRegression(), None, None, None)
+        result['cv_mae'] = None  # No cross-validation ran
+        result['train_seconds'] = seconds
+        results[name] = result
 
-def select_best_model(results):
-    """Select the best performing model"""
+    return results, report
+
+
+def profile_model(model, X_sample):
+    """
+    Measure the serving cost of a fitted model
+
+    - Single-row and batch predict latency (p50/p99, milliseconds)
+    - Serialized size (joblib, bytes)
+    - Resident memory of the deserialized model (tracemalloc, bytes)
+    """
+    X_sample = np.asarray(X_sample)
+    batch = X_sample[np.arange(LATENCY_BATCH_SIZE) % len(X_sample)]
+
+    # Warm up caches and lazy initialisation before timing
+    model.predict(X_sample[:1])
+
+    single_ms = []
+    for i in range(LATENCY_SINGLE_RUNS):
+        row = X_sample[i % len(X_sample)].reshape(1, -1)
+        start = time.perf_counter()
+        model.predict(row)
+        single_ms.append((time.perf_counter() - start) * 1000)
+
+    batch_ms = []
+    for _ in range(LATENCY_BATCH_RUNS):
+        start = time.perf_counter()
+        model.predict(batch)
+        batch_ms.append((time.perf_counter() - start) * 1000)
+
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    serialized_bytes = buffer.tell()
+
+    buffer.seek(0)
+    tracemalloc.start()
+    loaded = joblib.load(buffer)
+    memory_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del loaded
+
+    return {
+        'single_p50_ms': float(np.percentile(single_ms, 50)),
+        'single_p99_ms': float(np.percentile(single_ms, 99)),
+        'batch_size': LATENCY_BATCH_SIZE,
+        'batch_p50_ms': float(np.percentile(batch_ms, 50)),
+        'batch_p99_ms': float(np.percentile(batch_ms, 99)),
+        'serialized_bytes': int(serialized_bytes),
+        'memory_bytes': int(memory_bytes)
+    }
+
+
+def select_best_model(results, X_sample, max_p99_ms=SELECTION_MAX_P99_MS,
+                      max_size_mb=SELECTION_MAX_SIZE_MB, max_memory_mb=SELECTION_MAX_MEMORY_MB,
+                      mae_tolerance=SELECTION_MAE_TOLERANCE):
+    """
+    Select the best model by test MAE subject to latency, size and memory limits
+
+    Each candidate is profiled with profile_model(); the profile is stored in
+    results[name]['profile']. Among candidates that meet every limit, those
+    within mae_tolerance of the best MAE are treated as tied and the fastest
+    (single-row p99) wins. If no candidate meets the limits, the best MAE
+    overall is used and a warning is printed.
+    """
     print("\n[5/7] Selecting best model...")
     
+    for name, metrics in results.items():
+        profile = profile_model(metrics['model'], X_sample)
+        profile['feasible'] = (
+            profile['single_p99_ms'] <= max_p99_ms and
+            profile['serialized_bytes'] <= max_size_mb * 1024 * 1024 and
+            profile['memory_bytes'] <= max_memory_mb * 1024 * 1024
+        )
+        metrics['profile'] = profile
+    
     # Sort by test MAE (lower is better)
     sorted_models = sorted(results.items(), key=lambda x: x[1]['test_mae'])
     
     print("\n  Model Rankings (by Test MAE):")
-    print("  " + "-" * 50)
+    print("  " + "-" * 96)
     for i, (name, metrics) in enumerate(sorted_models, 1):
-        print(f"  {i}. {name:20s} | MAE: {metrics['test_mae']:6.2f} | R²: {metrics['test_r2']:.4f}")
+        profile = metrics['profile']
+        print(f"  {i}. {name:22s} | MAE: {metrics['test_mae']:6.2f} | R²: {metrics['test_r2']:.4f} | "
+              f"p50/p99: {profile['single_p50_ms']:.2f}/{profile['single_p99_ms']:.2f} ms | "
+              f"size: {profile['serialized_bytes'] / 1024:8.1f} KB | "
+              f"{'✓' if profile['feasible'] else '✗ over limits'}")
+    
+    print(f"\n  Objective: best MAE with p99 ≤ {max_p99_ms} ms, size ≤ {max_size_mb} MB, "
+          f"memory ≤ {max_memory_mb} MB (MAE tolerance {mae_tolerance})")
+    
+    feasible = [(name, metrics) for name, metrics in sorted_models if metrics['profile']['feasible']]
+    if not feasible:
+        print("  ⚠️  No model meets the serving limits, falling back to best MAE")
+        feasible = sorted_models
+    
+    best_mae = feasible[0][1]['test_mae']
+    tied = [(name, metrics) for name, metrics in feasible if metrics['test_mae'] <= best_mae + mae_tolerance]
+    best_name, best_metrics = min(tied, key=lambda x: x[1]['profile']['single_p99_ms'])
     
-    best_name, best_metrics = sorted_models[0]
     print(f"\n✓ Best model: {best_name}")
     print(f"  - Test MAE: {best_metrics['test_mae']:.2f} calories")
     print(f"  - Test R²: {best_metrics['test_r2']:.4f}")
+    print(f"  - Single-row p99: {best_metrics['profile']['single_p99_ms']:.2f} ms")
     
     return best_name, best_metrics['model'], best_metrics
 
@@ -288,6 +449,10 @@ def select_best_model(results):
 # ======================
 
 def main():
+    print("=" * 60)
+    print("NUTRIGUIDE AI - MACHINE LEARNING MODEL TRAINING")
+    print("=" * 60)
+    
     # Load datasets
     recipes_df = load_kaggle_recipes()
     
@@ -297,7 +462,7 @@ def main():
     else:
         print("Creating synthetic user data for demonstration...")
         # Fallback if dataset loading fails
-        user_df = generate_user_dataset_from_recipes(pd.DataFrame(), n_users=5000)
+        user_df = generate_user_dataset_from_recipes(pd.DataFrame())
     
     # Engineer features
     user_df_engineered = engineer_features(user_df)
@@ -323,10 +488,10 @@ def main():
     X_test_scaled = scaler.transform(X_test)
     
     # Train models
-    results = train_models(X_train_scaled, X_test_scaled, y_train, y_test)
+    results, tournament_report = train_models(X_train_scaled, X_test_scaled, y_train, y_test)
     
     # Select best model
-    best_name, best_model, best_metrics = select_best_model(results)
+    best_name, best_model, best_metrics = select_best_model(results, X_test_scaled)
     
     # Save model and scaler
     print("\n[6/7] Saving model and scaler...")
@@ -346,15 +511,29 @@ def main():
         'test_mae': float(best_metrics['test_mae']),
         'test_rmse': float(best_metrics['test_rmse']),
         'test_r2': float(best_metrics['test_r2']),
-        'cv_mae': float(best_metrics['cv_mae']),
+        'cv_mae': best_metrics['cv_mae'],
         'train_samples': len(X_train),
         'test_samples': len(X_test),
-        'total_features': len(feature_columns)
+        'total_features': len(feature_columns),
+        'inference': best_metrics['profile'],
+        'selection': {
+            'objective': {
+                'metric': 'test_mae',
+                'max_single_p99_ms': SELECTION_MAX_P99_MS,
+                'max_size_mb': SELECTION_MAX_SIZE_MB,
+                'max_memory_mb': SELECTION_MAX_MEMORY_MB,
+                'mae_tolerance': SELECTION_MAE_TOLERANCE
+            },
+            'candidates': {
+                name: dict(metrics['profile'], test_mae=float(metrics['test_mae']))
+                for name, metrics in results.items()
+            }
+        },
+        'tournament': tournament_report
     }
     
     stats_path = os.path.join(OUTPUT_DIR, STATS_FILENAME)
-    with open(stats_path, 'w') as f:
-        json.dump(stats, f, indent=2)
+    save_json_atomic(stats_path, stats)
     
     print(f"✓ Statistics saved to: {stats_path}")
     
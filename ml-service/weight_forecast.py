@@ -0,0 +1,59 @@
+"""
+NutriGuide AI - Weight Trajectory Forecasting
+Vectorized daily energy-balance simulation for many users at once
+
+Each day, expenditure is BMR (Mifflin-St Jeor, recomputed from the current
+weight and age) times the activity multiplier. The gap between intake and
+expenditure changes body weight at ENERGY_PER_KG kcal per kg. The loop runs
+over days only; every step updates all users with NumPy array operations.
+"""
+
+import numpy as np
+
+# ======================
+# Configuration
+# ======================
+ENERGY_PER_KG = 7700      # kcal per kg of body weight change
+MIN_WEIGHT_KG = 30        # Simulation floor
+MAX_FORECAST_WEEKS = 156  # Longest horizon accepted by the API (3 years)
+
+
+def simulate_weight_trajectories(age, is_male, height, weight, activity_multiplier, daily_intake,
+                                 days, record_every=7):
+    """
+    Simulate body weight for n users over `days` days
+
+    All profile arguments are arrays of length n (scalars broadcast).
+    Returns (recorded weights of shape (n, len(record_days)), final weights
+    of shape (n,), record_days). Day 0 and the final day are always
+    recorded, plus every `record_every`-th day in between.
+    """
+    age = np.asarray(age, dtype=float)
+    height = np.asarray(height, dtype=float)
+    weight = np.array(weight, dtype=float)
+    activity_multiplier = np.asarray(activity_multiplier, dtype=float)
+    daily_intake = np.asarray(daily_intake, dtype=float)
+
+    # BMR = 10*weight + (6.25*height - 5*age + sex constant); the bracket only drifts with age
+    sex_constant = np.where(np.asarray(is_male, dtype=bool), 5.0, -161.0)
+    static_bmr = 6.25 * height - 5 * age + sex_constant
+    aging_per_day = 5.0 / 365.0
+
+    record_days = list(range(0, days + 1, record_every))
+    if record_days[-1] != days:
+        record_days.append(days)
+    recorded = np.empty((weight.shape[0], len(record_days)))
+    recorded[:, 0] = weight
+    next_record = 1
+
+    for day in range(1, days + 1):
+        bmr = 10 * weight + static_bmr - aging_per_day * (day - 1)
+        expenditure = bmr * activity_multiplier
+        weight += (daily_intake - expenditure) / ENERGY_PER_KG
+        np.maximum(weight, MIN_WEIGHT_KG, out=weight)
+
+        if next_record < len(record_days) and day == record_days[next_record]:
+            recorded[:, next_record] = weight
+            next_record += 1
+
+    return recorded, weight, record_days
@@ -18,7 +18,7 @@ RED='\033[0;31m'
 NC='\033[0m' # No Color
 
 # Check if MongoDB is running
-echo -e "\n${BLUE}[1/8]${NC} Checking MongoDB..."
+echo -e "\n${BLUE}[1/7]${NC} Checking MongoDB..."
 if mongosh --eval "db.version()" > /dev/null 2>&1; then
     echo -e "${GREEN}✓${NC} MongoDB is running"
 else
@@ -31,7 +31,7 @@ else
 fi
 
 # Install backend dependencies
-echo -e "\n${BLUE}[2/8]${NC} Installing backend dependencies..."
+echo -e "\n${BLUE}[2/7]${NC} Installing backend dependencies..."
 cd "$SCRIPT_DIR/backend"
 if [ ! -d "node_modules" ]; then
     npm install
@@ -41,7 +41,7 @@ else
 fi
 
 # Install frontend dependencies
-echo -e "\n${BLUE}[3/8]${NC} Installing frontend dependencies..."
+echo -e "\n${BLUE}[3/7]${NC} Installing frontend dependencies..."
 cd "$SCRIPT_DIR/frontend"
 if [ ! -d "node_modules" ]; then
     npm install
@@ -51,7 +51,7 @@ else
 fi
 
 # Setup Python environment
-echo -e "\n${BLUE}[4/8]${NC} Setting up Python environment..."
+echo -e "\n${BLUE}[4/7]${NC} Setting up Python environment..."
 cd "$SCRIPT_DIR/ml-service"
 
 if [ ! -d "venv" ]; then
@@ -75,27 +75,19 @@ else
     echo -e "${YELLOW}⊙${NC} Python dependencies already installed"
 fi
 
-# Train ML model
-echo -e "\n${BLUE}[5/8]${NC} Training ML model with Kaggle dataset..."
-if [ ! -f "models/nutrition_model.pkl" ]; then
-    python train_model_with_real_data.py
-    echo -e "${GREEN}✓${NC} ML model trained successfully"
+# Build meal database and train ML models
+echo -e "\n${BLUE}[5/7]${NC} Building meal database and training ML models..."
+# Stages whose code and inputs are unchanged are skipped; independent stages run in parallel
+if python pipeline.py; then
+    echo -e "${GREEN}✓${NC} Training pipeline up to date"
 else
-    echo -e "${YELLOW}⊙${NC} ML model already exists (skipping training)"
-    echo "To retrain: rm models/nutrition_model.pkl && ./setup_and_train.sh"
-fi
-
-# Extract meal database
-echo -e "\n${BLUE}[6/8]${NC} Extracting meals from Kaggle dataset..."
-if [ ! -f "../backend/seeds/meals_seed.json" ]; then
-    python create_meal_database.py
-    echo -e "${GREEN}✓${NC} Meal database created"
-else
-    echo -e "${YELLOW}⊙${NC} Meal database already exists (skipping extraction)"
+    echo -e "${RED}✗${NC} Training pipeline failed (logs in ml-service/logs/pipeline/)"
+    echo "To force a stage: python pipeline.py --force calorie_model"
+    exit 1
 fi
 
 # Seed MongoDB
-echo -e "\n${BLUE}[7/8]${NC} Seeding MongoDB with meals..."
+echo -e "\n${BLUE}[6/7]${NC} Seeding MongoDB with meals..."
 cd "$SCRIPT_DIR/backend"
 
 echo "Do you want to seed the database? This will delete existing meals. (y/N)"
@@ -108,7 +100,7 @@ else
 fi
 
 # Create .env files if they don't exist
-echo -e "\n${BLUE}[8/8]${NC} Checking environment files..."
+echo -e "\n${BLUE}[7/7]${NC} Checking environment files..."
 
 # Backend .env
 if [ ! -f "$SCRIPT_DIR/backend/.env" ]; then